@@ -1,52 +1,33 @@
-from datetime import datetime, timedelta
-from src.app import create_app
-from src.models import Shop, Service, User, Barber, Appointment, db
 from pathlib import Path
-import json
-from src.models.barbershop import Shop
-from src.database.db import db
+from typing import Dict, Optional
+from src.services.bulk import iter_json_array
+from src.services.ingestion import parse_feature
+from src.services.shop_sync import ShopSyncEngine
 
-def load_barbershop_data():
-    """Load initial barbershop data from JSON"""
-    data_path = Path(__file__).parent.parent / 'data' / 'bbs_data.JSON'
-    
+DATA_PATH = Path(__file__).parent.parent / 'data' / 'bbs_data.JSON'
+
+def load_barbershop_data(path: Optional[Path] = None, prune: bool = False, batch_size: int = 5000) -> Optional[Dict[str, int]]:
+    """Stream ArcGIS features from JSON, COPY them into staging and swap them in with one commit"""
     try:
-        with open(data_path, 'r') as f:
-            data = json.load(f)
-            
-        for shop in data:
-            attrs = shop['attributes']
-            geom = shop['geometry']
-            
-            new_shop = Shop(
-                name=attrs['BARBERSHOP'],
-                address=attrs['ADDRESS'],
-                phone=attrs['PHONE'],
-                latitude=float(attrs['LATITUDE']),
-                longitude=float(attrs['LONGITUDE']),
-                ward=int(float(attrs['WARD'])),
-                zipcode=attrs['ZIPCODE']
+        with open(path or DATA_PATH, 'r', encoding='utf-8') as f:
+            records = (
+                record for record in map(parse_feature, iter_json_array(f))
+                if record is not None
             )
-            db.session.add(new_shop)
-        
-        db.session.commit()
-        return True
-        
+            counts = ShopSyncEngine(batch_size=batch_size).load(records, prune=prune)
     except Exception as e:
         print(f"Error loading barbershop data: {e}")
-        db.session.rollback()
-        return False
+        return None
 
-def seed_database():
-    """Initialize database with seed data"""
-    try:
-        # Clear existing data
-        Shop.query.delete()
-        
-        # Load barbershop data
-        success = load_barbershop_data()
-        
-        return success
-    except Exception as e:
-        print(f"Error seeding database: {e}")
-        return False
\ No newline at end of file
+    if counts['inserted'] or counts['updated'] or counts.get('deleted'):
+        from src.services.map_tiles import map_tiles
+        from src.services.nearby_cache import nearby_cache
+        from src.services.shop_index import shop_index
+        nearby_cache.invalidate()
+        shop_index.invalidate()
+        map_tiles.invalidate()
+    return counts
+
+def seed_database(path: Optional[Path] = None, prune: bool = False) -> Optional[Dict[str, int]]:
+    """Initialize or refresh the database with seed data; prune=True removes unclaimed shops missing from the file"""
+    return load_barbershop_data(path, prune=prune)
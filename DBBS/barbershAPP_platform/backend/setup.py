@@ -16,6 +16,7 @@ def get_requirements() -> List[str]:
         "redis>=4.0.0",
         "twilio==8.0.0",
         "geojson==3.0.1",  # Fixed geojson version
+        "numpy>=1.24.0",
         "arcgis>=2.0.0"    
     ]
 
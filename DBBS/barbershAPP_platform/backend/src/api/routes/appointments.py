@@ -1,26 +1,90 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from datetime import datetime
 from src.utils.auth_decorator import require_auth
+from src.middleware.validation import validate_pagination, encode_cursor
 from src.models.appointment import Appointment
+from src.models.barber import Barber
 from src.database.db import db
 from src.services.Mail import MailService
-from src.schemas.appointment import AppointmentSchema #type: ignore
+from src.services.availability_cache import availability_cache
+from src.services.holds import slot_holds
+from src.schemas.appointments import AppointmentSchema #type: ignore
 from marshmallow import ValidationError #type: ignore
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from src.services.slots import alternative_slots, is_slot_conflict
+from src.services.bulk import FORMATS, AppointmentImporter, export_appointments
+import io
 import logging
 
 logger = logging.getLogger(__name__)
 appointments_bp = Blueprint('appointments', __name__)
 
+# Loader options per endpoint: listings serialize the barber, single-appointment
+# responses also mention the shop in the notification email
+LIST_OPTIONS = (joinedload(Appointment.barber),)
+
+def detail_options():
+    """Built per call: Barber.barbershop is a backref that only exists once Barbershop is mapped"""
+    return (joinedload(Appointment.barber).joinedload(Barber.barbershop),)
+
+def booking_conflict(barber_id, requested, message):
+    """409 response listing the nearest open slots"""
+    return jsonify({
+        'success': False,
+        'error': message,
+        'alternatives': alternative_slots(barber_id, requested)
+    }), 409
+
+def load_appointment(appointment_id, user_id):
+    """One appointment with everything its response and email touch, in one query"""
+    return Appointment.query.options(*detail_options()).filter_by(
+        id=appointment_id, user_id=user_id
+    ).first()
+
 @appointments_bp.route('/appointments', methods=['GET'])
 @require_auth
-def get_appointments():
-    """Get all appointments for the authenticated user"""
+@validate_pagination
+def get_appointments(page, per_page, cursor):
+    """Get the authenticated user's appointments, newest first, one keyset page at a time"""
     try:
-        user_id = request.user.get('id')
-        appointments = Appointment.query.filter_by(user_id=user_id).all()
+        try:
+            date_from = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+            date_to = datetime.fromisoformat(request.args['to']) if request.args.get('to') else None
+        except ValueError:
+            return jsonify({'success': False, 'error': 'from and to must be ISO dates'}), 400
+        statuses = [status for status in request.args.get('status', '').split(',') if status]
+
+        query = Appointment.query.options(*LIST_OPTIONS).filter(Appointment.user_id == request.user.get('id'))
+        if statuses:
+            query = query.filter(Appointment.status.in_(statuses))
+        if date_from:
+            query = query.filter(Appointment.appointment_datetime >= date_from)
+        if date_to:
+            query = query.filter(Appointment.appointment_datetime < date_to)
+        if cursor:
+            moment, last_id = cursor
+            query = query.filter(or_(
+                Appointment.appointment_datetime < moment,
+                and_(Appointment.appointment_datetime == moment, Appointment.id < last_id)
+            ))
+
+        # One extra row tells us whether another page exists without a COUNT(*)
+        rows = query.order_by(
+            Appointment.appointment_datetime.desc(),
+            Appointment.id.desc()
+        ).limit(per_page + 1).all()
+        appointments = rows[:per_page]
+        next_cursor = None
+        if len(rows) > per_page:
+            last = appointments[-1]
+            next_cursor = encode_cursor(last.appointment_datetime, last.id)
+
         return jsonify({
             'success': True,
-            'appointments': [apt.to_dict() for apt in appointments]
+            'appointments': [apt.to_dict() for apt in appointments],
+            'next_cursor': next_cursor
         })
     except Exception as e:
         logger.error(f"Error fetching appointments: {str(e)}")
@@ -29,7 +93,8 @@ def get_appointments():
 @appointments_bp.route('/appointments', methods=['POST'])
 @require_auth
 def create_appointment():
-    """Create a new appointment"""
+    """Create a new appointment, consuming the client's slot hold if any"""
+    requested_slot = hold_token = owner = None
     try:
         data = request.get_json()
         schema = AppointmentSchema()
@@ -47,13 +112,24 @@ def create_appointment():
         # Create new appointment
         new_appointment = Appointment(
             user_id=request.user.get('id'),
-            shop_id=validated_data['shop_id'],
-            service=validated_data['service'],
-            date=datetime.fromisoformat(validated_data['date'])
+            barber_id=validated_data['barber_id'],
+            appointment_datetime=validated_data['date'],
+            duration_minutes=validated_data.get('duration_minutes', 30),
+            status='scheduled'
         )
+
+        requested_slot = (new_appointment.barber_id, new_appointment.appointment_datetime)
+        hold_token = validated_data.get('hold_token')
+        owner = slot_holds.claim(*requested_slot, hold_token)
+        if owner is None:
+            return booking_conflict(*requested_slot, 'Booking conflict: the slot is held by another client')
         
         db.session.add(new_appointment)
+        db.session.flush()
+        appointment_id = new_appointment.id
         db.session.commit()
+        slot_holds.release(*requested_slot, owner)
+        new_appointment = load_appointment(appointment_id, request.user.get('id'))
         
         # Send confirmation email
         try:
@@ -61,10 +137,9 @@ def create_appointment():
                 email=request.user.get('email'),
                 appointment_details={
                     'name': request.user.get('name'),
-                    'date': new_appointment.date.strftime('%Y-%m-%d'),
-                    'time': new_appointment.date.strftime('%H:%M'),
-                    'service': new_appointment.service,
-                    'shop': new_appointment.shop.name
+                    'date': new_appointment.appointment_datetime.strftime('%Y-%m-%d'),
+                    'time': new_appointment.appointment_datetime.strftime('%H:%M'),
+                    'shop': new_appointment.barber.barbershop.name
                 }
             )
         except Exception as e:
@@ -76,8 +151,17 @@ def create_appointment():
             'appointment': new_appointment.to_dict()
         }), 201
 
+    except IntegrityError as e:
+        db.session.rollback()
+        slot_holds.release_claim(*requested_slot, owner, hold_token)
+        if is_slot_conflict(e):
+            return booking_conflict(*requested_slot, 'Booking conflict: the barber is already booked at that time')
+        logger.error(f"Error creating appointment: {str(e)}")
+        return jsonify({'success': False, 'error': 'Failed to create appointment'}), 500
     except Exception as e:
         db.session.rollback()
+        if requested_slot:
+            slot_holds.release_claim(*requested_slot, owner, hold_token)
         logger.error(f"Error creating appointment: {str(e)}")
         return jsonify({'success': False, 'error': 'Failed to create appointment'}), 500
 
@@ -87,7 +171,7 @@ def update_appointment(appointment_id):
     """Update an existing appointment"""
     try:
         user_id = request.user.get('id')
-        appointment = Appointment.query.filter_by(id=appointment_id, user_id=user_id).first()
+        appointment = load_appointment(appointment_id, user_id)
         
         if not appointment:
             return jsonify({
@@ -95,6 +179,7 @@ def update_appointment(appointment_id):
                 'error': 'Appointment not found or unauthorized'
             }), 404
         
+        previous_slot = (appointment.barber_id, appointment.appointment_datetime)
         data = request.get_json()
         schema = AppointmentSchema(partial=True)
         
@@ -107,14 +192,21 @@ def update_appointment(appointment_id):
                 'messages': err.messages
             }), 400
             
+        if 'barber_id' in validated_data:
+            appointment.barber_id = validated_data['barber_id']
         if 'date' in validated_data:
-            appointment.date = datetime.fromisoformat(validated_data['date'])
-        if 'service' in validated_data:
-            appointment.service = validated_data['service']
+            appointment.appointment_datetime = validated_data['date']
+        if 'duration_minutes' in validated_data:
+            appointment.duration_minutes = validated_data['duration_minutes']
         if 'status' in validated_data:
             appointment.status = validated_data['status']
+        requested_slot = (appointment.barber_id, appointment.appointment_datetime)
             
         db.session.commit()
+        # Commit expires the instance; reload it and its relations in a single round trip
+        appointment = load_appointment(appointment_id, user_id)
+        availability_cache.invalidate(*previous_slot)
+        availability_cache.invalidate(appointment.barber_id, appointment.appointment_datetime)
         
         # Send update notification
         try:
@@ -122,10 +214,9 @@ def update_appointment(appointment_id):
                 email=request.user.get('email'),
                 appointment_details={
                     'name': request.user.get('name'),
-                    'date': appointment.date.strftime('%Y-%m-%d'),
-                    'time': appointment.date.strftime('%H:%M'),
-                    'service': appointment.service,
-                    'shop': appointment.shop.name,
+                    'date': appointment.appointment_datetime.strftime('%Y-%m-%d'),
+                    'time': appointment.appointment_datetime.strftime('%H:%M'),
+                    'shop': appointment.barber.barbershop.name,
                     'status': appointment.status
                 }
             )
@@ -137,6 +228,12 @@ def update_appointment(appointment_id):
             'message': 'Appointment updated successfully',
             'appointment': appointment.to_dict()
         })
+    except IntegrityError as e:
+        db.session.rollback()
+        if is_slot_conflict(e):
+            return booking_conflict(*requested_slot, 'Booking conflict: the barber is already booked at that time')
+        logger.error(f"Error updating appointment: {str(e)}")
+        return jsonify({'success': False, 'error': 'Failed to update appointment'}), 500
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error updating appointment: {str(e)}")
@@ -148,7 +245,7 @@ def cancel_appointment(appointment_id):
     """Cancel an existing appointment"""
     try:
         user_id = request.user.get('id')
-        appointment = Appointment.query.filter_by(id=appointment_id, user_id=user_id).first()
+        appointment = load_appointment(appointment_id, user_id)
         
         if not appointment:
             return jsonify({
@@ -158,6 +255,8 @@ def cancel_appointment(appointment_id):
             
         appointment.status = 'cancelled'
         db.session.commit()
+        appointment = load_appointment(appointment_id, user_id)
+        availability_cache.invalidate(appointment.barber_id, appointment.appointment_datetime)
         
         # Send cancellation notification
         try:
@@ -165,10 +264,9 @@ def cancel_appointment(appointment_id):
                 email=request.user.get('email'),
                 appointment_details={
                     'name': request.user.get('name'),
-                    'date': appointment.date.strftime('%Y-%m-%d'),
-                    'time': appointment.date.strftime('%H:%M'),
-                    'service': appointment.service,
-                    'shop': appointment.shop.name
+                    'date': appointment.appointment_datetime.strftime('%Y-%m-%d'),
+                    'time': appointment.appointment_datetime.strftime('%H:%M'),
+                    'shop': appointment.barber.barbershop.name
                 }
             )
         except Exception as e:
@@ -182,4 +280,51 @@ def cancel_appointment(appointment_id):
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error cancelling appointment: {str(e)}")
-        return jsonify({'success': False, 'error': 'Failed to cancel appointment'}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'error': 'Failed to cancel appointment'}), 500
+
+def is_shop_staff(shop_id):
+    """Bulk transfers are limited to barbers of the shop"""
+    return db.session.query(Barber.id).filter_by(
+        barbershop_id=shop_id, email=request.user.get('email')
+    ).first() is not None
+
+@appointments_bp.route('/appointments/shops/<int:shop_id>/export', methods=['GET'])
+@require_auth
+def export_shop_appointments(shop_id):
+    """Stream a shop's appointments as CSV or NDJSON"""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return jsonify({'success': False, 'error': f"format must be one of {', '.join(FORMATS)}"}), 400
+    if not is_shop_staff(shop_id):
+        return jsonify({'success': False, 'error': 'Not a member of this shop'}), 403
+    try:
+        start = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+        end = datetime.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'from and to must be ISO dates'}), 400
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(export_appointments(fmt, shop_id=shop_id, start=start, end=end)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=appointments-{shop_id}.{fmt}'}
+    )
+
+@appointments_bp.route('/appointments/shops/<int:shop_id>/import', methods=['POST'])
+@require_auth
+def import_shop_appointments(shop_id):
+    """Stream CSV or NDJSON appointment history from the request body into a shop"""
+    fmt = request.args.get('format') or ('ndjson' if 'ndjson' in (request.mimetype or '') else 'csv')
+    if fmt not in FORMATS:
+        return jsonify({'success': False, 'error': f"format must be one of {', '.join(FORMATS)}"}), 400
+    if not is_shop_staff(shop_id):
+        return jsonify({'success': False, 'error': 'Not a member of this shop'}), 403
+    try:
+        # Read the body incrementally instead of buffering it via request.data
+        stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+        result = AppointmentImporter(shop_id=shop_id).run(stream, fmt)
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error importing appointments: {str(e)}")
+        return jsonify({'success': False, 'error': 'Failed to import appointments'}), 500
@@ -1,8 +1,8 @@
 from flask import Blueprint, request, jsonify
-from barbershop_platform.backend.src.services.firebase.firebase_messaging import FirebaseMessaging
+from src.services.firebase.firebase_messaging import FirebaseMessaging
 from src.middleware.firebase_auth import require_firebase_auth
 from datetime import datetime
-from src.services.subscribers import get_barber_subscribers
+from src.services.subscribers import get_barber_subscribers, subscribe, unsubscribe
 from hashlib import sha256
 import re
 
@@ -45,7 +45,7 @@ async def update_availability():
         
         # Send notifications to all subscribers
         for subscriber in subscribers:
-            await messaging.send_bilingual_notification(
+            messaging.send_bilingual_notification(
                 token=subscriber['token'],
                 message_type='AVAILABILITY_UPDATE',
                 variables={
@@ -67,4 +67,24 @@ async def update_availability():
     except ValueError as ve:
         return jsonify({'error': str(ve)}), 400
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@availability_bp.route('/barber/<barber_id>/subscribe', methods=['POST'])
+@require_firebase_auth
+def subscribe_to_barber(barber_id):
+    """Get availability pushes for a barber"""
+    try:
+        subscribe(barber_id, request.user['uid'])
+        return jsonify({'success': True}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@availability_bp.route('/barber/<barber_id>/subscribe', methods=['DELETE'])
+@require_firebase_auth
+def unsubscribe_from_barber(barber_id):
+    """Stop availability pushes for a barber"""
+    try:
+        unsubscribe(barber_id, request.user['uid'])
+        return jsonify({'success': True}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
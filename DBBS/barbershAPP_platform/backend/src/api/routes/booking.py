@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
-from datetime import datetime, time, timedelta
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from datetime import datetime
 from src.database import db
 from src.models.appointment import Appointment
 from src.models.availability import Availability
@@ -8,58 +10,81 @@ from src.models.barber import Barber
 from src.models.queue import Queue
 from src.database.db import db
 from src.services.tasks import QueueService
+from src.services.availability_cache import availability_cache
+from src.services.slots import alternative_slots, is_slot_conflict
+from src.services.earliest import find_earliest_openings
+from src.services.holds import slot_holds
+from src.services.shop_index import shop_index
+import src.services.GISService as gis_module
 
 booking_bp = Blueprint('booking', __name__)
 queue_service = QueueService()
 
+MAX_AVAILABILITY_DAYS = 31
+MAX_AVAILABILITY_BARBERS = 50
+MAX_EARLIEST_SHOPS = 200
+MAX_EARLIEST_RESULTS = 20
+
 
 
 def leave_queue(shop_id):
     return jsonify({'message': 'Left queue'})
 
-def generate_time_slots(date):
-    """Generate available time slots for a given date"""
-    slots = []
-    start = time(9, 0)  # 9 AM
-    end = time(17, 0)   # 5 PM
-    slot_duration = timedelta(minutes=30)
-    
-    current = datetime.combine(date, start)
-    end_dt = datetime.combine(date, end)
-    
-    while current < end_dt:
-        slots.append(current)
-        current += slot_duration
-    
-    return slots
-
 # ...existing code...
 
+def slot_conflict(barber_id, requested, message):
+    """409 response listing the nearest open slots"""
+    return jsonify({
+        "error": message,
+        "alternatives": alternative_slots(barber_id, requested)
+    }), 409
+
 @booking_bp.route('/appointments', methods=['POST'])
+@jwt_required()
 def create_appointment():
-    """Create a new appointment"""
-    data = request.json
+    """Create a new appointment, consuming the client's slot hold if any"""
+    data = request.json or {}
+    requested = hold_token = owner = None
     try:
+        requested = datetime.fromisoformat(data['datetime'])
+        hold_token = data.get('hold_token')
+        owner = slot_holds.claim(data['barber_id'], requested, hold_token)
+        if owner is None:
+            return slot_conflict(data['barber_id'], requested, "Slot conflict: the slot is held by another client")
+
         appointment = Appointment(
+            user_id=get_jwt_identity(),
             barber_id=data['barber_id'],
-            barbershop_id=data['barbershop_id'],
-            client_name=data['client_name'],
-            client_email=data.get('client_email'),
-            client_phone=data.get('client_phone'),
-            appointment_datetime=datetime.fromisoformat(data['datetime']),
+            appointment_datetime=requested,
+            duration_minutes=data.get('duration_minutes', 30),
             status='scheduled'
         )
         db.session.add(appointment)
+        db.session.flush()
+        appointment_id = appointment.id
         db.session.commit()
+        # Reload the expired instance together with the barber its response serializes
+        appointment = Appointment.query.options(joinedload(Appointment.barber)).get(appointment_id)
+        availability_cache.slot_booked(
+            appointment.barber_id,
+            appointment.appointment_datetime,
+            appointment.duration_minutes
+        )
+        slot_holds.release(appointment.barber_id, requested, owner)
 
         #  notification logic
-        queue_service.send_notification.delay(
-            appointment_id=appointment.id,
-            notification_type='email' if appointment.client_email else 'sms'
-        )
+        queue_service.send_notification.delay(appointment_id=appointment.id)
         
         return jsonify(appointment.to_dict()), 201
+    except IntegrityError as e:
+        db.session.rollback()
+        slot_holds.release_claim(data['barber_id'], requested, owner, hold_token)
+        if not is_slot_conflict(e):
+            return jsonify({"error": str(e)}), 400
+        return slot_conflict(data['barber_id'], requested, "Slot conflict: the barber is already booked at that time")
     except Exception as e:
+        db.session.rollback()
+        slot_holds.release_claim(data.get('barber_id'), requested, owner, hold_token)
         return jsonify({"error": str(e)}), 400
 
 @booking_bp.route('/barbers/<int:barber_id>/available-slots', methods=['GET'])
@@ -71,31 +96,136 @@ def get_available_slots(barber_id):
         
     try:
         target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        
-        # Get barber's availability
-        availability = Availability.query.filter_by(
-            barber_id=barber_id,
-            date=target_date,
-            is_available=True
-        ).first()
-        
-        if not availability:
-            return jsonify([])
-        
-        # Get booked appointments
-        booked_slots = Appointment.query.filter_by(
-            barber_id=barber_id,
-            appointment_datetime=target_date
-        ).all()
-        
-        # Generate available slots
-        all_slots = generate_time_slots(target_date)
-        available_slots = [
-            slot.strftime('%H:%M')
-            for slot in all_slots 
-            if slot not in [appt.appointment_datetime for appt in booked_slots]
-        ]
-        
-        return jsonify(available_slots)
+        slots, _ = slot_holds.split_held(
+            availability_cache.free_slots(target_date, target_date, barber_ids=[barber_id])
+        )
+        return jsonify(slots.get(barber_id, {}).get(target_date, []))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+@booking_bp.route('/availability', methods=['GET'])
+def get_batch_availability():
+    """Get free slots for several barbers, or a whole shop, over a date range"""
+    barber_ids = request.args.get('barber_ids')
+    shop_id = request.args.get('shop_id', type=int)
+    start_str = request.args.get('start')
+    if not start_str or (not barber_ids and shop_id is None):
+        return jsonify({"error": "start and either barber_ids or shop_id are required"}), 400
+
+    try:
+        start_date = datetime.strptime(start_str, '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args.get('end', start_str), '%Y-%m-%d').date()
+        ids = [int(value) for value in barber_ids.split(',')] if barber_ids else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if end_date < start_date or (end_date - start_date).days >= MAX_AVAILABILITY_DAYS:
+        return jsonify({"error": f"Date range must cover 1 to {MAX_AVAILABILITY_DAYS} days"}), 400
+    if ids and len(ids) > MAX_AVAILABILITY_BARBERS:
+        return jsonify({"error": f"At most {MAX_AVAILABILITY_BARBERS} barbers per request"}), 400
+
+    try:
+        slots, held = slot_holds.split_held(
+            availability_cache.free_slots(start_date, end_date, barber_ids=ids, shop_id=shop_id)
+        )
+        return jsonify({
+            'start': start_date.isoformat(),
+            'end': end_date.isoformat(),
+            'barbers': {
+                str(barber_id): {day.isoformat(): day_slots for day, day_slots in days.items()}
+                for barber_id, days in slots.items()
+            },
+            'held': {
+                str(barber_id): {day.isoformat(): day_slots for day, day_slots in days.items()}
+                for barber_id, days in held.items()
+            }
+        })
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
\ No newline at end of file
+        return jsonify({"error": str(e)}), 400
+
+
+@booking_bp.route('/availability/cache-stats', methods=['GET'])
+def get_availability_cache_stats():
+    """Hit/miss counters for the materialized availability cache"""
+    return jsonify(availability_cache.stats())
+
+
+@booking_bp.route('/earliest', methods=['GET'])
+def get_earliest_nearby():
+    """Get the soonest openings at shops within a drive time of a point"""
+    try:
+        lat = float(request.args['lat'])
+        lon = float(request.args['lon'])
+    except (KeyError, ValueError):
+        return jsonify({"error": "lat and lon parameters are required"}), 400
+
+    minutes = request.args.get('minutes', 15, type=int)
+    limit = min(request.args.get('limit', 5, type=int), MAX_EARLIEST_RESULTS)
+    days = min(request.args.get('days', 7, type=int), MAX_AVAILABILITY_DAYS)
+
+    try:
+        radius = gis_module.GeoService.DRIVE_TIMES.get(minutes, 25000)
+        shops = shop_index.within(lat, lon, radius)[:MAX_EARLIEST_SHOPS]
+        names = {shop.shop_id: shop.name for shop in shops}
+        openings = find_earliest_openings([shop.shop_id for shop in shops], limit=limit, horizon_days=days)
+        return jsonify({
+            'drive_time': minutes,
+            'openings': [
+                {
+                    'shop_id': opening.shop_id,
+                    'shop_name': names.get(opening.shop_id),
+                    'distance_rank': opening.rank + 1,
+                    'barber_id': opening.barber_id,
+                    'start': opening.start.isoformat()
+                }
+                for opening in openings
+            ]
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@booking_bp.route('/holds', methods=['POST'])
+def create_hold():
+    """Tentatively reserve a free slot while the client checks out"""
+    data = request.json or {}
+    try:
+        barber_id = int(data['barber_id'])
+        requested = datetime.fromisoformat(data['datetime'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "barber_id and datetime are required"}), 400
+
+    day = requested.date()
+    free = availability_cache.free_slots(day, day, barber_ids=[barber_id])
+    if requested.strftime('%H:%M') not in free.get(barber_id, {}).get(day, []):
+        return slot_conflict(barber_id, requested, "Slot conflict: the slot is not available")
+
+    try:
+        hold = slot_holds.hold(barber_id, requested)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+    if not hold:
+        return slot_conflict(barber_id, requested, "Slot conflict: the slot is held by another client")
+
+    token, expires_at = hold
+    return jsonify({
+        'hold_token': token,
+        'barber_id': barber_id,
+        'datetime': requested.isoformat(),
+        'expires_at': datetime.utcfromtimestamp(expires_at).isoformat()
+    }), 201
+
+@booking_bp.route('/holds', methods=['DELETE'])
+def release_hold():
+    """Give a held slot back before it expires"""
+    data = request.json or {}
+    try:
+        barber_id = int(data['barber_id'])
+        requested = datetime.fromisoformat(data['datetime'])
+        token = data['hold_token']
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "barber_id, datetime and hold_token are required"}), 400
+
+    if not slot_holds.release(barber_id, requested, token):
+        return jsonify({"error": "Hold not found or already expired"}), 404
+    return jsonify({'success': True})
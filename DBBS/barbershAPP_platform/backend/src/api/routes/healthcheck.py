@@ -75,4 +75,26 @@ def check_redis():
         }
     except Exception as e:
         logger.error(f"Redis health check failed: {str(e)}")
-        return {"status": "error", "error": str(e)}
\ No newline at end of file
+        return {"status": "error", "error": str(e)}
+
+@health_bp.route('/geocode-stats')
+def geocode_stats():
+    """Hit rates of the in-process and Redis geocoding tiers"""
+    from src.services.geocoding import geocoding_service
+    try:
+        return jsonify(geocoding_service.stats())
+    except Exception as e:
+        logger.error(f"Geocode stats failed: {str(e)}")
+        return jsonify({"error": str(e)}), 503
+
+@health_bp.route('/upstreams')
+def upstream_stats():
+    """Latency percentiles, error counts and circuit state per outbound HTTP upstream (this worker)"""
+    from src.services.http_client import CLIENTS
+    return jsonify({name: client.stats() for name, client in CLIENTS.items()})
+
+@health_bp.route('/shop-replica')
+def shop_replica_stats():
+    """Freshness of the listener-fed shop state replica (this worker)"""
+    from src.services.firebase.replica import shop_replica
+    return jsonify(shop_replica.stats())
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
 from src.models import Barbershop, Barber, Queue 
 from src.services.geo import GeoService
@@ -6,7 +6,14 @@ from src.services.tasks import QueueService
 from src.database.db import db
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from sqlalchemy import and_, or_
+from src.middleware.validation import encode_cursor, validate_pagination
 from src.services.GISService import GISService
+from src.services.map_tiles import map_tiles
+from src.services.nearby_cache import nearby_cache
+from src.services.shop_index import shop_index
+from src.utils.tiles import MAX_ZOOM, is_valid
+import hashlib
 
 # Initialize blueprints once
 shop_bp = Blueprint('shop', __name__)
@@ -44,22 +51,78 @@ def setup_services():
             queue_service.redis_url = current_app.config.get('REDIS_URL')
 
 @shop_bp.route('/shops', methods=['GET'])
-def get_shops():
-    """Get all barbershops or search by location"""
+@validate_pagination
+def get_shops(page, per_page, cursor):
+    """Search shops by location, or list them oldest first one keyset page at a time"""
     try:
-        if is_local_environment():
-            shops = Barbershop.query.all()
-        elif 'lat' in request.args and 'lng' in request.args:
-            lat = float(request.args.get('lat'))
-            lng = float(request.args.get('lng'))
-            radius = float(request.args.get('radius', 5000))
-            shops = geo_service.find_nearby_shops(lat, lng, radius)
-        else:
-            shops = Barbershop.query.all()
-        return jsonify([shop.to_dict() for shop in shops])
+        # Location searches always answer with a plain list, whatever the environment
+        if 'lat' in request.args and 'lng' in request.args:
+            if is_local_environment():
+                shops = Barbershop.query.all()
+            else:
+                lat = float(request.args.get('lat'))
+                lng = float(request.args.get('lng'))
+                radius = float(request.args.get('radius', 5000))
+                shops = geo_service.find_nearby_shops(lat, lng, radius)
+            return jsonify([shop.to_dict() for shop in shops])
+
+        query = Barbershop.query
+        if cursor:
+            moment, last_id = cursor
+            query = query.filter(or_(
+                Barbershop.created_at > moment,
+                and_(Barbershop.created_at == moment, Barbershop.id > last_id)
+            ))
+        rows = query.order_by(Barbershop.created_at, Barbershop.id).limit(per_page + 1).all()
+        shops = rows[:per_page]
+        next_cursor = None
+        if len(rows) > per_page:
+            next_cursor = encode_cursor(shops[-1].created_at, shops[-1].id)
+        return jsonify({
+            'shops': [shop.to_dict() for shop in shops],
+            'next_cursor': next_cursor
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@shop_bp.route('/shops/map', methods=['GET'])
+def get_map_items():
+    """Clusters or shops for a map viewport: ?bbox=west,south,east,north&zoom=z"""
+    try:
+        west, south, east, north = (float(value) for value in request.args['bbox'].split(','))
+        zoom = int(request.args['zoom'])
+    except (KeyError, ValueError):
+        return jsonify({'error': 'bbox=west,south,east,north and an integer zoom are required'}), 400
+    if not (0 <= zoom <= MAX_ZOOM) or not (-90 <= south <= north <= 90) \
+            or not (-180 <= west <= 180 and -180 <= east <= 180):
+        return jsonify({'error': 'bbox or zoom out of range'}), 400
+
+    try:
+        return jsonify(map_tiles.viewport(west, south, east, north, zoom))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Map viewport query failed: {e}")
+        return jsonify({'error': 'Failed to load map'}), 500
+
+@shop_bp.route('/tiles/<int:z>/<int:x>/<int:y>.mvt', methods=['GET'])
+def get_vector_tile(z, x, y):
+    """Shop layer as a Mapbox Vector Tile, cacheable by browsers and CDNs"""
+    if not is_valid(z, x, y):
+        return jsonify({'error': 'Tile out of range'}), 404
+    try:
+        tile = map_tiles.mvt(z, x, y)
+    except Exception as e:
+        current_app.logger.error(f"Vector tile {z}/{x}/{y} failed: {e}")
+        return jsonify({'error': 'Failed to render tile'}), 500
+
+    etag = hashlib.md5(tile).hexdigest()
+    response = Response(tile, mimetype='application/vnd.mapbox-vector-tile')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('MVT_MAX_AGE', 300)
+    return response.make_conditional(request)
+
 @shop_bp.route('/shops/<int:shop_id>', methods=['GET'])
 def get_shop(shop_id):
     """Get details for a specific shop"""
@@ -80,6 +143,9 @@ def create_shop():
         )
         db.session.add(shop)
         db.session.commit()
+        nearby_cache.invalidate()
+        shop_index.invalidate()
+        map_tiles.invalidate_point(float(data['latitude']), float(data['longitude']))
         return jsonify({
             'success': True,
             'shop': shop.to_dict()
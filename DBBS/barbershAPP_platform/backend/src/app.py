@@ -15,6 +15,7 @@ from src.config.validator import check_config
 from src.config.settings import get_config
 from src.middleware.validation import validate_config
 from src.db_cli import db_cli
+from src.database.profiling import init_query_counter
 from src.api.routes.availability import availability_bp
 
 
@@ -66,7 +67,14 @@ def init_services(app: Flask) -> None:
     from src.services.tasks import queue_service
     from src.config.firebase_config import FirebaseConfig
     
+    from src.services.http_client import init_http_clients
+    from src.services.firebase.replica import shop_replica
+    from src.services.shop_index import shop_index
+    
     FirebaseConfig.init_app()
+    init_http_clients(app)
+    shop_replica.init_app(app)
+    shop_index.init_app(app)
     gis_service = GISService()
     gis_service.init_app(app)
     queue_service.init_app(app)
@@ -158,6 +166,7 @@ def create_app(config: Optional[dict] = None) -> Flask:
         register_blueprints(app)
         register_error_handlers(app)
         register_cli_commands(app)
+        init_query_counter(app)
         
         
         # Initialize Celery
@@ -23,6 +23,8 @@ class BaseConfig:
         'pool_recycle': 3600,
         'pool_timeout': 30
     }
+    QUERY_COUNT_ENABLED = os.getenv('QUERY_COUNT_ENABLED', 'false').lower() == 'true'
+    QUERY_COUNT_WARN = int(os.getenv('QUERY_COUNT_WARN', 10))
     
     # JWT Settings
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key')
@@ -41,6 +43,64 @@ class BaseConfig:
     CELERY_RESULT_SERIALIZER = 'json'
     CELERY_TIMEZONE = 'UTC'
     
+    # Availability cache; rules and slots are wall-clock times in the shops' zone
+    TIMEZONE = os.getenv('TIMEZONE', 'UTC')
+    SLOT_CACHE_TTL = int(os.getenv('SLOT_CACHE_TTL', 900))
+    SCHEDULE_CACHE_TTL = int(os.getenv('SCHEDULE_CACHE_TTL', 86400))
+    SLOT_HOLD_TTL = int(os.getenv('SLOT_HOLD_TTL', 300))
+    
+    # In-process shop spatial index; writes are picked up within one poll interval
+    SHOP_INDEX_TTL = int(os.getenv('SHOP_INDEX_TTL', 300))
+    SHOP_INDEX_POLL_INTERVAL = int(os.getenv('SHOP_INDEX_POLL_INTERVAL', 5))
+    
+    # Geocoding cache
+    GEOCODE_CACHE_TTL = int(os.getenv('GEOCODE_CACHE_TTL', 30 * 86400))
+    GEOCODE_NEGATIVE_TTL = int(os.getenv('GEOCODE_NEGATIVE_TTL', 300))
+    GEOCODE_LRU_SIZE = int(os.getenv('GEOCODE_LRU_SIZE', 1024))
+    GEOCODE_TIMEOUT = int(os.getenv('GEOCODE_TIMEOUT', 5))
+    
+    # Outbound HTTP (ArcGIS, Google, integration API): pooling, load shedding, retries, breaker
+    GIS_TIMEOUT = int(os.getenv('GIS_TIMEOUT', 10))
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 16))
+    HTTP_MAX_CONCURRENCY = int(os.getenv('HTTP_MAX_CONCURRENCY', 8))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 2))
+    HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+    HTTP_BREAKER_THRESHOLD = int(os.getenv('HTTP_BREAKER_THRESHOLD', 5))
+    HTTP_BREAKER_COOLDOWN = int(os.getenv('HTTP_BREAKER_COOLDOWN', 30))
+    HTTP_STALE_TTL = int(os.getenv('HTTP_STALE_TTL', 86400))
+    
+    # Drive-time isochrones; when enabled, a search that misses queues a background build
+    ROAD_NETWORK_PATH = os.getenv('ROAD_NETWORK_PATH')
+    ISOCHRONE_COMPUTE_ON_MISS = os.getenv('ISOCHRONE_COMPUTE_ON_MISS', 'false').lower() == 'true'
+    ISOCHRONE_CONCAVITY = float(os.getenv('ISOCHRONE_CONCAVITY', 0.3))
+    ISOCHRONE_BUFFER_METERS = int(os.getenv('ISOCHRONE_BUFFER_METERS', 250))
+    
+    # ArcGIS ingestion and hash-guarded shop sync
+    ARCGIS_PAGE_SIZE = int(os.getenv('ARCGIS_PAGE_SIZE', 1000))
+    SHOP_SYNC_BATCH_SIZE = int(os.getenv('SHOP_SYNC_BATCH_SIZE', 5000))
+    
+    # /nearby response cache (spatial part per geohash cell, live queue data separately)
+    NEARBY_CACHE_TTL = int(os.getenv('NEARBY_CACHE_TTL', 600))
+    NEARBY_LOCAL_TTL = int(os.getenv('NEARBY_LOCAL_TTL', 30))
+    NEARBY_LIVE_TTL = int(os.getenv('NEARBY_LIVE_TTL', 15))
+    
+    # Listener-fed replica of live shop state (one Firestore watch per worker)
+    SHOP_REPLICA_ENABLED = os.getenv('SHOP_REPLICA_ENABLED', 'false').lower() == 'true'
+    SHOP_REPLICA_CHECK_INTERVAL = int(os.getenv('SHOP_REPLICA_CHECK_INTERVAL', 15))
+    
+    # Availability fan-out: resolved subscribers per barber, dropped on (un)subscribe
+    SUBSCRIBER_CACHE_TTL = int(os.getenv('SUBSCRIBER_CACHE_TTL', 3600))
+    
+    # Map viewport tiles (clusters below MAP_CLUSTER_MAX_ZOOM; MAP_CLUSTER_GRID must be a power of two)
+    MAP_CLUSTER_MAX_ZOOM = int(os.getenv('MAP_CLUSTER_MAX_ZOOM', 15))
+    MAP_CLUSTER_GRID = int(os.getenv('MAP_CLUSTER_GRID', 8))
+    MAP_MAX_TILES = int(os.getenv('MAP_MAX_TILES', 64))
+    MAP_TILE_CACHE_TTL = int(os.getenv('MAP_TILE_CACHE_TTL', 3600))
+    MAP_LOCAL_TTL = int(os.getenv('MAP_LOCAL_TTL', 30))
+    MVT_EXTENT = int(os.getenv('MVT_EXTENT', 4096))
+    MVT_BUFFER = int(os.getenv('MVT_BUFFER', 64))
+    MVT_MAX_AGE = int(os.getenv('MVT_MAX_AGE', 300))  # browser/CDN freshness; Redis copy lives MAP_TILE_CACHE_TTL
+    
     # Email
     MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.getenv('MAIL_PORT', 587))
@@ -0,0 +1,34 @@
+from flask import Flask, g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    """Tally every statement sent to the database during a request"""
+    if has_request_context() and 'query_count' in g:
+        g.query_count += 1
+
+
+def init_query_counter(app: Flask) -> None:
+    """Report per-request query counts in an X-Query-Count header (debug only)"""
+    if not (app.debug or app.config.get('QUERY_COUNT_ENABLED')):
+        return
+
+    if not event.contains(Engine, 'before_cursor_execute', _count_query):
+        event.listen(Engine, 'before_cursor_execute', _count_query)
+
+    @app.before_request
+    def start_query_count():
+        g.query_count = 0
+
+    @app.after_request
+    def report_query_count(response):
+        count = g.pop('query_count', None)
+        if count is not None:
+            response.headers['X-Query-Count'] = str(count)
+            if count > app.config.get('QUERY_COUNT_WARN', 10):
+                logger.warning(f"{count} queries for {response.status_code} response - check for N+1 loads")
+        return response
@@ -1,6 +1,9 @@
 import click
 from flask.cli import with_appcontext
 from scripts.seed_data import seed_database
+from src.services.bulk import FORMATS, AppointmentImporter, export_appointments
+from src.services.isochrones import TIME_BUCKETS, CELL_PRECISION, isochrone_service
+from src.utils import geohash
 
 @click.group()
 def db_cli():
@@ -8,10 +11,83 @@ def db_cli():
     pass
 
 @db_cli.command('seed')
+@click.option('--source', type=click.Path(exists=True, dir_okay=False), help='ArcGIS feature JSON (defaults to data/bbs_data.JSON).')
+@click.option('--prune/--keep-missing', default=False, help='Delete external shops missing from the file that no barber or queue uses.')
 @with_appcontext
-def seed_db():
-    """Seed the database with initial barbershop data."""
-    if seed_database():
-        click.echo('✅ Database seeded successfully')
+def seed_db(source, prune):
+    """Seed or reload barbershops from the ArcGIS JSON in one atomic swap."""
+    counts = seed_database(source, prune=prune)
+    if counts is not None:
+        click.echo(
+            f"✅ Database seeded: {counts['inserted']} inserted, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged, {counts.get('deleted', 0)} removed"
+        )
     else:
-        click.echo('❌ Error seeding database')
\ No newline at end of file
+        click.echo('❌ Error seeding database')
+
+@db_cli.command('import-appointments')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default='csv')
+@click.option('--shop-id', type=int, help='Only accept barbers of this shop.')
+@click.option('--batch-size', type=int, default=5000)
+@with_appcontext
+def import_appointments(source, fmt, shop_id, batch_size):
+    """Stream appointment history from a CSV/NDJSON file ('-' for stdin)."""
+    result = AppointmentImporter(shop_id=shop_id, batch_size=batch_size).run(source, fmt)
+    click.echo(f"✅ Imported {result['imported']} appointments, skipped {result['skipped']}")
+    for error in result['errors']:
+        click.echo(f"   {error}")
+
+
+@db_cli.command('export-appointments')
+@click.argument('target', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default='csv')
+@click.option('--shop-id', type=int)
+@click.option('--start', type=click.DateTime(), help='Appointments on or after this date.')
+@click.option('--end', type=click.DateTime(), help='Appointments before this date.')
+@with_appcontext
+def export_appointments_command(target, fmt, shop_id, start, end):
+    """Stream appointments to a CSV/NDJSON file ('-' for stdout)."""
+    for chunk in export_appointments(fmt, shop_id=shop_id, start=start, end=end):
+        target.write(chunk)
+
+
+
+@db_cli.command('build-isochrones')
+@click.option('--ring', type=int, default=1, help='Neighbouring cells to include around each shop.')
+@with_appcontext
+def build_isochrones(ring):
+    """Precompute drive-time polygons for the cells around every shop."""
+    from sqlalchemy import func
+    from src.database.db import db
+    from src.models.barbershop import Barbershop
+
+    if isochrone_service.network() is None:
+        click.echo('❌ ROAD_NETWORK_PATH is not set or the file is missing')
+        return
+
+    cells = set()
+    for lat, lon in db.session.query(func.ST_Y(Barbershop.location), func.ST_X(Barbershop.location)):
+        frontier = {geohash.encode(lat, lon, CELL_PRECISION)}
+        for _ in range(ring):
+            frontier |= {neighbor for cell in frontier for neighbor in geohash.neighbors(cell)}
+        cells |= frontier
+
+    built = isochrone_service.precompute(sorted(cells), TIME_BUCKETS)
+    click.echo(f"✅ Built {built} isochrones for {len(cells)} cells")
+
+
+
+@db_cli.command('ingest-arcgis')
+@click.option('--full', is_flag=True, help='Ignore the high-water mark and fetch the whole layer.')
+@click.option('--page-size', type=int, help='Records per ArcGIS request (server caps apply).')
+@with_appcontext
+def ingest_arcgis(full, page_size):
+    """Page through the ArcGIS business layer and upsert barbershops."""
+    from src.services.ingestion import ingest_barbershops
+    result = ingest_barbershops(full=full, page_size=page_size)
+    click.echo(
+        f"✅ Processed {result['processed']} records: {result['inserted']} inserted, "
+        f"{result['updated']} updated, {result['unchanged']} unchanged "
+        f"(high-water mark: {result['high_water_mark']})"
+    )
@@ -1,24 +1,50 @@
 from flask import Blueprint, request, jsonify
 from src.services.GISService import GeoService
 from src.services.firebase.updates import FirebaseUpdates
+from src.services.isochrones import time_bucket
+from src.services.nearby_cache import nearby_cache
 
 location_bp = Blueprint('location', __name__)
 
 @location_bp.route('/nearby', methods=['GET'])
 async def get_nearby_shops():
-    """Get shops within specified drive time"""
+    """Get shops within specified drive time, or the nearest N with mode=nearest"""
     lat = float(request.args.get('lat'))
     lon = float(request.args.get('lon'))
-    drive_time = int(request.args.get('minutes', 30))
-    
-    # Get PostGIS results
-    shops = await GeoService.get_shops_by_drive_time(lat, lon, drive_time)
+
+    if request.args.get('mode') == 'nearest':
+        return await get_nearest_shops(lat, lon)
+
+    requested = int(request.args.get('minutes', 30))
+    # Searches are cached per precomputed drive time, so report the one actually used
+    drive_time = time_bucket(requested)
     
-    # Enhance with real-time data
-    enhanced_shops = await FirebaseUpdates.enhance_shop_data(shops)
+    # Spatial part from the per-cell cache, queue data from the live overlay
+    enhanced_shops = nearby_cache.shops(lat, lon, drive_time)
     
     return jsonify({
         'shops': enhanced_shops,
         'drive_time': drive_time,
+        'requested_drive_time': requested,
+        'total': len(enhanced_shops)
+    })
+
+async def get_nearest_shops(lat: float, lon: float):
+    """Fixed-cost page of the closest shops, optionally capped by radius"""
+    try:
+        page = GeoService.get_nearest_shops(
+            lat,
+            lon,
+            limit=request.args.get('limit', 20, type=int),
+            max_radius=request.args.get('radius', type=float),
+            cursor=request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    enhanced_shops = await FirebaseUpdates.enhance_shop_data(page['shops'])
+    return jsonify({
+        'shops': enhanced_shops,
+        'next_cursor': page['next_cursor'],
         'total': len(enhanced_shops)
-    })
\ No newline at end of file
+    })
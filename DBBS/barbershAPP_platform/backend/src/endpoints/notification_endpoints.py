@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 import firebase_admin #type: ignore
 from firebase_admin import credentials, firestore, messaging #type: ignore
 from src.middleware.firebase_auth import require_firebase_auth
+from src.services.subscribers import refresh_user_token, set_user_language
 from typing import Dict
 import logging
 logger = logging.getLogger(__name__)
@@ -37,6 +38,8 @@ NOTIFICATION_TEMPLATES: Dict[str, Dict[str, Dict[str, str]]] = {
         }
     }
 }
+# Languages every template is written in
+SUPPORTED_LANGUAGES = set.intersection(*(set(template) for template in NOTIFICATION_TEMPLATES.values()))
 
 @notifications_bp.route('/notifications/subscribe', methods=['POST'])
 @require_firebase_auth
@@ -46,12 +49,18 @@ async def subscribe_to_notifications():
         user_id = request.user['uid']
         token = request.json.get('token')
         topics = request.json.get('topics', [])
+        language = request.json.get('language')
+        if language is not None and language not in SUPPORTED_LANGUAGES:
+            return jsonify({'error': 'Unsupported language'}), 400
         
         # Store token in user's profile
-        admin.db.collection('users').document(user_id).update({
-            'fcm_token': token,
-            'notification_topics': topics
-        })
+        profile = {'fcm_token': token, 'notification_topics': topics}
+        if language:
+            profile['language'] = language
+        admin.db.collection('users').document(user_id).update(profile)
+        
+        # Barber subscriptions carry a copy of the token and language for fan-out
+        refresh_user_token(user_id, token, language)
         
         # Subscribe to topics
         for topic in topics:
@@ -62,6 +71,21 @@ async def subscribe_to_notifications():
         logger.error(f"Error subscribing to notifications: {e}")
         return jsonify({'error': str(e)}), 500
 
+@notifications_bp.route('/notifications/language', methods=['PUT'])
+@require_firebase_auth
+async def update_notification_language():
+    """Change the language push notifications are sent in"""
+    language = (request.json or {}).get('language')
+    if language not in SUPPORTED_LANGUAGES:
+        return jsonify({'error': 'Unsupported language'}), 400
+    try:
+        # Subscriptions keep a copy of the language, so it is never changed on the profile alone
+        set_user_language(request.user['uid'], language)
+        return jsonify({'status': 'updated', 'language': language}), 200
+    except Exception as e:
+        logger.error(f"Error updating notification language: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @notifications_bp.route('/notifications/send', methods=['POST'])
 @require_firebase_auth
 async def send_notification():
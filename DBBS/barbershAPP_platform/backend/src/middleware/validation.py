@@ -1,5 +1,7 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
 from functools import wraps
-from typing import Callable, Any, Dict, Optional
+from typing import Callable, Any, Dict, Optional, Tuple, Union
 from flask import request, jsonify, current_app
 from marshmallow import Schema, ValidationError # type: ignore
 import re
@@ -33,6 +35,19 @@ def validate_api_key(f: Callable) -> Callable:
         return f(*args, **kwargs)
     return decorated_function
 
+def encode_cursor(key: Union[datetime, float], row_id: int) -> str:
+    """Opaque keyset cursor for the last row of a page: its sort key and id"""
+    value = key.isoformat() if isinstance(key, datetime) else repr(float(key))
+    return urlsafe_b64encode(f"{value}|{row_id}".encode()).decode()
+
+def decode_cursor(cursor: str, parse_key: Callable[[str], Any] = datetime.fromisoformat) -> Tuple[Any, int]:
+    """Inverse of encode_cursor, with parse_key matching the sort key; raises ValueError on malformed input"""
+    try:
+        key, row_id = urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return parse_key(key), int(row_id)
+    except Exception:
+        raise ValueError("Malformed cursor")
+
 def validate_pagination(f: Callable) -> Callable:
     """Validate and normalize pagination parameters"""
     @wraps(f)
@@ -46,13 +61,22 @@ def validate_pagination(f: Callable) -> Callable:
                     "error": "Invalid pagination parameters",
                     "message": "Page must be >= 1, per_page must be between 1 and 100"
                 }), 400
-                
-            return f(*args, page=page, per_page=per_page, **kwargs)
         except ValueError:
             return jsonify({
                 "error": "Invalid pagination parameters",
                 "message": "Page and per_page must be integers"
             }), 400
+
+        cursor = request.args.get('cursor')
+        try:
+            cursor = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return jsonify({
+                "error": "Invalid pagination parameters",
+                "message": "Cursor must be a value returned as next_cursor"
+            }), 400
+
+        return f(*args, page=page, per_page=per_page, cursor=cursor, **kwargs)
     return decorated_function
 
 def validate_coordinates(f: Callable) -> Callable:
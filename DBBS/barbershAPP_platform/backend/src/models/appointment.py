@@ -1,14 +1,21 @@
 from datetime import datetime
+from sqlalchemy import DDL, event
 from src.database.db import db
 from .base import BaseModel
 
 class Appointment(BaseModel):
     __tablename__ = 'appointments'
+    __table_args__ = (
+        db.Index('idx_appointment_barber_datetime', 'barber_id', 'appointment_datetime'),
+        db.Index('idx_appointment_user_datetime', 'user_id', 'appointment_datetime', 'id'),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     barber_id = db.Column(db.Integer, db.ForeignKey('barbers.id'), nullable=False)
     appointment_datetime = db.Column(db.DateTime, nullable=False)
+    duration_minutes = db.Column(db.Integer, nullable=False, default=30)
     status = db.Column(db.String(20), default='scheduled')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -20,7 +27,21 @@ class Appointment(BaseModel):
         base_dict = super().to_dict()
         appointment_dict = {
             'appointment_datetime': self.appointment_datetime.isoformat(),
+            'duration_minutes': self.duration_minutes,
             'status': self.status,
             'barber': self.barber.to_dict() if self.barber else None,
         }
-        return {**base_dict, **appointment_dict}
\ No newline at end of file
+        return {**base_dict, **appointment_dict}
+
+# Postgres rejects overlapping active bookings for the same barber (SQLSTATE 23P01)
+event.listen(
+    Appointment.__table__,
+    'after_create',
+    DDL("""
+        CREATE EXTENSION IF NOT EXISTS btree_gist;
+        ALTER TABLE appointments ADD CONSTRAINT appointments_no_overlap EXCLUDE USING gist (
+            barber_id WITH =,
+            tsrange(appointment_datetime, appointment_datetime + duration_minutes * interval '1 minute') WITH &&
+        ) WHERE (status NOT IN ('cancelled', 'canceled'));
+    """).execute_if(dialect='postgresql')
+)
\ No newline at end of file
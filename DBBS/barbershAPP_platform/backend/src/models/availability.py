@@ -17,6 +17,7 @@ class Availability(BaseModel):
     day_of_week = db.Column(db.Integer, nullable=False)  # 0=Monday, 6=Sunday
     start_time = db.Column(db.Time, nullable=False)
     end_time = db.Column(db.Time, nullable=False)
+    slot_minutes = db.Column(db.Integer, nullable=False, default=30)
     is_available = db.Column(db.Boolean, default=True)
 
     def to_dict(self):
@@ -27,12 +28,13 @@ class Availability(BaseModel):
             'day_of_week': self.day_of_week,
             'start_time': self.start_time.isoformat() if self.start_time else None,
             'end_time': self.end_time.isoformat() if self.end_time else None,
+            'slot_minutes': self.slot_minutes,
             'is_available': self.is_available
         }
         return {**base_dict, **availability_dict}
 
     @classmethod
-    def create_weekly_schedule(cls, barber_id, start_time, end_time):
+    def create_weekly_schedule(cls, barber_id, start_time, end_time, slot_minutes=30):
         """Create default weekly availability for a barber"""
         schedules = []
         for day in range(7):  # 0-6 for Monday-Sunday
@@ -41,7 +43,42 @@ class Availability(BaseModel):
                 day_of_week=day,
                 start_time=start_time,
                 end_time=end_time,
+                slot_minutes=slot_minutes,
                 is_available=True
             )
             schedules.append(availability)
-        return schedules
\ No newline at end of file
+        return schedules
+
+
+class AvailabilityException(BaseModel):
+    """Per-date override of a barber's weekly schedule"""
+    __tablename__ = 'availability_exceptions'
+    __table_args__ = (
+        db.Index('idx_availability_exception_barber_date', 'barber_id', 'date'),
+        {'extend_existing': True}
+    )
+
+    # Foreign Keys
+    barber_id = db.Column(db.Integer, db.ForeignKey('barbers.id'), nullable=False)
+
+    # Override fields
+    date = db.Column(db.Date, nullable=False)
+    start_time = db.Column(db.Time, nullable=True)  # NULL with is_available=False means whole day off
+    end_time = db.Column(db.Time, nullable=True)
+    slot_minutes = db.Column(db.Integer, nullable=True)
+    is_available = db.Column(db.Boolean, default=False)  # False=time off, True=extra hours
+    reason = db.Column(db.String(255))
+
+    def to_dict(self):
+        """Convert exception to dictionary representation"""
+        base_dict = super().to_dict()
+        exception_dict = {
+            'barber_id': self.barber_id,
+            'date': self.date.isoformat() if self.date else None,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'slot_minutes': self.slot_minutes,
+            'is_available': self.is_available,
+            'reason': self.reason
+        }
+        return {**base_dict, **exception_dict}
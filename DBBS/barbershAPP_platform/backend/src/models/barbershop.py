@@ -2,6 +2,7 @@ from datetime import datetime
 from src.database.db import db
 from src.models.base import BaseModel  # Fix the import path
 from geoalchemy2 import Geometry
+from sqlalchemy import DDL, event
 
 class Barbershop(BaseModel):
     __tablename__ = 'barbershops'
@@ -10,8 +11,20 @@ class Barbershop(BaseModel):
     address = db.Column(db.String(255), nullable=False)
     phone = db.Column(db.String(20))
     location = db.Column(Geometry('POINT'), nullable=False)
+    external_id = db.Column(db.String(64), unique=True, index=True)
+    source_hash = db.Column(db.String(64))  # content hash of the last synced external record
     
     # Relationships
     barbers = db.relationship("Barber", backref="barbershop", lazy=True)
     appointments = db.relationship("Appointment", backref="shop", lazy=True)
-    current_queue = db.relationship("Queue", uselist=False, backref="shop", lazy=True)
\ No newline at end of file
+    current_queue = db.relationship("Queue", uselist=False, backref="shop", lazy=True)
+
+# Geography GiST index so nearest-N queries order by true distance straight off the index
+event.listen(
+    Barbershop.__table__,
+    'after_create',
+    DDL("""
+        CREATE INDEX IF NOT EXISTS idx_barbershop_location_geog
+        ON barbershops USING GIST ((location::geography));
+    """).execute_if(dialect='postgresql')
+)
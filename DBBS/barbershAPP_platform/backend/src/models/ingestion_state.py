@@ -0,0 +1,12 @@
+from datetime import datetime
+from src.database.db import db
+
+class IngestionState(db.Model):
+    """High-water mark of an external feed, so later runs fetch only newer edits"""
+    __tablename__ = 'ingestion_state'
+    __table_args__ = {'extend_existing': True}
+
+    source = db.Column(db.String(64), primary_key=True)
+    high_water_mark = db.Column(db.DateTime)
+    last_run_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_run_count = db.Column(db.Integer, default=0)
@@ -0,0 +1,18 @@
+from datetime import datetime
+from geoalchemy2 import Geometry
+from src.database.db import db
+
+class Isochrone(db.Model):
+    """Cached drive-time polygon reachable from the center of a geohash cell"""
+    __tablename__ = 'isochrones'
+    __table_args__ = (
+        db.UniqueConstraint('cell', 'minutes', name='uq_isochrone_cell_minutes'),
+        {'extend_existing': True}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    cell = db.Column(db.String(12), nullable=False)
+    minutes = db.Column(db.Integer, nullable=False)
+    polygon = db.Column(Geometry('GEOMETRY', srid=4326), nullable=False)
+    network_version = db.Column(db.String(64))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
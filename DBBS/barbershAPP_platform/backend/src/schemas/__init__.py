@@ -1,3 +1,3 @@
-from src.schemas.appointment import AppointmentSchema #type: ignore
+from src.schemas.appointments import AppointmentSchema #type: ignore
 
 __all__ = ['AppointmentSchema']
\ No newline at end of file
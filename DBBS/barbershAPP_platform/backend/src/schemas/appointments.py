@@ -5,9 +5,10 @@ class AppointmentSchema(Schema):
     """Schema for appointment validation"""
     id = fields.Integer(dump_only=True)  # Read-only field
     user_id = fields.Integer(dump_only=True)  # Set by auth decorator
-    shop_id = fields.Integer(required=True)
-    service = fields.String(required=True)
-    date = fields.DateTime(required=True)
+    barber_id = fields.Integer(required=True)
+    date = fields.DateTime(required=True)  # Stored as appointment_datetime
+    duration_minutes = fields.Integer(validate=validate.Range(min=1))
+    hold_token = fields.String(load_only=True)  # From POST /booking/holds
     status = fields.String(
         validate=validate.OneOf(['scheduled', 'confirmed', 'completed', 'cancelled']),
         default='scheduled'
@@ -1,18 +1,23 @@
 from flask import current_app
-import requests
 import geojson
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from sqlalchemy import text
 from src.database.db import db
+from src.middleware.validation import decode_cursor, encode_cursor
+from src.services.distance import geodesic
+from src.services.geocoding import geocoding_service
+from src.services.http_client import UpstreamUnavailable, arcgis_client
+from src.services.isochrones import isochrone_service
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+
 class GISService:
     """Service for handling GIS operations with public endpoints"""
     def __init__(self):
-        self.session = requests.Session()
         self.query_url = None
         self.query_params = None
         self.maps_api_key = None
@@ -24,42 +29,37 @@ class GISService:
         self.maps_api_key = app.config['GOOGLE_MAPS_API_KEY']
 
     def get_businesses_json(self) -> Optional[Dict]:
-        """Get businesses in JSON format from public endpoint"""
-        url = f"{self.query_url}?{self.query_params}&f=json"
-        return self._make_request(url, {})
+        """Get every business from the public endpoint, page by page so none are truncated"""
+        from src.services.ingestion import ArcGISIngestor
+        try:
+            return {'features': [feature for page in ArcGISIngestor(self).pages() for feature in page]}
+        except RuntimeError as e:
+            current_app.logger.error(f"GIS layer download failed: {str(e)}")
+            return None
 
-    def _make_request(self, url: str, params: Dict[str, Any]) -> Optional[Dict]:
-        """Make HTTP request with error handling"""
+    def _make_request(self, url: str, params: Dict[str, Any], stale: bool = True) -> Optional[Dict]:
+        """GET through the shared ArcGIS client; unless stale=False the last good response stands in while it is down"""
         try:
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return arcgis_client.get_json(url, params, stale=stale)
+        except UpstreamUnavailable as e:
             current_app.logger.error(f"GIS API request failed: {str(e)}")
             return None
 
     def geocode_address(self, address: str) -> Optional[Dict[str, Any]]:
-        """Geocode an address using Google Maps Geocoding API"""
-        url = "https://maps.googleapis.com/maps/api/geocode/json"
-        params = {
-            'address': address,
-            'key': self.maps_api_key
-        }
-        
-        result = self._make_request(url, params)
-        if not result or result.get('status') != 'OK':
+        """Geocode an address through the shared LRU + Redis geocoding cache"""
+        result = geocoding_service.geocode(address)
+        if not result:
             return None
-            
-        location = result['results'][0]['geometry']['location']
+
         return {
             'location': {
                 'type': 'Point',
                 'coordinates': [
-                    location['lng'],
-                    location['lat']
+                    result['lng'],
+                    result['lat']
                 ]
             },
-            'address': result['results'][0]['formatted_address'],
+            'address': result['address'],
             'timestamp': datetime.utcnow().isoformat()
         }
     
@@ -70,6 +70,8 @@ class GISService:
             'outFields': '*',
             'geometryType': 'esriGeometryPoint',
             'geometry': f"{lon},{lat}",
+            'inSR': 4326,
+            'outSR': 4326,
             'distance': radius,
             'units': 'meters',
             'f': 'json'
@@ -79,26 +81,30 @@ class GISService:
         if not result or 'features' not in result:
             return None
 
+        features = [feature for feature in result['features'] if feature.get('geometry')]
+        if not features:
+            return geojson.FeatureCollection([])
+
+        # One vectorized pass over the whole response, then filter and sort by true distance
+        lons = np.fromiter((feature['geometry']['x'] for feature in features), dtype=np.float64, count=len(features))
+        lats = np.fromiter((feature['geometry']['y'] for feature in features), dtype=np.float64, count=len(features))
+        distances = geodesic(lat, lon, lats, lons)
+        order = np.argsort(distances, kind='stable')
+        order = order[distances[order] <= radius]
+
         return geojson.FeatureCollection([
             {
                 'type': 'Feature',
                 'geometry': {
                     'type': 'Point',
-                    'coordinates': [
-                        feature['geometry']['x'],
-                        feature['geometry']['y']
-                    ]
+                    'coordinates': [float(lons[i]), float(lats[i])]
                 },
                 'properties': {
-                    **feature['attributes'],
-                    'distance_meters': round(
-                        ((feature['geometry']['x'] - lon) ** 2 + 
-                         (feature['geometry']['y'] - lat) ** 2) ** 0.5 * 111319.9,
-                        2
-                    )
+                    **features[i]['attributes'],
+                    'distance_meters': round(float(distances[i]), 2)
                 }
             }
-            for feature in result['features']
+            for i in order
         ])
     
 class GeoService:
@@ -109,72 +115,110 @@ class GeoService:
         45: 37500,  # ~45 min drive
         60: 50000   # ~60 min drive
     }
+    MAX_NEAREST = 50
 
     @staticmethod
-    async def get_shops_by_drive_time(lat: float, lon: float, minutes: int) -> List[Dict]:
-        """Get shops within specified drive time radius"""
-        try:
-            radius = GeoService.DRIVE_TIMES.get(minutes, 25000)
-            
-            query = text("""
-                WITH shops AS (
-                    SELECT 
-                        s.id,
-                        s.name,
-                        s.address,
-                        s.phone,
-                        ST_AsGeoJSON(s.location)::json AS location,
-                        ST_Distance(
-                            s.location::geography,
-                            ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography
-                        ) AS distance
-                    FROM barbershops s
-                    WHERE ST_DWithin(
-                        s.location::geography,
-                        ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography,
-                        :radius
-                    )
+    def get_nearest_shops(lat: float, lon: float, limit: int = 20,
+                          max_radius: Optional[float] = None,
+                          cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Nearest N shops straight off the geography GiST index, with a cursor for more"""
+        limit = max(1, min(limit, GeoService.MAX_NEAREST))
+        after_distance, after_id = decode_cursor(cursor, float) if cursor else (None, None)
+
+        # <-> walks idx_barbershop_location_geog in distance order, so LIMIT stops the scan
+        query = text("""
+            WITH origin AS (
+                SELECT ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography AS point
+            )
+            SELECT
+                s.id,
+                s.name,
+                s.address,
+                s.phone,
+                ST_AsGeoJSON(s.location)::json AS location,
+                s.location::geography <-> origin.point AS distance
+            FROM barbershops s, origin
+            WHERE (CAST(:max_radius AS double precision) IS NULL
+                   OR ST_DWithin(s.location::geography, origin.point, :max_radius))
+              AND (CAST(:after_distance AS double precision) IS NULL
+                   OR (s.location::geography <-> origin.point, s.id) > (:after_distance, :after_id))
+            ORDER BY s.location::geography <-> origin.point, s.id
+            LIMIT :limit
+        """)
+        rows = db.session.execute(query, {
+            'lat': lat,
+            'lon': lon,
+            'max_radius': max_radius,
+            'after_distance': after_distance,
+            'after_id': after_id,
+            'limit': limit + 1
+        }).mappings().all()
+
+        shops = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(shops[-1]['distance'], shops[-1]['id'])
+        return {'shops': shops, 'next_cursor': next_cursor}
+
+    @staticmethod
+    def query_shops_by_drive_time(lat: float, lon: float, minutes: int) -> List[Dict]:
+        """Spatial part of a drive-time search: shops inside the isochrone, nearest first"""
+        polygon_id = isochrone_service.polygon_id(lat, lon, minutes)
+        if polygon_id is not None:
+            # One indexed lookup of the cached polygon, then a GiST-backed intersection
+            area = """
+                FROM barbershops s
+                JOIN isochrones i ON i.id = :polygon_id
+                WHERE ST_Intersects(s.location, i.polygon)
+            """
+        else:
+            area = """
+                FROM barbershops s
+                WHERE ST_DWithin(
+                    s.location::geography,
+                    ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography,
+                    :radius
                 )
+            """
+        radius = GeoService.DRIVE_TIMES.get(minutes, 25000)
+        
+        query = text(f"""
+            WITH shops AS (
                 SELECT 
-                    s.*,
-                    EXISTS(
-                        SELECT 1 
-                        FROM firebase_shop_status fs 
-                        WHERE fs.shop_id = s.id AND fs.is_open = true
-                    ) as is_open
-                FROM shops s
-                ORDER BY distance
-            """)
-
-            result = await db.session.execute(
-                query,
-                {"lat": lat, "lon": lon, "radius": radius}
+                    s.id,
+                    s.name,
+                    s.address,
+                    s.phone,
+                    ST_AsGeoJSON(s.location)::json AS location,
+                    ST_Distance(
+                        s.location::geography,
+                        ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography
+                    ) AS distance
+                {area}
             )
-            
-            shops = result.mappings().all()
-            
-            # Fetch real-time data from Firebase
-            from firebase_admin import firestore # type: ignore
-            db = firestore.client()
-            
-            # Enhance with real-time data
-            enhanced_shops = []
-            for shop in shops:
-                shop_dict = dict(shop)
-                
-                # Get real-time queue and availability
-                shop_ref = db.collection('shops').document(str(shop['id']))
-                shop_data = shop_ref.get().to_dict() or {}
-                
-                shop_dict.update({
-                    'current_queue': shop_data.get('queue_size', 0),
-                    'wait_time': shop_data.get('estimated_wait', 0),
-                    'available_barbers': shop_data.get('available_barbers', [])
-                })
-                
-                enhanced_shops.append(shop_dict)
-            
-            return enhanced_shops
+            SELECT s.*
+            FROM shops s
+            ORDER BY distance
+        """)
+
+        result = db.session.execute(
+            query,
+            {"lat": lat, "lon": lon, "radius": radius, "polygon_id": polygon_id}
+        )
+        
+        return [dict(row) for row in result.mappings().all()]
+
+    @staticmethod
+    async def get_shops_by_drive_time(lat: float, lon: float, minutes: int) -> List[Dict]:
+        """Get shops within specified drive time, with real-time queue data"""
+        try:
+            shops = GeoService.query_shops_by_drive_time(lat, lon, minutes)
+
+            # One batched Firestore read for the whole result
+            from src.services.firebase.updates import FirebaseUpdates
+            enhanced = await FirebaseUpdates.enhance_shop_data(shops)
+            # Callers of this method read the queue count as current_queue; queue_length covers queue_size too
+            return [{**shop, 'current_queue': shop['queue_length']} for shop in enhanced]
             
         except Exception as e:
             logger.error(f"Error in get_shops_by_drive_time: {str(e)}")
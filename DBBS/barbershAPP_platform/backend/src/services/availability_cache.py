@@ -0,0 +1,237 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from flask import current_app
+from src.services.schedule import date_range
+from src.services.slots import build_slot_indexes, resolve_barbers
+from src.services.tasks import queue_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Marks a cached barber-day as computed even when it has no free slots
+EMPTY_MARKER = '-'
+
+# Only fill the cache if no writer bumped the generation while we computed
+FILL_SCRIPT = """
+local current = redis.call('GET', KEYS[1]) or '0'
+if current ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[2])
+redis.call('SADD', KEYS[2], unpack(ARGV, 4))
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+redis.call('SADD', KEYS[3], ARGV[3])
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+return 1
+"""
+
+
+class AvailabilityCache:
+    """Redis-backed materialized free slots per barber-day"""
+
+    def __init__(self, queue_service):
+        self.queue_service = queue_service
+        self._fill = None
+
+    @property
+    def redis(self):
+        return self.queue_service.redis_client
+
+    @property
+    def prefix(self) -> str:
+        return f"{self.queue_service.config.get('QUEUE_PREFIX', 'barbershop:')}slots:"
+
+    @property
+    def ttl(self) -> int:
+        return current_app.config.get('SLOT_CACHE_TTL', 900)
+
+    def _key(self, barber_id: int, day: date) -> str:
+        return f"{self.prefix}{barber_id}:{day.isoformat()}"
+
+    def _generation_key(self, barber_id: int, day: date) -> str:
+        return f"{self.prefix}gen:{barber_id}:{day.isoformat()}"
+
+    def _days_key(self, barber_id: int) -> str:
+        """Days cached for a barber, so rule changes never have to scan the keyspace"""
+        return f"{self.prefix}days:{barber_id}"
+
+    def _stats_key(self) -> str:
+        return f"{self.prefix}stats"
+
+    def free_slots(self, start_day: date, end_day: date,
+                   barber_ids: Optional[Iterable[int]] = None,
+                   shop_id: Optional[int] = None) -> Dict[int, Dict[date, List[str]]]:
+        """Free 'HH:MM' slots per barber-day, served from Redis where possible"""
+        barber_ids = resolve_barbers(barber_ids, shop_id)
+        days = date_range(start_day, end_day)
+
+        if self.redis is None:
+            return self._compute(barber_ids, start_day, end_day)
+
+        pairs = [(barber_id, day) for barber_id in barber_ids for day in days]
+        try:
+            cached, generations = self._read(pairs)
+        except Exception as e:
+            logger.warning(f"Availability cache read failed: {e}")
+            return self._compute(barber_ids, start_day, end_day)
+
+        result: Dict[int, Dict[date, List[str]]] = {}
+        missing: List[Tuple[int, date]] = []
+        for pair, members in zip(pairs, cached):
+            if members:
+                result.setdefault(pair[0], {})[pair[1]] = sorted(
+                    member.decode() if isinstance(member, bytes) else member
+                    for member in members
+                    if member not in (EMPTY_MARKER, EMPTY_MARKER.encode())
+                )
+            else:
+                missing.append(pair)
+
+        if missing:
+            missing_barbers = sorted({barber_id for barber_id, _ in missing})
+            missing_days = [day for _, day in missing]
+            computed = self._compute(missing_barbers, min(missing_days), max(missing_days))
+            for barber_id, day in missing:
+                result.setdefault(barber_id, {})[day] = computed.get(barber_id, {}).get(day, [])
+            self._write(missing, result, generations)
+
+        self._count(hits=len(pairs) - len(missing), misses=len(missing))
+        return result
+
+    def _compute(self, barber_ids: List[int], start_day: date, end_day: date) -> Dict[int, Dict[date, List[str]]]:
+        """Fall through to Postgres via the slot engine"""
+        if not barber_ids:
+            return {}
+        indexes = build_slot_indexes(start_day, end_day, barber_ids=barber_ids)
+        return {
+            barber_id: {
+                day: [slot.strftime('%H:%M') for slot in index.free_slots()]
+                for day, index in days.items()
+            }
+            for barber_id, days in indexes.items()
+        }
+
+    def _read(self, pairs: List[Tuple[int, date]]):
+        """Fetch cached sets and their generations in one round trip"""
+        pipe = self.redis.pipeline(transaction=False)
+        for barber_id, day in pairs:
+            pipe.smembers(self._key(barber_id, day))
+        for barber_id, day in pairs:
+            pipe.get(self._generation_key(barber_id, day))
+        replies = pipe.execute()
+        generations = {
+            pair: (generation.decode() if isinstance(generation, bytes) else generation) or '0'
+            for pair, generation in zip(pairs, replies[len(pairs):])
+        }
+        return replies[:len(pairs)], generations
+
+    def _write(self, pairs: List[Tuple[int, date]], result: Dict[int, Dict[date, List[str]]],
+               generations: Dict[Tuple[int, date], str]) -> None:
+        """Store freshly computed barber-days unless a booking raced us"""
+        try:
+            if self._fill is None:
+                self._fill = self.redis.register_script(FILL_SCRIPT)
+            pipe = self.redis.pipeline(transaction=False)
+            for barber_id, day in pairs:
+                self._fill(
+                    keys=[self._generation_key(barber_id, day), self._key(barber_id, day),
+                          self._days_key(barber_id)],
+                    args=[generations[(barber_id, day)], self.ttl, day.isoformat(),
+                          EMPTY_MARKER, *result[barber_id][day]],
+                    client=pipe
+                )
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Availability cache write failed: {e}")
+
+    def _count(self, hits: int, misses: int) -> None:
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            if hits:
+                pipe.hincrby(self._stats_key(), 'hits', hits)
+            if misses:
+                pipe.hincrby(self._stats_key(), 'misses', misses)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Availability cache stats update failed: {e}")
+
+    def slot_booked(self, barber_id: int, moment: datetime, duration_minutes: int = 30) -> None:
+        """Patch a cached barber-day in place after a booking commits"""
+        if self.redis is None:
+            return
+        day = moment.date()
+        covered = [
+            (moment + timedelta(minutes=offset)).strftime('%H:%M')
+            for offset in range(max(duration_minutes or 0, 1))
+        ]
+        try:
+            pipe = self.redis.pipeline()
+            pipe.incr(self._generation_key(barber_id, day))
+            pipe.expire(self._generation_key(barber_id, day), self.ttl * 2)
+            pipe.srem(self._key(barber_id, day), covered[0])
+            pipe.srem(self._key(barber_id, day), *covered)
+            removed_start = pipe.execute()[2]
+            if not removed_start:
+                # Off-grid booking or no cached entry: drop rather than guess the slot
+                self.redis.delete(self._key(barber_id, day))
+        except Exception as e:
+            logger.warning(f"Availability cache patch failed: {e}")
+            self.invalidate(barber_id, moment)
+
+    def invalidate(self, barber_id: int, moment) -> None:
+        """Drop a cached barber-day after an update or cancellation commits"""
+        if self.redis is None or moment is None:
+            return
+        day = moment.date() if isinstance(moment, datetime) else moment
+        try:
+            pipe = self.redis.pipeline()
+            pipe.incr(self._generation_key(barber_id, day))
+            pipe.expire(self._generation_key(barber_id, day), self.ttl * 2)
+            pipe.delete(self._key(barber_id, day))
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Availability cache invalidation failed: {e}")
+
+    def invalidate_weekday(self, barber_id: int, day_of_week: int) -> None:
+        """Drop every cached day of a barber falling on a weekday whose rule changed"""
+        if self.redis is None:
+            return
+        try:
+            stale = [
+                day for day in (
+                    date.fromisoformat(member.decode() if isinstance(member, bytes) else member)
+                    for member in self.redis.smembers(self._days_key(barber_id))
+                )
+                if day.weekday() == day_of_week
+            ]
+            if not stale:
+                return
+            pipe = self.redis.pipeline()
+            for day in stale:
+                pipe.incr(self._generation_key(barber_id, day))
+                pipe.expire(self._generation_key(barber_id, day), self.ttl * 2)
+                pipe.delete(self._key(barber_id, day))
+            pipe.srem(self._days_key(barber_id), *(day.isoformat() for day in stale))
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Availability cache invalidation failed: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters shared by every worker"""
+        if self.redis is None:
+            return {'hits': 0, 'misses': 0, 'hit_rate': 0.0}
+        raw = self.redis.hgetall(self._stats_key())
+        counters = {
+            (key.decode() if isinstance(key, bytes) else key): int(value)
+            for key, value in raw.items()
+        }
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0
+        }
+
+
+# Create singleton instance
+availability_cache = AvailabilityCache(queue_service)
@@ -0,0 +1,218 @@
+from datetime import datetime
+from itertools import islice
+from typing import Dict, IO, Iterable, Iterator, List, Optional
+from sqlalchemy.exc import IntegrityError
+from src.database.db import db
+from src.models.appointment import Appointment
+from src.models.barber import Barber
+from src.models.user import User
+from src.services.availability_cache import availability_cache
+from src.services.schedule import local_now
+import csv
+import io
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+SEPARATORS = re.compile(r'[\s,]*')
+
+FORMATS = ('csv', 'ndjson')
+EXPORT_COLUMNS = (
+    'id', 'user_id', 'barber_id', 'appointment_datetime',
+    'duration_minutes', 'status', 'created_at'
+)
+MAX_REPORTED_ERRORS = 20
+
+
+def read_records(stream: IO[str], fmt: str) -> Iterator[Dict[str, str]]:
+    """Lazily parse CSV (with header) or newline-delimited JSON"""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'ndjson':
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def iter_json_array(stream: IO[str], chunk_size: int = 1 << 16) -> Iterator:
+    """Yield the elements of a top-level JSON array without loading the whole document"""
+    decoder = json.JSONDecoder()
+    buffer, position, started = '', 0, False
+    for chunk in iter(lambda: stream.read(chunk_size), ''):
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            position = SEPARATORS.match(buffer, position).end()
+            if position >= len(buffer):
+                break
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError("Expected a JSON array")
+                started, position = True, position + 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break  # the element continues in the next chunk
+            if end == len(buffer) and not isinstance(item, (dict, list)):
+                break  # a bare number may be cut off mid-digits
+            yield item
+            position = end
+    raise ValueError("Truncated JSON array")
+
+
+def _batches(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class AppointmentImporter:
+    """Streams appointment history into Postgres in fixed-size executemany batches"""
+
+    def __init__(self, shop_id: Optional[int] = None, batch_size: int = 5000):
+        self.shop_id = shop_id
+        self.batch_size = batch_size
+        self.imported = 0
+        self.skipped = 0
+        self.errors: List[str] = []
+        self._barbers: Optional[Dict[str, int]] = None
+
+    def run(self, stream: IO[str], fmt: str = 'csv') -> Dict:
+        """Import every record; bad rows are skipped and reported, good rows committed per batch"""
+        for batch_no, batch in enumerate(_batches(read_records(stream, fmt), self.batch_size)):
+            rows = self._prepare(batch, batch_no * self.batch_size)
+            if rows:
+                self._insert(rows)
+        return {'imported': self.imported, 'skipped': self.skipped, 'errors': self.errors}
+
+    def _barber_ids(self) -> Dict[str, int]:
+        """Barbers allowed as targets, addressable by id or email"""
+        if self._barbers is None:
+            query = db.session.query(Barber.id, Barber.email)
+            if self.shop_id is not None:
+                query = query.filter(Barber.barbershop_id == self.shop_id)
+            self._barbers = {}
+            for row in query:
+                self._barbers[str(row.id)] = row.id
+                self._barbers[row.email.lower()] = row.id
+        return self._barbers
+
+    def _user_ids(self, batch: List[Dict]) -> Dict[str, int]:
+        """Resolve customer emails for a whole batch in one query"""
+        emails = {str(record['user_email']).lower() for record in batch if record.get('user_email')}
+        if not emails:
+            return {}
+        rows = db.session.query(User.id, User.email).filter(db.func.lower(User.email).in_(emails))
+        return {row.email.lower(): row.id for row in rows}
+
+    def _prepare(self, batch: List[Dict], offset: int) -> List[Dict]:
+        barbers = self._barber_ids()
+        users = self._user_ids(batch)
+        rows = []
+        for position, record in enumerate(batch, start=offset + 1):
+            try:
+                barber_key = str(record.get('barber_id') or record.get('barber_email') or '').lower()
+                if barber_key not in barbers:
+                    raise ValueError(f"unknown barber {barber_key!r}")
+                user_id = record.get('user_id') or users.get(str(record.get('user_email') or '').lower())
+                if not user_id:
+                    raise ValueError("unknown customer")
+                created_at = record.get('created_at')
+                rows.append({
+                    'user_id': int(user_id),
+                    'barber_id': barbers[barber_key],
+                    'appointment_datetime': datetime.fromisoformat(record['appointment_datetime']),
+                    'duration_minutes': int(record.get('duration_minutes') or 30),
+                    'status': record.get('status') or 'completed',
+                    'created_at': datetime.fromisoformat(created_at) if created_at else datetime.utcnow()
+                })
+            except (KeyError, TypeError, ValueError) as e:
+                self._skip(position, e)
+        return rows
+
+    def _insert(self, rows: List[Dict]) -> None:
+        """One executemany per batch; on a constraint error fall back to per-row savepoints"""
+        table = Appointment.__table__
+        try:
+            db.session.execute(table.insert(), rows)
+            db.session.commit()
+            self.imported += len(rows)
+            self._invalidate(rows)
+            return
+        except IntegrityError:
+            db.session.rollback()
+
+        inserted = []
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(table.insert(), [row])
+                inserted.append(row)
+            except IntegrityError as e:
+                self._skip(row['appointment_datetime'].isoformat(), e.orig)
+        db.session.commit()
+        self.imported += len(inserted)
+        self._invalidate(inserted)
+
+    @staticmethod
+    def _invalidate(rows: List[Dict]) -> None:
+        """Imported future bookings take slots; drop those cached barber-days"""
+        today = local_now().date()
+        touched = {
+            (row['barber_id'], row['appointment_datetime'].date())
+            for row in rows
+            if row['appointment_datetime'].date() >= today
+        }
+        for barber_id, day in touched:
+            availability_cache.invalidate(barber_id, day)
+
+    def _skip(self, where, error) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"{where}: {error}")
+
+
+def export_appointments(fmt: str = 'csv', shop_id: Optional[int] = None,
+                        start: Optional[datetime] = None, end: Optional[datetime] = None,
+                        batch_size: int = 5000) -> Iterator[str]:
+    """Yield an export chunk by chunk from a server-side cursor"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    query = db.session.query(*(getattr(Appointment, column) for column in EXPORT_COLUMNS))
+    if shop_id is not None:
+        query = query.join(Barber, Barber.id == Appointment.barber_id).filter(Barber.barbershop_id == shop_id)
+    if start:
+        query = query.filter(Appointment.appointment_datetime >= start)
+    if end:
+        query = query.filter(Appointment.appointment_datetime < end)
+    rows = query.order_by(Appointment.id).yield_per(batch_size)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == 'csv':
+        writer.writerow(EXPORT_COLUMNS)
+
+    for batch in _batches(rows, batch_size):
+        for row in batch:
+            values = [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            if fmt == 'csv':
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, values))) + '\n')
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,42 @@
+from typing import Union
+import numpy as np
+
+EARTH_RADIUS_METERS = 6371008.8
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+
+Coordinates = Union[float, np.ndarray, list]
+
+
+def haversine(lat: float, lon: float, lats: Coordinates, lons: Coordinates) -> np.ndarray:
+    """Great-circle distance in meters from one point to arrays of points (degrees)"""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(np.asarray(lats, dtype=np.float64)), np.radians(np.asarray(lons, dtype=np.float64))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def geodesic(lat: float, lon: float, lats: Coordinates, lons: Coordinates) -> np.ndarray:
+    """Distance in meters on the WGS84 ellipsoid (Lambert's formula, ~10 m over 1000 km)"""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+
+    # Reduced latitudes put both points on the auxiliary sphere
+    beta1 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat)))
+    beta2 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lats)))
+    dlon = np.radians(lons) - np.radians(lon)
+    h = np.sin((beta2 - beta1) / 2) ** 2 + np.cos(beta1) * np.cos(beta2) * np.sin(dlon / 2) ** 2
+    sigma = 2 * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+    p = (beta1 + beta2) / 2
+    q = (beta2 - beta1) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = (sigma - np.sin(sigma)) * np.sin(p) ** 2 * np.cos(q) ** 2 / np.cos(sigma / 2) ** 2
+        y = (sigma + np.sin(sigma)) * np.cos(p) ** 2 * np.sin(q) ** 2 / np.sin(sigma / 2) ** 2
+        distance = WGS84_A * (sigma - WGS84_F / 2 * (x + y))
+    return np.where(sigma > 0, distance, 0.0)
+
+
+def distance_between(point1: tuple, point2: tuple) -> float:
+    """Geodesic meters between two (lat, lon) pairs"""
+    return float(geodesic(point1[0], point1[1], [point2[0]], [point2[1]])[0])
@@ -0,0 +1,81 @@
+from datetime import date, datetime, timedelta
+from heapq import nsmallest
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from src.database.db import db
+from src.models.barber import Barber
+from src.services.availability_cache import availability_cache
+from src.services.holds import slot_holds
+from src.services.schedule import local_now
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Opening(NamedTuple):
+    start: datetime
+    rank: int  # position of the shop in distance order
+    shop_id: int
+    barber_id: int
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for position in range(0, len(items), size):
+        yield items[position:position + size]
+
+
+def _barbers_by_shop(shop_ids: List[int]) -> Dict[int, List[int]]:
+    """Barber ids for a batch of shops in one query"""
+    rows = db.session.query(Barber.id, Barber.barbershop_id).filter(
+        Barber.barbershop_id.in_(shop_ids)
+    ).all()
+    barbers: Dict[int, List[int]] = {shop_id: [] for shop_id in shop_ids}
+    for row in rows:
+        barbers[row.barbershop_id].append(row.id)
+    return barbers
+
+
+def find_earliest_openings(shop_ids: List[int], limit: int = 5, horizon_days: int = 7,
+                           chunk_size: int = 10, grace_minutes: int = 15,
+                           now: Optional[datetime] = None) -> List[Opening]:
+    """Earliest free slots across shops already sorted nearest first.
+
+    Days are walked in order, so once a day yields `limit` openings no later day
+    can beat them. Within the current day the walk stops as soon as every
+    collected opening starts within `grace_minutes` of now.
+    """
+    now = now or local_now()
+    cutoff = now + timedelta(minutes=grace_minutes)
+    rank = {shop_id: position for position, shop_id in enumerate(shop_ids)}
+    barbers: Dict[int, List[int]] = {}
+    best: List[Opening] = []
+
+    for offset in range(horizon_days):
+        day: date = now.date() + timedelta(days=offset)
+        for chunk in _chunks(shop_ids, chunk_size):
+            missing = [shop_id for shop_id in chunk if shop_id not in barbers]
+            if missing:
+                barbers.update(_barbers_by_shop(missing))
+
+            shop_of = {barber_id: shop_id for shop_id in chunk for barber_id in barbers[shop_id]}
+            if not shop_of:
+                continue
+
+            free, _ = slot_holds.split_held(availability_cache.free_slots(day, day, barber_ids=list(shop_of)))
+            candidates = [
+                Opening(start, rank[shop_of[barber_id]], shop_of[barber_id], barber_id)
+                for barber_id, days in free.items()
+                for start in (
+                    datetime.combine(day, datetime.strptime(slot, '%H:%M').time())
+                    for slot in days.get(day, [])
+                )
+                if start >= now
+            ]
+            best = nsmallest(limit, best + candidates)
+
+            if len(best) >= limit and best[-1].start <= cutoff:
+                return best
+
+        if len(best) >= limit:
+            return best
+
+    return best
@@ -0,0 +1,18 @@
+from typing import Dict, Iterable, List, Optional
+
+# Documents per batched read; one get_all is a single BatchGetDocuments round trip
+GET_ALL_CHUNK = 300
+
+
+def get_documents(db, collection: str, doc_ids: Iterable[str],
+                  field_paths: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """Documents by id through chunked get_all; ids without a document map to {}"""
+    doc_ids = list(dict.fromkeys(doc_ids))
+    documents: Dict[str, Dict] = {}
+    reference = db.collection(collection)
+    for start in range(0, len(doc_ids), GET_ALL_CHUNK):
+        refs = [reference.document(doc_id) for doc_id in doc_ids[start:start + GET_ALL_CHUNK]]
+        # Snapshots come back in any order, and missing documents come back with exists=False
+        for snapshot in db.get_all(refs, field_paths=field_paths):
+            documents[snapshot.id] = (snapshot.to_dict() if snapshot.exists else None) or {}
+    return documents
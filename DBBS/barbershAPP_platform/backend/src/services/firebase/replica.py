@@ -0,0 +1,141 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+from firebase_admin import firestore # type: ignore
+from src.services.firebase.updates import LIVE_FIELD_PATHS, live_values
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ShopStateReplica:
+    """Per-process copy of live shop state, fed by one collection watch on 'shops'"""
+
+    def __init__(self):
+        self.enabled = False
+        self.check_interval = 15
+        self._client = None
+        self._watch = None
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._synced = False
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._metrics = {'snapshots': 0, 'changes': 0, 'resyncs': 0, 'errors': 0}
+        self._last_snapshot_at: Optional[float] = None
+        self._last_lag: Optional[float] = None
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get('SHOP_REPLICA_ENABLED', False)
+        self.check_interval = app.config.get('SHOP_REPLICA_CHECK_INTERVAL', 15)
+
+    @property
+    def ready(self) -> bool:
+        """True once the initial snapshot is in and the watch is alive; readers fall back otherwise"""
+        if not self.enabled:
+            return False
+        self._ensure_started()
+        return self._synced and self._watch_active()
+
+    def live_fields(self, shop_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Same shape as FirebaseUpdates.live_fields, without a network call"""
+        docs = self._docs
+        return {shop_id: live_values(docs.get(str(shop_id), {})) for shop_id in shop_ids}
+
+    def _ensure_started(self) -> None:
+        # Threads do not survive a fork, so each gunicorn worker starts its own watch
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            # A client or watch inherited from the parent process is unusable here
+            self._client, self._watch = None, None
+            threading.Thread(target=self._watchdog, name='shop-replica-watchdog', daemon=True).start()
+            self.resync()
+
+    def _attach(self) -> None:
+        with self._lock:
+            self._synced = False
+        if self._client is None:
+            self._client = firestore.client()
+        self._watch = self._client.collection('shops').on_snapshot(self._on_snapshot)
+
+    def _watch_active(self) -> bool:
+        watch = self._watch
+        return watch is not None and getattr(watch, 'is_active', True)
+
+    def _on_snapshot(self, docs, changes, read_time) -> None:
+        try:
+            with self._lock:
+                if not self._synced:
+                    # The first snapshot of a watch carries the full collection: replace, don't merge
+                    self._docs = {doc.id: self._live(doc) for doc in docs}
+                    self._synced = True
+                else:
+                    updated = dict(self._docs)
+                    for change in changes:
+                        if change.type.name == 'REMOVED':
+                            updated.pop(change.document.id, None)
+                        else:
+                            updated[change.document.id] = self._live(change.document)
+                    self._docs = updated
+                self._metrics['snapshots'] += 1
+                self._metrics['changes'] += len(changes)
+                self._last_snapshot_at = time.time()
+                if read_time is not None:
+                    self._last_lag = max(0.0, datetime.now(timezone.utc).timestamp() - read_time.timestamp())
+        except Exception as e:
+            self._metrics['errors'] += 1
+            logger.error(f"Shop replica failed to apply snapshot: {e}")
+
+    @staticmethod
+    def _live(doc) -> Dict[str, Any]:
+        """Keep only the live fields; the rest of a shop document is not served from here"""
+        data = doc.to_dict() or {}
+        return {field: data[field] for field in LIVE_FIELD_PATHS if field in data}
+
+    def _watchdog(self) -> None:
+        """Re-attach (and so fully resync) when the watch has closed"""
+        while not self._stopped.wait(self.check_interval):
+            if self._watch_active():
+                continue
+            logger.warning("Shop replica watch is closed; resyncing")
+            self.resync()
+
+    def resync(self) -> None:
+        """Drop the current watch and start a fresh one; its first snapshot replaces the replica"""
+        try:
+            if self._watch is not None:
+                self._watch.unsubscribe()
+                self._watch = None
+        except Exception as e:
+            logger.warning(f"Shop replica unsubscribe failed: {e}")
+        try:
+            self._attach()
+            if self._metrics['snapshots']:
+                self._metrics['resyncs'] += 1
+        except Exception as e:
+            self._metrics['errors'] += 1
+            logger.error(f"Shop replica resync failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Freshness of this worker's replica"""
+        age = time.time() - self._last_snapshot_at if self._last_snapshot_at else None
+        return {
+            **self._metrics,
+            'enabled': self.enabled,
+            'synced': self._synced,
+            'watch_active': self._watch_active(),
+            'documents': len(self._docs),
+            'seconds_since_snapshot': round(age, 3) if age is not None else None,
+            'apply_lag_seconds': round(self._last_lag, 3) if self._last_lag is not None else None
+        }
+
+
+# Create singleton instance
+shop_replica = ShopStateReplica()
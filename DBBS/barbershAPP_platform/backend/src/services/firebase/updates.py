@@ -1,26 +1,37 @@
 from firebase_admin import firestore # type: ignore
-from typing import List, Dict
+from typing import Dict, Iterable, List
+from src.services.firebase.batch import get_documents
+
+LIVE_FIELD_PATHS = ['queue_length', 'queue_size', 'estimated_wait', 'available_barbers', 'is_open', 'last_updated']
+
+def live_values(real_time_data: Dict) -> Dict:
+    """Response fields from a shop document; older documents name the queue count queue_size"""
+    return {
+        'queue_length': real_time_data.get('queue_length', real_time_data.get('queue_size', 0)),
+        'wait_time': real_time_data.get('estimated_wait', 0),
+        'available_barbers': real_time_data.get('available_barbers', []),
+        'is_open': real_time_data.get('is_open'),
+        'last_updated': real_time_data.get('last_updated')
+    }
 
 class FirebaseUpdates:
     db = firestore.client()
+
+    @classmethod
+    def live_fields(cls, shop_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Fast-changing queue fields per shop: the listener replica, else batched Firestore get_all"""
+        shop_ids = list(dict.fromkeys(shop_ids))
+        from src.services.firebase.replica import shop_replica
+        if shop_replica.ready:
+            return shop_replica.live_fields(shop_ids)
+
+        documents = get_documents(cls.db, 'shops', map(str, shop_ids), LIVE_FIELD_PATHS)
+        return {shop_id: live_values(documents.get(str(shop_id), {})) for shop_id in shop_ids}
     
     @classmethod
     async def enhance_shop_data(cls, shops: List[Dict]) -> List[Dict]:
         """Add real-time data to shop results"""
-        enhanced = []
-        
-        for shop in shops:
-            # Get real-time shop data
-            shop_ref = cls.db.collection('shops').document(str(shop['id']))
-            real_time_data = shop_ref.get().to_dict() or {}
-            
-            # Merge PostGIS and real-time data
-            enhanced.append({
-                **shop,
-                'queue_length': real_time_data.get('queue_length', 0),
-                'wait_time': real_time_data.get('estimated_wait', 0),
-                'available_barbers': real_time_data.get('available_barbers', []),
-                'last_updated': real_time_data.get('last_updated')
-            })
+        live = cls.live_fields(shop['id'] for shop in shops)
         
-        return enhanced
\ No newline at end of file
+        # Merge PostGIS and real-time data
+        return [{**shop, **live[shop['id']]} for shop in shops]
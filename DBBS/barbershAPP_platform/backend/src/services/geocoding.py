@@ -0,0 +1,204 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from flask import current_app
+from src.services.http_client import UpstreamUnavailable, google_client
+from src.services.tasks import queue_service
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+# Cached in place of a result when the address definitively does not resolve
+NEGATIVE_MARKER = 'null'
+# Answers about the address itself; every other status is an upstream problem and is not cached
+DEFINITIVE_STATUSES = ('OK', 'ZERO_RESULTS', 'INVALID_REQUEST')
+COUNTERS = ('local_hits', 'redis_hits', 'negative_hits', 'misses', 'errors')
+# Counters are buffered in-process so an LRU hit never costs a Redis round trip
+STATS_FLUSH_SECONDS = 10
+
+
+def normalize_address(address: str) -> str:
+    """Case, whitespace and trailing punctuation do not change where an address is"""
+    return re.sub(r'\s+', ' ', address.strip().lower()).strip(' ,.')
+
+
+class LRUCache:
+    """Small thread-safe LRU whose entries also expire"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class GeocodingService:
+    """Google geocoding behind an in-process LRU and a shared Redis tier"""
+
+    def __init__(self, queue_service):
+        self.queue_service = queue_service
+        self.local = LRUCache()
+        self._pending = dict.fromkeys(COUNTERS, 0)
+        self._flushed_at = time.monotonic()
+        self._stats_lock = threading.Lock()
+
+    @property
+    def redis(self):
+        return self.queue_service.redis_client
+
+    @property
+    def prefix(self) -> str:
+        return f"{self.queue_service.config.get('QUEUE_PREFIX', 'barbershop:')}geocode:"
+
+    def _key(self, normalized: str) -> str:
+        return f"{self.prefix}{hashlib.sha1(normalized.encode()).hexdigest()}"
+
+    def _config(self, key: str, default):
+        return current_app.config.get(key, default)
+
+    def geocode(self, address: str) -> Optional[Dict[str, Any]]:
+        """{'lat', 'lng', 'address'} for an address, or None if it cannot be resolved"""
+        if not address or not address.strip():
+            return None
+        normalized = normalize_address(address)
+        self.local.max_size = self._config('GEOCODE_LRU_SIZE', 1024)
+
+        found, value = self.local.get(normalized)
+        if found:
+            self._count('negative_hits' if value is None else 'local_hits')
+            return value
+
+        found, value = self._read_shared(normalized)
+        if found:
+            self._count('negative_hits' if value is None else 'redis_hits')
+            self.local.set(normalized, value, self._ttl(value))
+            return value
+
+        self._count('misses')
+        value, definitive = self._lookup(address)
+        if not definitive:
+            return None
+        self.local.set(normalized, value, self._ttl(value))
+        self._write_shared(normalized, value)
+        return value
+
+    def _ttl(self, value) -> int:
+        if value is None:
+            return self._config('GEOCODE_NEGATIVE_TTL', 300)
+        return self._config('GEOCODE_CACHE_TTL', 30 * 86400)
+
+    def _read_shared(self, normalized: str) -> Tuple[bool, Any]:
+        if self.redis is None:
+            return False, None
+        try:
+            raw = self.redis.get(self._key(normalized))
+        except Exception as e:
+            logger.warning(f"Geocode cache read failed: {e}")
+            return False, None
+        if raw is None:
+            return False, None
+        return True, json.loads(raw)
+
+    def _write_shared(self, normalized: str, value) -> None:
+        if self.redis is None:
+            return
+        try:
+            payload = NEGATIVE_MARKER if value is None else json.dumps(value)
+            self.redis.set(self._key(normalized), payload, ex=self._ttl(value))
+        except Exception as e:
+            logger.warning(f"Geocode cache write failed: {e}")
+
+    def _lookup(self, address: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Call the Google Geocoding API; the flag says whether the answer may be cached"""
+        try:
+            # The cache tiers above already keep results; no stale copy needed from the client
+            data = google_client.get_json(
+                GEOCODE_URL,
+                {'address': address, 'key': self._config('GOOGLE_MAPS_API_KEY', None)},
+                stale=False
+            )
+        except UpstreamUnavailable as e:
+            self._count('errors')
+            logger.error(f"Geocoding request failed: {e}")
+            return None, False
+
+        status = data.get('status')
+        if status not in DEFINITIVE_STATUSES:
+            self._count('errors')
+            logger.error(f"Geocoding failed with status {status}: {data.get('error_message')}")
+            return None, False
+        if status != 'OK' or not data.get('results'):
+            return None, True
+        best = data['results'][0]
+        return {
+            'lat': best['geometry']['location']['lat'],
+            'lng': best['geometry']['location']['lng'],
+            'address': best.get('formatted_address')
+        }, True
+
+    def _count(self, counter: str) -> None:
+        with self._stats_lock:
+            self._pending[counter] += 1
+            if time.monotonic() - self._flushed_at < STATS_FLUSH_SECONDS:
+                return
+            pending, self._pending = self._pending, dict.fromkeys(COUNTERS, 0)
+            self._flushed_at = time.monotonic()
+        self._flush(pending)
+
+    def _flush(self, pending: Dict[str, int]) -> None:
+        if self.redis is None:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for counter, amount in pending.items():
+                if amount:
+                    pipe.hincrby(f"{self.prefix}stats", counter, amount)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Geocode stats update failed: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """Hit counters per tier, shared by every worker"""
+        with self._stats_lock:
+            pending, self._pending = self._pending, dict.fromkeys(COUNTERS, 0)
+            self._flushed_at = time.monotonic()
+        self._flush(pending)
+
+        counters = dict.fromkeys(COUNTERS, 0)
+        if self.redis is not None:
+            for key, value in self.redis.hgetall(f"{self.prefix}stats").items():
+                counters[key.decode() if isinstance(key, bytes) else key] = int(value)
+        lookups = counters['local_hits'] + counters['redis_hits'] + counters['negative_hits'] + counters['misses']
+        hits = lookups - counters['misses']
+        return {**counters, 'hit_rate': round(hits / lookups, 4) if lookups else 0.0}
+
+
+# Create singleton instance
+geocoding_service = GeocodingService(queue_service)
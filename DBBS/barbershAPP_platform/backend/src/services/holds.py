@@ -0,0 +1,170 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional, Set, Tuple
+from flask import current_app
+from src.services.tasks import queue_service
+import logging
+import secrets
+import time
+
+logger = logging.getLogger(__name__)
+
+# Claim the slot key and index it under its barber-day in one step
+HOLD_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'EX', ARGV[2]) then
+    redis.call('ZADD', KEYS[2], ARGV[4], ARGV[3])
+    redis.call('EXPIRE', KEYS[2], 86400)
+    return 1
+end
+return 0
+"""
+
+# Only the client that placed a hold may release it
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    redis.call('ZREM', KEYS[2], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+
+# Booking-time check and claim in one step: the caller's own hold passes, a free slot is
+# claimed briefly for a client without one, anything else is someone else's
+CLAIM_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return ARGV[2]
+end
+if ARGV[1] ~= '' and current == ARGV[1] then
+    return ARGV[1]
+end
+return false
+"""
+
+# Seconds a claim may outlive a crashed booking request
+CLAIM_TTL = 30
+
+
+class SlotHoldService:
+    """Short-lived Redis reservations of a slot while a client checks out"""
+
+    def __init__(self, queue_service):
+        self.queue_service = queue_service
+        self._hold = None
+        self._release = None
+        self._claim = None
+
+    @property
+    def redis(self):
+        return self.queue_service.redis_client
+
+    @property
+    def prefix(self) -> str:
+        return f"{self.queue_service.config.get('QUEUE_PREFIX', 'barbershop:')}hold:"
+
+    @property
+    def ttl(self) -> int:
+        return current_app.config.get('SLOT_HOLD_TTL', 300)
+
+    def _key(self, barber_id: int, start: datetime) -> str:
+        return f"{self.prefix}{barber_id}:{start.strftime('%Y-%m-%dT%H:%M')}"
+
+    def _day_key(self, barber_id: int, day: date) -> str:
+        return f"{self.prefix}{barber_id}:{day.isoformat()}:index"
+
+    def hold(self, barber_id: int, start: datetime) -> Optional[Tuple[str, int]]:
+        """Reserve a slot; returns (token, expires_at) or None if already held"""
+        if self.redis is None:
+            raise RuntimeError("QueueService not initialized")
+        if self._hold is None:
+            self._hold = self.redis.register_script(HOLD_SCRIPT)
+
+        token = secrets.token_urlsafe(16)
+        expires_at = int(time.time()) + self.ttl
+        acquired = self._hold(
+            keys=[self._key(barber_id, start), self._day_key(barber_id, start.date())],
+            args=[token, self.ttl, start.strftime('%H:%M'), expires_at]
+        )
+        return (token, expires_at) if acquired else None
+
+    def holder(self, barber_id: int, start: datetime) -> Optional[str]:
+        """Token currently holding a slot, if any"""
+        if self.redis is None:
+            return None
+        token = self.redis.get(self._key(barber_id, start))
+        return token.decode() if isinstance(token, bytes) else token
+
+    def claim(self, barber_id: int, start: datetime, hold_token: Optional[str] = None) -> Optional[str]:
+        """Token the booking owns the slot under, or None if another client holds it"""
+        # Without Redis nothing can be held; the exclusion constraint still guards the insert
+        if self.redis is None:
+            return ''
+        try:
+            if self._claim is None:
+                self._claim = self.redis.register_script(CLAIM_SCRIPT)
+            owner = self._claim(
+                keys=[self._key(barber_id, start)],
+                args=[hold_token or '', secrets.token_urlsafe(16), CLAIM_TTL]
+            )
+        except Exception as e:
+            logger.warning(f"Failed to claim slot: {e}")
+            return ''
+        return owner.decode() if isinstance(owner, bytes) else owner
+
+    def release(self, barber_id: int, start: datetime, token: str) -> bool:
+        """Drop a hold owned by token"""
+        if self.redis is None or not token:
+            return False
+        try:
+            if self._release is None:
+                self._release = self.redis.register_script(RELEASE_SCRIPT)
+            return bool(self._release(
+                keys=[self._key(barber_id, start), self._day_key(barber_id, start.date())],
+                args=[token, start.strftime('%H:%M')]
+            ))
+        except Exception as e:
+            logger.warning(f"Failed to release slot hold: {e}")
+            return False
+
+    def release_claim(self, barber_id: int, start: datetime, owner: Optional[str],
+                      hold_token: Optional[str] = None) -> None:
+        """Undo a claim after a failed booking; the client's own hold is kept for a retry"""
+        if owner and owner != hold_token:
+            self.release(barber_id, start, owner)
+
+    def held(self, pairs: List[Tuple[int, date]]) -> Dict[Tuple[int, date], Set[str]]:
+        """Live holds per barber-day, read in one round trip"""
+        if self.redis is None or not pairs:
+            return {}
+        try:
+            now = int(time.time())
+            pipe = self.redis.pipeline(transaction=False)
+            for barber_id, day in pairs:
+                pipe.zrangebyscore(self._day_key(barber_id, day), now, '+inf')
+            return {
+                pair: {member.decode() if isinstance(member, bytes) else member for member in members}
+                for pair, members in zip(pairs, pipe.execute())
+                if members
+            }
+        except Exception as e:
+            logger.warning(f"Failed to read slot holds: {e}")
+            return {}
+
+    def split_held(self, free: Dict[int, Dict[date, List[str]]]):
+        """Separate held slots from free ones in availability results"""
+        held = self.held([(barber_id, day) for barber_id, days in free.items() for day in days])
+        open_slots: Dict[int, Dict[date, List[str]]] = {}
+        held_slots: Dict[int, Dict[date, List[str]]] = {}
+        for barber_id, days in free.items():
+            for day, slots in days.items():
+                taken = held.get((barber_id, day), set())
+                open_slots.setdefault(barber_id, {})[day] = [slot for slot in slots if slot not in taken]
+                if taken:
+                    held_slots.setdefault(barber_id, {})[day] = [slot for slot in slots if slot in taken]
+        return open_slots, held_slots
+
+
+# Create singleton instance
+slot_holds = SlotHoldService(queue_service)
@@ -0,0 +1,258 @@
+from collections import deque
+from typing import Any, Dict, Optional
+from requests.adapters import HTTPAdapter
+from src.services.tasks import queue_service
+import hashlib
+import json
+import logging
+import random
+import requests
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+LATENCY_WINDOW = 512  # recent samples kept per upstream for percentiles
+
+DEFAULTS = {
+    'pool_size': 16,
+    'max_concurrency': 8,
+    'acquire_timeout': 0.5,
+    'connect_timeout': 2.0,
+    'read_timeout': 5.0,
+    'deadline': 10.0,  # seconds one call may spend across every attempt and backoff
+    'retries': 2,
+    'backoff_base': 0.2,
+    'backoff_cap': 2.0,
+    'breaker_threshold': 5,
+    'breaker_cooldown': 30,
+    'stale_ttl': 86400
+}
+
+
+class UpstreamUnavailable(Exception):
+    """The upstream failed, is shedding load, or its circuit is open"""
+
+
+def backoff(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, lets one trial call through once the cooldown ends"""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'half_open' if time.monotonic() - self.opened_at >= self.cooldown else 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class HttpClient:
+    """Pooled JSON client for one upstream with bounded concurrency, retries, a breaker and stale fallback"""
+
+    def __init__(self, name: str, **settings):
+        self.name = name
+        self.settings = {**DEFAULTS, **settings}
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._counters = {'requests': 0, 'errors': 0, 'retries': 0, 'rejected': 0, 'stale_served': 0}
+        self._build()
+
+    def _build(self) -> None:
+        settings = self.settings
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings['pool_size'])
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.slots = threading.BoundedSemaphore(settings['max_concurrency'])
+        self.breaker = CircuitBreaker(settings['breaker_threshold'], settings['breaker_cooldown'])
+
+    def configure(self, **settings) -> None:
+        """Apply app config; rebuilds the pool, semaphore and breaker"""
+        self.settings.update(settings)
+        self._build()
+
+    @property
+    def redis(self):
+        return queue_service.redis_client
+
+    def _stale_key(self, url: str, params: Dict[str, Any]) -> str:
+        digest = hashlib.sha1(json.dumps([url, params], sort_keys=True, default=str).encode()).hexdigest()
+        return f"{queue_service.config.get('QUEUE_PREFIX', 'barbershop:')}http-stale:{self.name}:{digest}"
+
+    def get_json(self, url: str, params: Optional[Dict[str, Any]] = None, stale: bool = True) -> Any:
+        """GET and decode JSON; on failure return the last good response if allowed, else raise"""
+        params = params or {}
+        try:
+            data = self._fetch(url, params)
+        except UpstreamUnavailable:
+            if stale:
+                cached = self._read_stale(url, params)
+                if cached is not None:
+                    self._count('stale_served')
+                    logger.warning(f"Serving stale {self.name} response for {url}")
+                    return cached
+            raise
+        if stale:
+            self._write_stale(url, params, data)
+        return data
+
+    def _fetch(self, url: str, params: Dict[str, Any]) -> Any:
+        settings = self.settings
+        # Waiting for a slot is bounded too: a saturated upstream should fail fast, not queue workers
+        if not self.slots.acquire(timeout=settings['acquire_timeout']):
+            self._count('rejected')
+            raise UpstreamUnavailable(f"{self.name} concurrency limit reached")
+        try:
+            if not self.breaker.allow():
+                self._count('rejected')
+                raise UpstreamUnavailable(f"{self.name} circuit open")
+            last_error: Optional[Exception] = None
+            deadline = time.monotonic() + settings['deadline']
+            attempts = 0
+            for attempt in range(settings['retries'] + 1):
+                if attempt:
+                    delay = backoff(attempt - 1, settings['backoff_base'], settings['backoff_cap'])
+                    # A retry that cannot finish in time would only keep holding the slot
+                    if time.monotonic() + delay >= deadline:
+                        break
+                    self._count('retries')
+                    time.sleep(delay)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                attempts += 1
+                started = time.monotonic()
+                try:
+                    response = self.session.get(
+                        url, params=params,
+                        timeout=(min(settings['connect_timeout'], remaining), min(settings['read_timeout'], remaining))
+                    )
+                    self._observe(time.monotonic() - started)
+                    if response.status_code in RETRY_STATUSES:
+                        last_error = requests.exceptions.HTTPError(f"HTTP {response.status_code}")
+                        continue
+                    response.raise_for_status()
+                    data = response.json()
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    self._observe(time.monotonic() - started)
+                    last_error = e
+                    continue
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    # 4xx and malformed bodies will not improve on retry, but the upstream did answer
+                    self._count('errors')
+                    self.breaker.record_success()
+                    raise UpstreamUnavailable(f"{self.name} request failed: {e}")
+                self.breaker.record_success()
+                return data
+        finally:
+            self.slots.release()
+
+        self._count('errors')
+        self.breaker.record_failure()
+        raise UpstreamUnavailable(f"{self.name} unavailable after {attempts} attempts: {last_error}")
+
+    def _read_stale(self, url: str, params: Dict[str, Any]) -> Any:
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(self._stale_key(url, params))
+            return json.loads(raw) if raw is not None else None
+        except Exception as e:
+            logger.warning(f"Stale cache read failed: {e}")
+            return None
+
+    def _write_stale(self, url: str, params: Dict[str, Any], data: Any) -> None:
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(self._stale_key(url, params), json.dumps(data), ex=self.settings['stale_ttl'])
+        except Exception as e:
+            logger.warning(f"Stale cache write failed: {e}")
+
+    def _observe(self, seconds: float) -> None:
+        with self._lock:
+            self._counters['requests'] += 1
+            self._latencies.append(seconds * 1000)
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and recent latency percentiles (ms) for this worker process"""
+        with self._lock:
+            samples = sorted(self._latencies)
+            counters = dict(self._counters)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(fraction * len(samples)))], 1)
+
+        return {
+            **counters,
+            'circuit': self.breaker.state,
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99)
+        }
+
+
+arcgis_client = HttpClient('arcgis', read_timeout=10.0, deadline=15.0)
+google_client = HttpClient('google', deadline=8.0)
+integration_client = HttpClient('integration', read_timeout=30.0, deadline=45.0)
+
+CLIENTS = {client.name: client for client in (arcgis_client, google_client, integration_client)}
+
+# Each upstream keeps the read-timeout setting it had before the shared client existed
+READ_TIMEOUT_KEYS = {'arcgis': 'GIS_TIMEOUT', 'google': 'GEOCODE_TIMEOUT', 'integration': 'API_TIMEOUT'}
+
+
+def init_http_clients(app) -> None:
+    """Size every upstream client from app config"""
+    for client in CLIENTS.values():
+        client.configure(
+            pool_size=app.config.get('HTTP_POOL_SIZE', DEFAULTS['pool_size']),
+            max_concurrency=app.config.get('HTTP_MAX_CONCURRENCY', DEFAULTS['max_concurrency']),
+            connect_timeout=app.config.get('HTTP_CONNECT_TIMEOUT', DEFAULTS['connect_timeout']),
+            read_timeout=app.config.get(READ_TIMEOUT_KEYS[client.name], client.settings['read_timeout']),
+            retries=app.config.get('HTTP_RETRIES', DEFAULTS['retries']),
+            breaker_threshold=app.config.get('HTTP_BREAKER_THRESHOLD', DEFAULTS['breaker_threshold']),
+            breaker_cooldown=app.config.get('HTTP_BREAKER_COOLDOWN', DEFAULTS['breaker_cooldown']),
+            stale_ttl=app.config.get('HTTP_STALE_TTL', DEFAULTS['stale_ttl'])
+        )
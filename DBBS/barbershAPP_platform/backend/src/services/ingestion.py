@@ -0,0 +1,131 @@
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+from flask import current_app
+from src.database.db import db
+from src.models.ingestion_state import IngestionState
+from src.services.shop_sync import ShopSyncEngine
+import logging
+
+logger = logging.getLogger(__name__)
+
+SOURCE = 'arcgis_barbershops'
+DEFAULT_PAGE_SIZE = 1000
+
+def parse_feature(feature: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map one ArcGIS business feature onto barbershop columns; None if unusable"""
+    attributes = feature.get('attributes') or {}
+    geometry = feature.get('geometry') or {}
+    external_id = attributes.get('GLOBALID') or attributes.get('GIS_ID') or attributes.get('OBJECTID')
+    lon = geometry.get('x', attributes.get('LONGITUDE'))
+    lat = geometry.get('y', attributes.get('LATITUDE'))
+    if external_id is None or lon is None or lat is None or not attributes.get('BARBERSHOP'):
+        return None
+    edited = attributes.get('EDITED') or attributes.get('CREATED')
+    return {
+        'external_id': str(external_id),
+        'name': attributes['BARBERSHOP'],
+        'address': attributes.get('ADDRESS') or '',
+        'phone': (attributes.get('PHONE') or '')[:20] or None,
+        'lon': float(lon),
+        'lat': float(lat),
+        # ArcGIS dates are epoch milliseconds
+        'edited': datetime.utcfromtimestamp(edited / 1000) if isinstance(edited, (int, float)) else None
+    }
+
+
+class ArcGISIngestor:
+    """Pages through the ArcGIS business layer and upserts barbershops batch by batch"""
+
+    def __init__(self, gis_service, page_size: int = DEFAULT_PAGE_SIZE):
+        self.gis_service = gis_service
+        self.page_size = page_size
+        self.engine = ShopSyncEngine(batch_size=page_size)
+
+    def pages(self, where: str = '1=1') -> Iterator[List[Dict[str, Any]]]:
+        """One page of raw features at a time; only the current page is held in memory"""
+        # Never ingest a stale copy: a cached page would be synced as if the layer still looked like that
+        offset = 0
+        while True:
+            result = self.gis_service._make_request(self.gis_service.query_url, {
+                'where': where,
+                'outFields': '*',
+                'outSR': 4326,
+                'orderByFields': 'OBJECTID',
+                'resultOffset': offset,
+                'resultRecordCount': self.page_size,
+                'f': 'json'
+            }, stale=False)
+            if result is None:
+                raise RuntimeError(f"ArcGIS page at offset {offset} failed")
+            if 'error' in result:
+                raise RuntimeError(f"ArcGIS error at offset {offset}: {result['error']}")
+
+            features = result.get('features', [])
+            if features:
+                yield features
+            # The server may cap a page below what we asked for; exceededTransferLimit says more remain
+            if not features or not (result.get('exceededTransferLimit') or len(features) >= self.page_size):
+                return
+            offset += len(features)
+
+    def records(self, where: str = '1=1') -> Iterator[Dict[str, Any]]:
+        for page in self.pages(where):
+            for feature in page:
+                record = parse_feature(feature)
+                if record is not None:
+                    yield record
+
+    def run(self, full: bool = False) -> Dict[str, Any]:
+        """Fetch edits since the stored high-water mark (or everything) and upsert them"""
+        state = db.session.get(IngestionState, SOURCE) or IngestionState(source=SOURCE)
+        where = '1=1'
+        if state.high_water_mark and not full:
+            where = f"EDITED > TIMESTAMP '{state.high_water_mark:%Y-%m-%d %H:%M:%S}'"
+
+        high_water_mark = state.high_water_mark
+        processed = 0
+        records = self.records(where)
+        while True:
+            batch = list(islice(records, self.page_size))
+            if not batch:
+                break
+            self.apply(batch)
+            processed += len(batch)
+            edits = [record['edited'] for record in batch if record['edited']]
+            if edits:
+                high_water_mark = max(filter(None, [high_water_mark, *edits]))
+
+        state.high_water_mark = high_water_mark
+        state.last_run_at = datetime.utcnow()
+        state.last_run_count = processed
+        db.session.add(state)
+        db.session.commit()
+        counts = dict(self.engine.counts)
+        if counts['inserted'] or counts['updated']:
+            from src.services.map_tiles import map_tiles
+            from src.services.nearby_cache import nearby_cache
+            from src.services.shop_index import shop_index
+            nearby_cache.invalidate()
+            shop_index.invalidate()
+            map_tiles.invalidate()
+        logger.info(
+            f"ArcGIS ingestion processed {processed} records "
+            f"({counts['inserted']} inserted, {counts['updated']} updated, {counts['unchanged']} unchanged; "
+            f"high-water mark {high_water_mark})"
+        )
+        return {'processed': processed, **counts, 'high_water_mark': high_water_mark}
+
+    def apply(self, batch: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Merge one batch through the sync engine, which skips rows whose content hash is unchanged"""
+        return self.engine.merge(batch)
+
+
+def ingest_barbershops(full: bool = False, page_size: Optional[int] = None) -> Dict[str, Any]:
+    """Entry point for the CLI and the scheduled task"""
+    from src.services.GISService import GISService
+
+    gis_service = GISService()
+    gis_service.init_app(current_app)
+    ingestor = ArcGISIngestor(gis_service, page_size or current_app.config.get('ARCGIS_PAGE_SIZE', DEFAULT_PAGE_SIZE))
+    return ingestor.run(full=full)
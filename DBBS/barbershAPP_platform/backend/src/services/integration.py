@@ -1,6 +1,6 @@
-import requests
-from src.models import Barbershop
 from flask import current_app
+from src.services.http_client import UpstreamUnavailable, integration_client
+from src.services.shop_sync import ShopSyncEngine
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 
@@ -19,29 +19,50 @@ class IntegrationService:
         }
     @staticmethod
     def fetch_barbershop_data(api_url: str, params: Dict[str, Any]) -> Optional[Dict]:
-        """Fetch barbershop data from external API."""
+        """Fetch barbershop data from external API; a failed fetch skips the sync rather than replaying old data."""
         try:
-            response = requests.get(api_url, params=params)
-            return response.json() if response.ok else None
-        except Exception as e:
+            return integration_client.get_json(api_url, params, stale=False)
+        except UpstreamUnavailable as e:
             current_app.logger.error(f"API request failed: {e}")
             return None
 
-    def sync_barbershop_data(self) -> bool:
-        """Synchronize barbershop data from external API to local database."""
+    @staticmethod
+    def parse_shop(shop_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Map one external API shop onto barbershop columns; None if it has no id or position."""
+        location = shop_data.get('location') or {}
+        lat = shop_data.get('latitude', location.get('lat'))
+        lon = shop_data.get('longitude', location.get('lng', location.get('lon')))
+        if shop_data.get('id') is None or not shop_data.get('name') or lat is None or lon is None:
+            return None
+        return {
+            'external_id': str(shop_data['id']),
+            'name': shop_data['name'],
+            'address': shop_data.get('address') or '',
+            'phone': (shop_data.get('phone') or '')[:20] or None,
+            'lon': float(lon),
+            'lat': float(lat)
+        }
+
+    def sync_barbershop_data(self) -> Optional[Dict[str, int]]:
+        """Synchronize barbershop data from external API; returns inserted/updated/unchanged counts."""
         try:
             data = self.fetch_barbershop_data(f"{self.base_url}/barbershops", {})
-            if data:
-                for shop_data in data:
-                    shop = Barbershop.query.filter_by(external_id=shop_data['id']).first()
-                    if not shop:
-                        shop = Barbershop()
-                    shop.update_from_dict(shop_data)
-                current_app.db.session.commit()
-                return True
-            return False
+            if not data:
+                return None
+            records = (record for record in map(self.parse_shop, data) if record is not None)
+            engine = ShopSyncEngine(batch_size=current_app.config.get('SHOP_SYNC_BATCH_SIZE', 5000))
+            counts = engine.sync(records)
+            if counts['inserted'] or counts['updated']:
+                from src.services.map_tiles import map_tiles
+                from src.services.nearby_cache import nearby_cache
+                from src.services.shop_index import shop_index
+                nearby_cache.invalidate()
+                shop_index.invalidate()
+                map_tiles.invalidate()
+            current_app.logger.info(f"Barbershop sync: {counts}")
+            return counts
         except Exception as e:
             current_app.logger.error(f"Error syncing barbershop data: {e}")
-            return False
+            return None
 
 __all__ = ['IntegrationService', 'QueueService', 'celery']
\ No newline at end of file
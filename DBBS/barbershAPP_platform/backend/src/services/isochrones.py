@@ -0,0 +1,251 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import text
+from src.database.db import db
+from src.models.isochrone import Isochrone
+from src.services.distance import geodesic, haversine
+from src.services.tasks import build_isochrone, queue_service
+from src.utils import geohash
+import hashlib
+import heapq
+import json
+import logging
+import numpy as np
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+TIME_BUCKETS = (15, 30, 45, 60)
+CELL_PRECISION = 6  # ~1.2 x 0.6 km; everyone in a cell shares one polygon
+MAX_SNAP_METERS = 2000
+BUILD_PENDING_TTL = 600  # seconds a queued build suppresses further queueing for its cell
+
+# km/h by OSM highway class when a segment carries no maxspeed
+DEFAULT_SPEEDS = {
+    'motorway': 100, 'motorway_link': 60,
+    'trunk': 80, 'trunk_link': 50,
+    'primary': 55, 'primary_link': 40,
+    'secondary': 45, 'secondary_link': 35,
+    'tertiary': 40, 'tertiary_link': 30,
+    'unclassified': 30, 'residential': 25,
+    'living_street': 10, 'service': 15
+}
+FALLBACK_SPEED = 25
+
+Node = Tuple[float, float]  # (lon, lat) rounded to ~10 cm
+
+
+def time_bucket(minutes: int) -> int:
+    """Smallest precomputed drive time covering the request"""
+    return next((bucket for bucket in TIME_BUCKETS if bucket >= minutes), TIME_BUCKETS[-1])
+
+
+def segment_speed(properties: Dict) -> float:
+    """Travel speed in km/h from maxspeed ('50', '30 mph') or the highway class"""
+    maxspeed = properties.get('maxspeed')
+    if maxspeed:
+        match = re.match(r'\s*(\d+(?:\.\d+)?)\s*(mph)?', str(maxspeed))
+        if match:
+            speed = float(match.group(1))
+            return speed * 1.609 if match.group(2) else speed
+    return DEFAULT_SPEEDS.get(properties.get('highway'), FALLBACK_SPEED)
+
+
+class RoadNetwork:
+    """Directed road graph with edge weights in seconds of travel"""
+
+    def __init__(self):
+        self.edges: Dict[Node, List[Tuple[Node, float]]] = defaultdict(list)
+        self.nodes: List[Node] = []
+        self.lons = np.empty(0)
+        self.lats = np.empty(0)
+
+    @classmethod
+    def from_geojson(cls, collection: Dict) -> 'RoadNetwork':
+        network = cls()
+        for feature in collection.get('features', []):
+            geometry = feature.get('geometry') or {}
+            properties = feature.get('properties') or {}
+            if geometry.get('type') == 'LineString':
+                lines = [geometry['coordinates']]
+            elif geometry.get('type') == 'MultiLineString':
+                lines = geometry['coordinates']
+            else:
+                continue
+            oneway = str(properties.get('oneway', 'no')).lower()
+            for line in lines:
+                network.add_line(line, segment_speed(properties), oneway)
+        network.freeze()
+        return network
+
+    def add_line(self, coordinates: List, speed_kmh: float, oneway: str = 'no') -> None:
+        points = [(round(lon, 6), round(lat, 6)) for lon, lat, *_ in coordinates]
+        if len(points) < 2:
+            return
+        lons = np.array([point[0] for point in points])
+        lats = np.array([point[1] for point in points])
+        # Elementwise over consecutive vertices: one vectorized call per line
+        lengths = geodesic(lats[:-1], lons[:-1], lats[1:], lons[1:])
+        meters_per_second = max(speed_kmh, 1) / 3.6
+        for (start, end), length in zip(zip(points, points[1:]), lengths):
+            seconds = float(length) / meters_per_second
+            if oneway != '-1':
+                self.edges[start].append((end, seconds))
+            if oneway in ('-1', 'no', 'false', '0'):
+                self.edges[end].append((start, seconds))
+
+    def freeze(self) -> None:
+        """Index every node's coordinates for snapping"""
+        nodes = set(self.edges)
+        for targets in self.edges.values():
+            nodes.update(node for node, _ in targets)
+        self.nodes = list(nodes)
+        self.lons = np.array([node[0] for node in self.nodes])
+        self.lats = np.array([node[1] for node in self.nodes])
+
+    def snap(self, lat: float, lon: float) -> Optional[Node]:
+        """Closest graph node, if one lies within MAX_SNAP_METERS"""
+        if not self.nodes:
+            return None
+        distances = haversine(lat, lon, self.lats, self.lons)
+        closest = int(np.argmin(distances))
+        return self.nodes[closest] if distances[closest] <= MAX_SNAP_METERS else None
+
+    def reachable(self, origin: Node, seconds: float) -> List[Node]:
+        """Nodes reachable from origin within the time budget (Dijkstra with a cutoff)"""
+        best = {origin: 0.0}
+        frontier = [(0.0, origin)]
+        while frontier:
+            elapsed, node = heapq.heappop(frontier)
+            if elapsed > best.get(node, float('inf')):
+                continue
+            for target, cost in self.edges.get(node, ()):
+                arrival = elapsed + cost
+                if arrival <= seconds and arrival < best.get(target, float('inf')):
+                    best[target] = arrival
+                    heapq.heappush(frontier, (arrival, target))
+        return list(best)
+
+
+class IsochroneService:
+    """Drive-time polygons from a local road network, cached per geohash cell and time bucket"""
+
+    def __init__(self):
+        self._network: Optional[RoadNetwork] = None
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Optional[str]:
+        return current_app.config.get('ROAD_NETWORK_PATH')
+
+    def network_version(self) -> Optional[str]:
+        """Fingerprint of the road network file from its metadata alone, without reading it"""
+        path = self.path
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return hashlib.sha1(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()
+
+    def network(self) -> Optional[Tuple[RoadNetwork, str]]:
+        """Road graph loaded once per process, reloaded when the file changes; builds only"""
+        version = self.network_version()
+        if version is None:
+            return None
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    with open(self.path, encoding='utf-8') as handle:
+                        self._network = RoadNetwork.from_geojson(json.load(handle))
+                    self._version = version
+                    logger.info(f"Loaded road network with {len(self._network.nodes)} nodes from {self.path}")
+        return self._network, self._version
+
+    def polygon_id(self, lat: float, lon: float, minutes: int) -> Optional[int]:
+        """Id of the cached polygon for this point's cell; a miss queues a build and returns None"""
+        # Request path: the version comes from os.stat, the graph itself is only loaded by builds
+        version = self.network_version()
+        if version is None:
+            return None
+        cell = geohash.encode(lat, lon, CELL_PRECISION)
+        bucket = time_bucket(minutes)
+        row = db.session.query(Isochrone.id).filter_by(
+            cell=cell, minutes=bucket, network_version=version
+        ).first()
+        if row:
+            return row.id
+        # Never build on the request path; callers use the DRIVE_TIMES radius until the worker is done
+        if current_app.config.get('ISOCHRONE_COMPUTE_ON_MISS', False):
+            self.schedule_build(cell, bucket, version)
+        return None
+
+    def schedule_build(self, cell: str, minutes: int, version: str) -> None:
+        """Queue one background build per cell and bucket, however many searches miss it"""
+        redis = queue_service.redis_client
+        key = f"{queue_service.config.get('QUEUE_PREFIX', 'barbershop:')}isochrone-pending:{version}:{cell}:{minutes}"
+        try:
+            if redis is not None and not redis.set(key, 1, nx=True, ex=BUILD_PENDING_TTL):
+                return
+            build_isochrone.delay(cell, minutes)
+        except Exception as e:
+            logger.warning(f"Failed to queue isochrone build: {e}")
+
+    def build(self, cell: str, minutes: int) -> Optional[int]:
+        """Compute and store the polygon reachable from a cell's center"""
+        loaded = self.network()
+        if loaded is None:
+            return None
+        network, version = loaded
+        lat, lon = geohash.decode(cell)
+        origin = network.snap(lat, lon)
+        if origin is None:
+            return None
+
+        points = network.reachable(origin, minutes * 60)
+        multipoint = 'MULTIPOINT(' + ','.join(f"{node_lon} {node_lat}" for node_lon, node_lat in points) + ')'
+        row = db.session.execute(text("""
+            INSERT INTO isochrones (cell, minutes, polygon, network_version, created_at)
+            VALUES (
+                :cell,
+                :minutes,
+                ST_Buffer(
+                    ST_ConcaveHull(ST_GeomFromText(:points, 4326), :concavity)::geography,
+                    :buffer
+                )::geometry,
+                :version,
+                now()
+            )
+            ON CONFLICT (cell, minutes) DO UPDATE
+                SET polygon = EXCLUDED.polygon,
+                    network_version = EXCLUDED.network_version,
+                    created_at = EXCLUDED.created_at
+            RETURNING id
+        """), {
+            'cell': cell,
+            'minutes': minutes,
+            'points': multipoint,
+            'concavity': current_app.config.get('ISOCHRONE_CONCAVITY', 0.3),
+            'buffer': current_app.config.get('ISOCHRONE_BUFFER_METERS', 250),
+            'version': version
+        }).first()
+        db.session.commit()
+        return row.id
+
+    def precompute(self, cells: Iterable[str], buckets: Iterable[int] = TIME_BUCKETS) -> int:
+        """Build polygons for many cells ahead of time; returns how many were stored"""
+        built = 0
+        for cell in cells:
+            for minutes in buckets:
+                if self.build(cell, minutes) is not None:
+                    built += 1
+        return built
+
+
+# Create singleton instance
+isochrone_service = IsochroneService()
@@ -0,0 +1,218 @@
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import text
+from src.database.db import db
+from src.services.geocoding import LRUCache
+from src.services.tasks import queue_service
+from src.utils import tiles
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Shops inside one tile, half-open on the east/south edges so a shop on a seam lands in exactly one tile
+TILE_SHOPS_CTE = """
+    WITH tile AS (
+        SELECT ST_MakeEnvelope(:xmin, :ymin, :xmax, :ymax, 3857) AS env
+    ), shops AS (
+        SELECT s.id, s.name, s.address, ST_Transform(s.location, 3857) AS geom
+        FROM barbershops s, tile
+        WHERE s.location && ST_Transform(tile.env, 4326)
+    ), inside AS (
+        SELECT * FROM shops
+        WHERE ST_X(geom) >= :xmin AND ST_X(geom) < :xmax
+          AND ST_Y(geom) > :ymin AND ST_Y(geom) <= :ymax
+    )
+"""
+
+# Grid cells are powers-of-two fractions of the tile, so they nest inside it and never straddle tiles
+CLUSTER_SQL = text(TILE_SHOPS_CTE + """
+    SELECT count(*) AS count,
+           ST_Y(ST_Transform(ST_Centroid(ST_Collect(geom)), 4326)) AS lat,
+           ST_X(ST_Transform(ST_Centroid(ST_Collect(geom)), 4326)) AS lng,
+           CASE WHEN count(*) = 1 THEN min(id) END AS id,
+           CASE WHEN count(*) = 1 THEN min(name) END AS name,
+           CASE WHEN count(*) = 1 THEN min(address) END AS address
+    FROM inside
+    GROUP BY ST_SnapToGrid(geom, :cell)
+""")
+
+# Vector tile of the shop layer; the envelope is padded by the buffer so symbols near a seam render on both sides
+MVT_SQL = text("""
+    WITH bounds AS (
+        SELECT ST_MakeEnvelope(:xmin, :ymin, :xmax, :ymax, 3857) AS env,
+               ST_Expand(ST_MakeEnvelope(:xmin, :ymin, :xmax, :ymax, 3857), :margin) AS padded
+    ), features AS (
+        SELECT ST_AsMVTGeom(ST_Transform(s.location, 3857), bounds.env, :extent, :buffer, true) AS geom,
+               s.id,
+               s.name
+        FROM barbershops s, bounds
+        WHERE s.location && ST_Transform(bounds.padded, 4326)
+    )
+    SELECT ST_AsMVT(features.*, 'shops', :extent, 'geom') AS tile FROM features
+""")
+
+SHOPS_SQL = text(TILE_SHOPS_CTE + """
+    SELECT id, name, address,
+           ST_Y(ST_Transform(geom, 4326)) AS lat,
+           ST_X(ST_Transform(geom, 4326)) AS lng
+    FROM inside
+    ORDER BY id
+""")
+
+
+class MapTileService:
+    """Map payloads computed per XYZ tile and cached, so a viewport costs a handful of cache reads"""
+
+    def __init__(self, queue_service):
+        self.queue_service = queue_service
+        self.local = LRUCache(max_size=4096)
+
+    @property
+    def redis(self):
+        return self.queue_service.redis_client
+
+    @property
+    def prefix(self) -> str:
+        return self.queue_service.config.get('QUEUE_PREFIX', 'barbershop:')
+
+    def _config(self, key: str, default):
+        return current_app.config.get(key, default)
+
+    def _key(self, kind: str, zoom: int, x: int, y: int) -> str:
+        return f"{self.prefix}map:{kind}:{zoom}:{x}:{y}"
+
+    def viewport(self, west: float, south: float, east: float, north: float, zoom: int) -> Dict:
+        """Clusters (low zoom) or individual shops (high zoom) for every tile the box touches"""
+        clustered = zoom < self._config('MAP_CLUSTER_MAX_ZOOM', 15)
+        covering = list(tiles.tiles_covering(west, south, east, north, zoom))
+        if len(covering) > self._config('MAP_MAX_TILES', 64):
+            raise ValueError("Viewport spans too many tiles for this zoom")
+
+        items: List[Dict] = []
+        for tile_items in self._tiles('clusters' if clustered else 'shops', zoom, covering):
+            items.extend(tile_items)
+        return {'zoom': zoom, 'clustered': clustered, 'items': items}
+
+    def _tiles(self, kind: str, zoom: int, covering: List[Tuple[int, int]]) -> List[List[Dict]]:
+        """In-process LRU, then one Redis MGET for the rest, then PostGIS per remaining tile"""
+        keys = [self._key(kind, zoom, x, y) for x, y in covering]
+        results: List[Optional[List[Dict]]] = []
+        for key in keys:
+            found, value = self.local.get(key)
+            results.append(value if found else None)
+
+        missing = [index for index, value in enumerate(results) if value is None]
+        if missing and self.redis is not None:
+            try:
+                for index, raw in zip(missing, self.redis.mget([keys[index] for index in missing])):
+                    if raw is not None:
+                        results[index] = json.loads(raw)
+            except Exception as e:
+                logger.warning(f"Map tile cache read failed: {e}")
+
+        fresh = {}
+        for index, (x, y) in enumerate(covering):
+            if results[index] is None:
+                results[index] = self._compute(kind, zoom, x, y)
+                fresh[keys[index]] = results[index]
+            self.local.set(keys[index], results[index], self._config('MAP_LOCAL_TTL', 30))
+        self._write(fresh)
+        return results
+
+    def _compute(self, kind: str, zoom: int, x: int, y: int) -> List[Dict]:
+        xmin, ymin, xmax, ymax = tiles.tile_mercator_bounds(zoom, x, y)
+        params = {'xmin': xmin, 'ymin': ymin, 'xmax': xmax, 'ymax': ymax}
+        if kind == 'shops':
+            return [
+                {'id': row.id, 'name': row.name, 'address': row.address, 'count': 1,
+                 'location': {'lat': row.lat, 'lng': row.lng}}
+                for row in db.session.execute(SHOPS_SQL, params)
+            ]
+
+        params['cell'] = tiles.tile_size_meters(zoom) / self._config('MAP_CLUSTER_GRID', 8)
+        return [
+            {'id': row.id, 'name': row.name, 'address': row.address, 'count': row.count,
+             'location': {'lat': row.lat, 'lng': row.lng}}
+            for row in db.session.execute(CLUSTER_SQL, params)
+        ]
+
+    def mvt(self, zoom: int, x: int, y: int) -> bytes:
+        """Mapbox Vector Tile of the shop layer (id and name only), cached in Redis as raw bytes"""
+        key = self._key('mvt', zoom, x, y)
+        if self.redis is not None:
+            try:
+                cached = self.redis.get(key)
+                if cached is not None:
+                    return cached
+            except Exception as e:
+                logger.warning(f"Vector tile cache read failed: {e}")
+
+        extent = self._config('MVT_EXTENT', 4096)
+        buffer = self._config('MVT_BUFFER', 64)
+        xmin, ymin, xmax, ymax = tiles.tile_mercator_bounds(zoom, x, y)
+        row = db.session.execute(MVT_SQL, {
+            'xmin': xmin, 'ymin': ymin, 'xmax': xmax, 'ymax': ymax,
+            'extent': extent,
+            'buffer': buffer,
+            'margin': tiles.tile_size_meters(zoom) * buffer / extent
+        }).first()
+        tile = bytes(row.tile) if row and row.tile is not None else b''
+
+        if self.redis is not None:
+            try:
+                self.redis.set(key, tile, ex=self._config('MAP_TILE_CACHE_TTL', 3600))
+            except Exception as e:
+                logger.warning(f"Vector tile cache write failed: {e}")
+        return tile
+
+    def _write(self, values: Dict[str, List[Dict]]) -> None:
+        if self.redis is None or not values:
+            return
+        try:
+            ttl = self._config('MAP_TILE_CACHE_TTL', 3600)
+            pipe = self.redis.pipeline(transaction=False)
+            for key, value in values.items():
+                pipe.set(key, json.dumps(value), ex=ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Map tile cache write failed: {e}")
+
+    def invalidate(self) -> None:
+        """Forget every cached tile after shops are added, moved or removed"""
+        self.local.clear()
+        if self.redis is None:
+            return
+        try:
+            keys = list(self.redis.scan_iter(match=f"{self.prefix}map:*", count=1000))
+            if keys:
+                self.redis.delete(*keys)
+        except Exception as e:
+            logger.error(f"Map tile cache invalidation failed: {e}")
+
+    def invalidate_point(self, lat: float, lon: float) -> None:
+        """Forget the tiles, at every zoom, whose payload can show one shop's position"""
+        self.local.clear()
+        if self.redis is None:
+            return
+        keys = [
+            self._key(kind, zoom, x, y)
+            for zoom in range(tiles.MAX_ZOOM + 1)
+            for x, y in tiles.tiles_near(lat, lon, zoom)
+            for kind in ('clusters', 'shops')
+        ]
+        # Vector tiles also draw shops inside the MVT_BUFFER margin around them
+        padding = self._config('MVT_BUFFER', 64) / self._config('MVT_EXTENT', 4096)
+        keys.extend(
+            self._key('mvt', zoom, x, y)
+            for zoom in range(tiles.MAX_ZOOM + 1)
+            for x, y in tiles.tiles_near(lat, lon, zoom, padding)
+        )
+        try:
+            self.redis.delete(*keys)
+        except Exception as e:
+            logger.error(f"Map tile cache invalidation failed: {e}")
+
+
+# Create singleton instance
+map_tiles = MapTileService(queue_service)
@@ -0,0 +1,150 @@
+from typing import Dict, List, Optional
+from flask import current_app
+from src.services.distance import geodesic
+from src.services.geocoding import LRUCache
+from src.services.isochrones import CELL_PRECISION, time_bucket
+from src.services.tasks import queue_service
+from src.utils import geohash
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+class NearbyCache:
+    """Drive-time search results cached per (geohash cell, time bucket), with live fields overlaid"""
+
+    def __init__(self, queue_service):
+        self.queue_service = queue_service
+        self.local = LRUCache(max_size=2048)
+
+    @property
+    def redis(self):
+        return self.queue_service.redis_client
+
+    @property
+    def prefix(self) -> str:
+        return self.queue_service.config.get('QUEUE_PREFIX', 'barbershop:')
+
+    def _key(self, cell: str, bucket: int) -> str:
+        return f"{self.prefix}nearby:{cell}:{bucket}"
+
+    def _live_key(self, shop_id: int) -> str:
+        return f"{self.prefix}shop-live:{shop_id}"
+
+    def _config(self, key: str, default):
+        return current_app.config.get(key, default)
+
+    def shops(self, lat: float, lon: float, minutes: int) -> List[Dict]:
+        """Shops within a drive time of a point, nearest first, with current queue data"""
+        cell = geohash.encode(lat, lon, CELL_PRECISION)
+        bucket = time_bucket(minutes)
+        spatial = self._spatial(cell, bucket)
+
+        # The cached list is shared by the whole cell; distances are per client
+        if spatial:
+            distances = geodesic(
+                lat, lon,
+                [shop['location']['coordinates'][1] for shop in spatial],
+                [shop['location']['coordinates'][0] for shop in spatial]
+            )
+            spatial = sorted(
+                ({**shop, 'distance': float(distance)} for shop, distance in zip(spatial, distances)),
+                key=lambda shop: shop['distance']
+            )
+        return self.overlay(spatial)
+
+    def _spatial(self, cell: str, bucket: int) -> List[Dict]:
+        """In-process LRU, then Redis, then PostGIS for the cell's center"""
+        key = self._key(cell, bucket)
+        found, shops = self.local.get(key)
+        if found:
+            return shops
+
+        shops = self._read(key)
+        if shops is None:
+            from src.services.GISService import GeoService
+            center_lat, center_lon = geohash.decode(cell)
+            shops = GeoService.query_shops_by_drive_time(center_lat, center_lon, bucket)
+            self._write(key, shops, self._config('NEARBY_CACHE_TTL', 600))
+
+        self.local.set(key, shops, self._config('NEARBY_LOCAL_TTL', 30))
+        return shops
+
+    def _read(self, key: str) -> Optional[List[Dict]]:
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(key)
+            return json.loads(raw) if raw is not None else None
+        except Exception as e:
+            logger.warning(f"Nearby cache read failed: {e}")
+            return None
+
+    def _write(self, key: str, value, ttl: int) -> None:
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(key, json.dumps(value, default=_json_default), ex=ttl)
+        except Exception as e:
+            logger.warning(f"Nearby cache write failed: {e}")
+
+    def overlay(self, shops: List[Dict]) -> List[Dict]:
+        """Merge live queue state from the listener replica, else the short-lived cache and Firestore"""
+        if not shops:
+            return []
+        shop_ids = [shop['id'] for shop in shops]
+        from src.services.firebase.replica import shop_replica
+        if shop_replica.ready:
+            live = shop_replica.live_fields(shop_ids)
+            return [{**shop, **live[shop['id']]} for shop in shops]
+
+        live: Dict[int, Dict] = {}
+        if self.redis is not None:
+            try:
+                for shop_id, raw in zip(shop_ids, self.redis.mget([self._live_key(shop_id) for shop_id in shop_ids])):
+                    if raw is not None:
+                        live[shop_id] = json.loads(raw)
+            except Exception as e:
+                logger.warning(f"Live shop cache read failed: {e}")
+
+        missing = [shop_id for shop_id in shop_ids if shop_id not in live]
+        if missing:
+            from src.services.firebase.updates import FirebaseUpdates
+            fetched = FirebaseUpdates.live_fields(missing)
+            live.update(fetched)
+            self._write_live(fetched)
+
+        return [{**shop, **live.get(shop['id'], {})} for shop in shops]
+
+    def _write_live(self, fields: Dict[int, Dict]) -> None:
+        if self.redis is None or not fields:
+            return
+        try:
+            ttl = self._config('NEARBY_LIVE_TTL', 15)
+            pipe = self.redis.pipeline(transaction=False)
+            for shop_id, values in fields.items():
+                pipe.set(self._live_key(shop_id), json.dumps(values, default=_json_default), ex=ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Live shop cache write failed: {e}")
+
+    def invalidate(self) -> None:
+        """Forget every cached search after shops are added, moved or removed"""
+        self.local.clear()
+        if self.redis is None:
+            return
+        try:
+            keys = list(self.redis.scan_iter(match=f"{self.prefix}nearby:*", count=1000))
+            if keys:
+                self.redis.delete(*keys)
+        except Exception as e:
+            logger.error(f"Nearby cache invalidation failed: {e}")
+
+
+# Create singleton instance
+nearby_cache = NearbyCache(queue_service)
@@ -0,0 +1,347 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from src.database.db import db
+from src.models.availability import Availability, AvailabilityException
+from src.services.tasks import queue_service
+from zoneinfo import ZoneInfo
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOT_MINUTES = 30
+VERSION_FIELD = 'version'
+
+# Only store freshly expanded days if no rule change bumped the version meanwhile
+STORE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'version') or '0'
+if current ~= ARGV[1] then
+    return 0
+end
+for i = 3, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# (window start, window end, slot length in minutes)
+Window = Tuple[datetime, datetime, int]
+# (start time, end time, slot length in minutes)
+Rule = Tuple[time, time, int]
+# (start time or None, end time or None, slot length or None, is_available)
+Override = Tuple[Optional[time], Optional[time], Optional[int], bool]
+
+
+def local_now() -> datetime:
+    """Current wall-clock time in the shops' zone, naive like the Availability rules"""
+    zone = current_app.config.get('TIMEZONE', 'UTC') if has_app_context() else 'UTC'
+    return datetime.now(ZoneInfo(zone)).replace(tzinfo=None)
+
+
+def date_range(start_day: date, end_day: date) -> List[date]:
+    """Every day from start_day to end_day inclusive"""
+    return [start_day + timedelta(days=offset) for offset in range((end_day - start_day).days + 1)]
+
+
+def subtract(windows: List[Window], start: datetime, end: datetime) -> List[Window]:
+    """Remove [start, end) from every window, splitting where needed"""
+    remaining = []
+    for window_start, window_end, slot_minutes in windows:
+        if end <= window_start or start >= window_end:
+            remaining.append((window_start, window_end, slot_minutes))
+            continue
+        if window_start < start:
+            remaining.append((window_start, start, slot_minutes))
+        if end < window_end:
+            remaining.append((end, window_end, slot_minutes))
+    return remaining
+
+
+def expand_day(day: date, weekly_rules: Dict[int, List[Rule]], overrides: List[Override]) -> List[Window]:
+    """Concrete open intervals for one day: weekly rules plus extra hours minus time off"""
+    windows = [
+        (datetime.combine(day, start), datetime.combine(day, end), slot_minutes or DEFAULT_SLOT_MINUTES)
+        for start, end, slot_minutes in weekly_rules.get(day.weekday(), [])
+    ]
+
+    for start, end, slot_minutes, is_available in overrides:
+        if is_available and start and end:
+            windows.append((
+                datetime.combine(day, start),
+                datetime.combine(day, end),
+                slot_minutes or DEFAULT_SLOT_MINUTES
+            ))
+
+    for start, end, _, is_available in overrides:
+        if is_available:
+            continue
+        if start is None or end is None:
+            return []
+        windows = subtract(windows, datetime.combine(day, start), datetime.combine(day, end))
+
+    return sorted(windows)
+
+
+def expand(weekly_rules: Dict[int, List[Rule]], overrides: Dict[date, List[Override]],
+           start_day: date, end_day: date) -> Dict[date, List[Window]]:
+    """Expand one barber's recurring schedule into open intervals for a date window"""
+    return {
+        day: expand_day(day, weekly_rules, overrides.get(day, []))
+        for day in date_range(start_day, end_day)
+    }
+
+
+def load_rules(barber_ids: List[int]) -> Dict[int, Dict[int, List[Rule]]]:
+    """Weekly Availability rules grouped by barber and weekday in one query"""
+    rows = db.session.query(
+        Availability.barber_id,
+        Availability.day_of_week,
+        Availability.start_time,
+        Availability.end_time,
+        Availability.slot_minutes
+    ).filter(
+        Availability.barber_id.in_(barber_ids),
+        Availability.is_available.is_(True)
+    ).all()
+
+    rules: Dict[int, Dict[int, List[Rule]]] = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        rules[row.barber_id][row.day_of_week].append(
+            (row.start_time, row.end_time, row.slot_minutes or DEFAULT_SLOT_MINUTES)
+        )
+    return rules
+
+
+def load_overrides(barber_ids: List[int], start_day: date, end_day: date) -> Dict[int, Dict[date, List[Override]]]:
+    """Per-date exceptions grouped by barber and date in one query"""
+    rows = db.session.query(
+        AvailabilityException.barber_id,
+        AvailabilityException.date,
+        AvailabilityException.start_time,
+        AvailabilityException.end_time,
+        AvailabilityException.slot_minutes,
+        AvailabilityException.is_available
+    ).filter(
+        AvailabilityException.barber_id.in_(barber_ids),
+        AvailabilityException.date >= start_day,
+        AvailabilityException.date <= end_day
+    ).all()
+
+    overrides: Dict[int, Dict[date, List[Override]]] = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        overrides[row.barber_id][row.date].append(
+            (row.start_time, row.end_time, row.slot_minutes, bool(row.is_available))
+        )
+    return overrides
+
+
+class ScheduleStore:
+    """Precomputed open intervals per barber-day, kept in Redis and invalidated per rule"""
+
+    def __init__(self, queue_service):
+        self.queue_service = queue_service
+        self._store_script = None
+
+    @property
+    def redis(self):
+        return self.queue_service.redis_client
+
+    def _key(self, barber_id: int) -> str:
+        return f"{self.queue_service.config.get('QUEUE_PREFIX', 'barbershop:')}schedule:{barber_id}"
+
+    @property
+    def ttl(self) -> int:
+        return current_app.config.get('SCHEDULE_CACHE_TTL', 86400)
+
+    def windows(self, barber_ids: Iterable[int], start_day: date, end_day: date) -> Dict[int, Dict[date, List[Window]]]:
+        """Open intervals per barber-day, expanding only what is not precomputed"""
+        barber_ids = list(barber_ids)
+        days = date_range(start_day, end_day)
+        result: Dict[int, Dict[date, List[Window]]] = {barber_id: {} for barber_id in barber_ids}
+        versions: Dict[int, str] = {}
+        missing: Set[int] = set(barber_ids)
+
+        if self.redis is not None and barber_ids:
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                fields = [VERSION_FIELD] + [day.isoformat() for day in days]
+                for barber_id in barber_ids:
+                    pipe.hmget(self._key(barber_id), fields)
+                for barber_id, (version, *values) in zip(barber_ids, pipe.execute()):
+                    versions[barber_id] = self._text(version) or '0'
+                    if all(value is not None for value in values):
+                        result[barber_id] = {
+                            day: self._decode(day, value) for day, value in zip(days, values)
+                        }
+                        missing.discard(barber_id)
+            except Exception as e:
+                logger.warning(f"Schedule cache read failed: {e}")
+
+        if missing:
+            computed = self.compute(sorted(missing), start_day, end_day)
+            result.update(computed)
+            self._store(computed, versions)
+        return result
+
+    def compute(self, barber_ids: List[int], start_day: date, end_day: date) -> Dict[int, Dict[date, List[Window]]]:
+        """Expand rules and exceptions for several barbers with two queries"""
+        rules = load_rules(barber_ids)
+        overrides = load_overrides(barber_ids, start_day, end_day)
+        return {
+            barber_id: expand(rules.get(barber_id, {}), overrides.get(barber_id, {}), start_day, end_day)
+            for barber_id in barber_ids
+        }
+
+    def precompute(self, barber_ids: Iterable[int], horizon_days: int = 28) -> None:
+        """Materialize the coming weeks so slot queries never re-derive schedules"""
+        barber_ids = list(barber_ids)
+        today = local_now().date()
+        versions = self._versions(barber_ids)
+        self._store(self.compute(barber_ids, today, today + timedelta(days=horizon_days - 1)), versions)
+
+    def _versions(self, barber_ids: List[int]) -> Dict[int, str]:
+        if self.redis is None:
+            return {}
+        pipe = self.redis.pipeline(transaction=False)
+        for barber_id in barber_ids:
+            pipe.hget(self._key(barber_id), VERSION_FIELD)
+        return {
+            barber_id: self._text(version) or '0'
+            for barber_id, version in zip(barber_ids, pipe.execute())
+        }
+
+    def _store(self, computed: Dict[int, Dict[date, List[Window]]], versions: Dict[int, str]) -> None:
+        if self.redis is None or not computed:
+            return
+        try:
+            if self._store_script is None:
+                self._store_script = self.redis.register_script(STORE_SCRIPT)
+            pipe = self.redis.pipeline(transaction=False)
+            for barber_id, days in computed.items():
+                if barber_id not in versions or not days:
+                    continue
+                fields = []
+                for day, windows in days.items():
+                    fields.extend([day.isoformat(), self._encode(windows)])
+                self._store_script(
+                    keys=[self._key(barber_id)],
+                    args=[versions[barber_id], self.ttl, *fields],
+                    client=pipe
+                )
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Schedule cache write failed: {e}")
+
+    @staticmethod
+    def _text(value) -> Optional[str]:
+        return value.decode() if isinstance(value, bytes) else value
+
+    @staticmethod
+    def _encode(windows: List[Window]) -> str:
+        return json.dumps([
+            [start.strftime('%H:%M'), end.strftime('%H:%M'), slot_minutes]
+            for start, end, slot_minutes in windows
+        ])
+
+    @staticmethod
+    def _decode(day: date, value) -> List[Window]:
+        return [
+            (
+                datetime.combine(day, time.fromisoformat(start)),
+                datetime.combine(day, time.fromisoformat(end)),
+                slot_minutes
+            )
+            for start, end, slot_minutes in json.loads(value)
+        ]
+
+    def invalidate_weekday(self, barber_id: int, day_of_week: int) -> None:
+        """Drop precomputed days affected by a weekly rule change"""
+        if self.redis is None:
+            return
+        try:
+            stale = [
+                field for field in map(self._text, self.redis.hkeys(self._key(barber_id)))
+                if field != VERSION_FIELD and date.fromisoformat(field).weekday() == day_of_week
+            ]
+            pipe = self.redis.pipeline()
+            pipe.hincrby(self._key(barber_id), VERSION_FIELD, 1)
+            pipe.expire(self._key(barber_id), self.ttl)
+            if stale:
+                pipe.hdel(self._key(barber_id), *stale)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Schedule cache invalidation failed: {e}")
+
+    def invalidate_date(self, barber_id: int, day: date) -> None:
+        """Drop the precomputed day touched by an exception change"""
+        if self.redis is None:
+            return
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hincrby(self._key(barber_id), VERSION_FIELD, 1)
+            pipe.expire(self._key(barber_id), self.ttl)
+            pipe.hdel(self._key(barber_id), day.isoformat())
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Schedule cache invalidation failed: {e}")
+
+
+# Create singleton instance
+schedule_store = ScheduleStore(queue_service)
+
+
+def _pending(session) -> Set[Tuple[str, int, object]]:
+    return session.info.setdefault('schedule_changes', set())
+
+
+def _record_rule_change(mapper, connection, target):
+    """Remember which barber weekdays a rule change touches, including the ones it moved away from"""
+    state = inspect(target)
+    if state.session is None:
+        return
+    days = {target.day_of_week, *(state.attrs.day_of_week.history.deleted or ())}
+    barber_ids = {target.barber_id, *(state.attrs.barber_id.history.deleted or ())}
+    for barber_id in barber_ids - {None}:
+        for day_of_week in days - {None}:
+            _pending(state.session).add(('weekday', barber_id, day_of_week))
+
+
+def _record_exception_change(mapper, connection, target):
+    """Remember which barber-dates an exception change touches, including the ones it moved away from"""
+    state = inspect(target)
+    if state.session is None:
+        return
+    days = {target.date, *(state.attrs.date.history.deleted or ())}
+    barber_ids = {target.barber_id, *(state.attrs.barber_id.history.deleted or ())}
+    for barber_id in barber_ids - {None}:
+        for day in days - {None}:
+            _pending(state.session).add(('date', barber_id, day))
+
+
+def _apply_changes(session):
+    """Invalidate precomputed schedules and cached slots once the change is committed"""
+    from src.services.availability_cache import availability_cache
+
+    for kind, barber_id, value in session.info.pop('schedule_changes', set()):
+        if kind == 'weekday':
+            schedule_store.invalidate_weekday(barber_id, value)
+            availability_cache.invalidate_weekday(barber_id, value)
+        else:
+            schedule_store.invalidate_date(barber_id, value)
+            availability_cache.invalidate(barber_id, value)
+
+
+def _discard_changes(session):
+    session.info.pop('schedule_changes', None)
+
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Availability, _event, _record_rule_change)
+    event.listen(AvailabilityException, _event, _record_exception_change)
+event.listen(Session, 'after_commit', _apply_changes)
+event.listen(Session, 'after_rollback', _discard_changes)
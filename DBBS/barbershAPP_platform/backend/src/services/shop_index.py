@@ -0,0 +1,204 @@
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import func
+from src.database.db import db
+from src.models.barbershop import Barbershop
+from src.services.distance import EARTH_RADIUS_METERS, geodesic
+from src.services.tasks import queue_service
+import logging
+import math
+import numpy as np
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CELL_DEGREES = 0.1  # ~11 km of latitude per grid cell
+
+
+class Neighbor(NamedTuple):
+    shop_id: int
+    name: str
+    distance_meters: float
+
+
+def _cell(lat: float, lon: float) -> Tuple[int, int]:
+    return math.floor(lat / CELL_DEGREES), math.floor(lon / CELL_DEGREES)
+
+
+class ShopSnapshot:
+    """Immutable arrays of shop coordinates bucketed on a lat/lon grid"""
+
+    def __init__(self, ids: List[int], names: List[str], lats: List[float], lons: List[float]):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.names = names
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for position, (lat, lon) in enumerate(zip(lats, lons)):
+            buckets[_cell(lat, lon)].append(position)
+        self.cells = {cell: np.asarray(positions, dtype=np.int64) for cell, positions in buckets.items()}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _candidates(self, lat: float, lon: float, rings_lat: int, rings_lon: int) -> np.ndarray:
+        row, col = _cell(lat, lon)
+        found = [
+            self.cells[(r, c)]
+            for r in range(row - rings_lat, row + rings_lat + 1)
+            for c in range(col - rings_lon, col + rings_lon + 1)
+            if (r, c) in self.cells
+        ]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def _rings(self, lat: float, radius_meters: float) -> Tuple[int, int]:
+        """Grid cells to scan on each side so the bounding box covers the radius"""
+        # 1% margin: a degree of latitude on the ellipsoid is up to 0.6% shorter than on the sphere
+        lat_span = math.degrees(radius_meters * 1.01 / EARTH_RADIUS_METERS)
+        shrink = max(math.cos(math.radians(min(abs(lat) + lat_span, 89.9))), 1e-6)
+        return math.ceil(lat_span / CELL_DEGREES), math.ceil(lat_span / shrink / CELL_DEGREES)
+
+    def _neighbors(self, positions: np.ndarray, distances: np.ndarray) -> List[Neighbor]:
+        order = np.argsort(distances, kind='stable')
+        return [
+            Neighbor(int(self.ids[positions[i]]), self.names[positions[i]], float(distances[i]))
+            for i in order
+        ]
+
+    def within(self, lat: float, lon: float, radius_meters: float) -> List[Neighbor]:
+        """Shops inside the radius, nearest first"""
+        rings_lat, rings_lon = self._rings(lat, radius_meters)
+        if (2 * rings_lat + 1) * (2 * rings_lon + 1) > len(self.cells):
+            positions = np.arange(len(self.ids))
+        else:
+            positions = self._candidates(lat, lon, rings_lat, rings_lon)
+        distances = geodesic(lat, lon, self.lats[positions], self.lons[positions])
+        inside = distances <= radius_meters
+        return self._neighbors(positions[inside], distances[inside])
+
+    def nearest(self, lat: float, lon: float, k: int, max_radius_meters: Optional[float] = None) -> List[Neighbor]:
+        """k closest shops, widening the search ring until the k-th is provably found"""
+        if not len(self.ids) or k <= 0:
+            return []
+        radius = CELL_DEGREES * 111000.0
+        while True:
+            found = self.within(lat, lon, radius if max_radius_meters is None else min(radius, max_radius_meters))
+            exhausted = max_radius_meters is not None and radius >= max_radius_meters
+            if len(found) >= k or exhausted or radius > math.pi * EARTH_RADIUS_METERS:
+                return found[:k]
+            radius *= 2
+
+
+class ShopIndex:
+    """Per-process spatial index of shop locations, reloaded off the request path by a background thread"""
+
+    def __init__(self):
+        self.ttl = 300
+        self.poll_interval = 5
+        self._app = None
+        self._snapshot: Optional[ShopSnapshot] = None
+        self._loaded_at = 0.0
+        self._version: Optional[bytes] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+    def init_app(self, app) -> None:
+        self._app = app
+        self.ttl = app.config.get('SHOP_INDEX_TTL', 300)
+        self.poll_interval = app.config.get('SHOP_INDEX_POLL_INTERVAL', 5)
+
+    def snapshot(self) -> ShopSnapshot:
+        """Current snapshot; only a worker's very first load runs on the request path"""
+        if self._snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self.refresh()
+        self._ensure_started()
+        return self._snapshot
+
+    def invalidate(self) -> None:
+        """Shops were written: every worker reloads on its next poll, this one right away"""
+        redis = queue_service.redis_client
+        if redis is not None:
+            try:
+                redis.incr(self._version_key())
+            except Exception as e:
+                logger.warning(f"Shop index version bump failed: {e}")
+        self._wake.set()
+
+    def _version_key(self) -> str:
+        return f"{queue_service.config.get('QUEUE_PREFIX', 'barbershop:')}shop_index:version"
+
+    def _shared_version(self) -> Optional[bytes]:
+        redis = queue_service.redis_client
+        if redis is None:
+            return None
+        try:
+            return redis.get(self._version_key())
+        except Exception as e:
+            logger.warning(f"Shop index version read failed: {e}")
+            return self._version
+
+    def _ensure_started(self) -> None:
+        # Threads do not survive a fork, so each gunicorn worker starts its own refresher
+        if self._app is None or self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._refresher, name='shop-index-refresher', daemon=True).start()
+
+    def _refresher(self) -> None:
+        while not self._stopped.is_set():
+            woken = self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            self._reload_if_due(woken)
+
+    def _reload_if_due(self, woken: bool = False) -> bool:
+        """Reload when woken by a local write, a writer bumped the shared version, or SHOP_INDEX_TTL passed"""
+        due = time.monotonic() - self._loaded_at >= self.ttl
+        if not (woken or due or self._shared_version() != self._version):
+            return False
+        try:
+            with self._app.app_context(), self._lock:
+                self.refresh()
+            return True
+        except Exception as e:
+            logger.error(f"Shop index refresh failed, serving previous snapshot: {e}")
+            return False
+
+    def refresh(self) -> None:
+        """Reload every shop coordinate in one query and swap the snapshot"""
+        # Read the version first, so a write landing during the query is picked up on the next poll
+        version = self._shared_version()
+        rows = db.session.query(
+            Barbershop.id,
+            Barbershop.name,
+            func.ST_Y(Barbershop.location).label('lat'),
+            func.ST_X(Barbershop.location).label('lon')
+        ).all()
+        self._snapshot = ShopSnapshot(
+            [row.id for row in rows],
+            [row.name for row in rows],
+            [row.lat for row in rows],
+            [row.lon for row in rows]
+        )
+        self._loaded_at = time.monotonic()
+        self._version = version
+        logger.info(f"Shop index loaded {len(rows)} shops")
+
+    def within(self, lat: float, lon: float, radius_meters: float) -> List[Neighbor]:
+        return self.snapshot().within(lat, lon, radius_meters)
+
+    def nearest(self, lat: float, lon: float, k: int, max_radius_meters: Optional[float] = None) -> List[Neighbor]:
+        return self.snapshot().nearest(lat, lon, k, max_radius_meters)
+
+
+# Create singleton instance
+shop_index = ShopIndex()
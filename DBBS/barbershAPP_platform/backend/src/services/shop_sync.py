@@ -0,0 +1,148 @@
+from itertools import islice
+from typing import Any, Dict, Iterable, List
+from sqlalchemy import text
+from src.database.db import db
+import csv
+import hashlib
+import io
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+HASHED_FIELDS = ('name', 'address', 'phone', 'lon', 'lat')
+STAGING_COLUMNS = ('external_id', 'name', 'address', 'phone', 'lon', 'lat', 'source_hash')
+
+# No key on external_id: a feed may repeat an id, and the merge keeps the last copy (highest seq)
+CREATE_STAGING_SQL = text("""
+    CREATE TEMP TABLE shop_staging (
+        seq BIGSERIAL,
+        external_id VARCHAR(64) NOT NULL,
+        name VARCHAR(255),
+        address VARCHAR(255),
+        phone VARCHAR(20),
+        lon DOUBLE PRECISION,
+        lat DOUBLE PRECISION,
+        source_hash VARCHAR(64)
+    ) ON COMMIT DROP
+""")
+
+# Rows whose hash matches are skipped by the WHERE, so they are neither rewritten nor returned
+MERGE_SQL = text("""
+    WITH latest AS (
+        SELECT DISTINCT ON (external_id) *
+        FROM shop_staging
+        ORDER BY external_id, seq DESC
+    ), merged AS (
+        INSERT INTO barbershops (external_id, name, address, phone, location, source_hash, created_at)
+        SELECT external_id, name, address, phone,
+               ST_SetSRID(ST_MakePoint(lon, lat), 4326), source_hash, now()
+        FROM latest
+        ON CONFLICT (external_id) DO UPDATE
+            SET name = EXCLUDED.name,
+                address = EXCLUDED.address,
+                phone = EXCLUDED.phone,
+                location = EXCLUDED.location,
+                source_hash = EXCLUDED.source_hash
+            WHERE barbershops.source_hash IS DISTINCT FROM EXCLUDED.source_hash
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT (SELECT count(*) FROM latest) AS staged,
+           count(*) FILTER (WHERE inserted) AS inserted,
+           count(*) FILTER (WHERE NOT inserted) AS updated
+    FROM merged
+""")
+
+# Externally sourced shops that the full feed no longer lists. A shop that staff have claimed is
+# kept: deleting it would violate the barbers FK, or cascade away their appointments and queues
+PRUNE_SQL = text("""
+    DELETE FROM barbershops b
+    WHERE b.external_id IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM shop_staging s WHERE s.external_id = b.external_id)
+      AND NOT EXISTS (SELECT 1 FROM barbers br WHERE br.barbershop_id = b.id)
+      AND NOT EXISTS (SELECT 1 FROM queues q WHERE q.barbershop_id = b.id)
+""")
+
+
+def record_hash(record: Dict[str, Any]) -> str:
+    """Stable content hash of the fields we store for an external shop"""
+    canonical = {
+        field: round(record[field], 7) if field in ('lon', 'lat') else (record.get(field) or '')
+        for field in HASHED_FIELDS
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+class ShopSyncEngine:
+    """Bulk upsert of external barbershop records that only touches rows whose content changed"""
+
+    def __init__(self, batch_size: int = 5000):
+        self.batch_size = batch_size
+        self.counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    def sync(self, records: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Stage each batch with COPY, merge it with one statement, commit; returns running counts"""
+        iterator = iter(records)
+        while True:
+            batch = list(islice(iterator, self.batch_size))
+            if not batch:
+                return dict(self.counts)
+            self.merge(batch)
+
+    def merge(self, batch: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Stage and merge one batch in its own transaction"""
+        return self._transaction([batch], prune=False)
+
+    def load(self, records: Iterable[Dict[str, Any]], prune: bool = False) -> Dict[str, int]:
+        """Stage the whole feed, then merge (and optionally prune) in a single transaction"""
+        # Readers keep seeing the previous rows until the commit, so a reload never exposes a half-filled table
+        iterator = iter(records)
+        batches = iter(lambda: list(islice(iterator, self.batch_size)), [])
+        return self._transaction(batches, prune=prune)
+
+    def _transaction(self, batches: Iterable[List[Dict[str, Any]]], prune: bool) -> Dict[str, int]:
+        try:
+            db.session.execute(CREATE_STAGING_SQL)
+            for batch in batches:
+                self._copy(batch)
+            row = db.session.execute(MERGE_SQL).first()
+            deleted = db.session.execute(PRUNE_SQL).rowcount if prune else 0
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        counts = {
+            'inserted': row.inserted,
+            'updated': row.updated,
+            'unchanged': row.staged - row.inserted - row.updated
+        }
+        if prune:
+            counts['deleted'] = deleted
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+        return counts
+
+    def _copy(self, records: List[Dict[str, Any]]) -> None:
+        """Stream a batch into the staging table through the driver's COPY"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for record in records:
+            writer.writerow([
+                str(record['external_id']),
+                record['name'],
+                record.get('address') or '',
+                record.get('phone') or '',
+                record['lon'],
+                record['lat'],
+                record_hash(record)
+            ])
+        buffer.seek(0)
+        cursor = db.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY shop_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
@@ -0,0 +1,189 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.database.db import db
+from src.models.appointment import Appointment
+from src.models.barber import Barber
+from src.services.holds import slot_holds
+from src.services.schedule import DEFAULT_SLOT_MINUTES, date_range, local_now, schedule_store
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Appointments in these states no longer occupy a slot
+INACTIVE_STATUSES = ('cancelled', 'canceled')
+
+# (window start, window end, slot length in minutes)
+Window = Tuple[datetime, datetime, int]
+
+
+@dataclass
+class SlotIndex:
+    """Bitmap of a barber's bookable slots for a single day"""
+    barber_id: int
+    day: date
+    starts: List[datetime] = field(default_factory=list)
+    ends: List[datetime] = field(default_factory=list)
+    booked: int = 0
+
+    @classmethod
+    def from_windows(cls, barber_id: int, day: date, windows: Iterable[Window],
+                     bookings: Iterable[Tuple[datetime, Optional[datetime]]] = ()) -> 'SlotIndex':
+        """Build the slot grid from working windows and mark existing bookings"""
+        index = cls(barber_id=barber_id, day=day)
+        for window_start, window_end, slot_minutes in sorted(windows):
+            step = timedelta(minutes=slot_minutes or DEFAULT_SLOT_MINUTES)
+            current = window_start
+            while current + step <= window_end:
+                # Overlapping windows must not produce overlapping slots
+                if not index.ends or current >= index.ends[-1]:
+                    index.starts.append(current)
+                    index.ends.append(current + step)
+                current += step
+
+        for start, end in bookings:
+            index.mark_booked(start, end)
+        return index
+
+    def slot_for(self, moment: datetime) -> Optional[int]:
+        """Position of the slot containing moment, if any"""
+        position = bisect_right(self.starts, moment) - 1
+        if position >= 0 and moment < self.ends[position]:
+            return position
+        return None
+
+    def mark_booked(self, start: datetime, end: Optional[datetime] = None) -> None:
+        """Flag the slot containing start and every slot overlapping [start, end)"""
+        position = self.slot_for(start)
+        if position is None:
+            position = bisect_right(self.starts, start)
+        else:
+            self.booked |= 1 << position
+            position += 1
+
+        if end is None:
+            return
+        while position < len(self.starts) and self.starts[position] < end:
+            self.booked |= 1 << position
+            position += 1
+
+    def is_free(self, moment: datetime) -> bool:
+        """Check whether a slot starts at moment and is still open"""
+        position = self.slot_for(moment)
+        return (
+            position is not None
+            and self.starts[position] == moment
+            and not (self.booked >> position) & 1
+        )
+
+    def free_slots(self) -> List[datetime]:
+        """Start times of all open slots in chronological order"""
+        return [
+            start for position, start in enumerate(self.starts)
+            if not (self.booked >> position) & 1
+        ]
+
+
+def day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """Half-open datetime range covering a whole day"""
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+def resolve_barbers(barber_ids: Optional[Iterable[int]] = None, shop_id: Optional[int] = None) -> List[int]:
+    """Barber ids for an explicit list or for every barber of a shop"""
+    if shop_id is not None:
+        return [row.id for row in db.session.query(Barber.id).filter(Barber.barbershop_id == shop_id)]
+    return list(barber_ids or [])
+
+
+def load_bookings(scope, start: datetime, end: datetime) -> Dict[int, List[Tuple[datetime, Optional[datetime]]]]:
+    """Active appointments starting in [start, end) grouped by barber with one range query"""
+    rows = db.session.query(
+        Appointment.barber_id,
+        Appointment.appointment_datetime,
+        Appointment.duration_minutes
+    ).filter(
+        scope,
+        Appointment.appointment_datetime >= start,
+        Appointment.appointment_datetime < end,
+        Appointment.status.notin_(INACTIVE_STATUSES)
+    ).all()
+
+    bookings: Dict[int, List[Tuple[datetime, Optional[datetime]]]] = defaultdict(list)
+    for row in rows:
+        bookings[row.barber_id].append((
+            row.appointment_datetime,
+            row.appointment_datetime + timedelta(minutes=row.duration_minutes or DEFAULT_SLOT_MINUTES)
+        ))
+    return bookings
+
+
+def build_slot_indexes(start_day: date, end_day: date,
+                       barber_ids: Optional[Iterable[int]] = None,
+                       shop_id: Optional[int] = None) -> Dict[int, Dict[date, SlotIndex]]:
+    """Slot indexes for many barbers over a date range with a fixed number of queries"""
+    schedules = schedule_store.windows(resolve_barbers(barber_ids, shop_id), start_day, end_day)
+    working = [
+        barber_id for barber_id, days in schedules.items()
+        if any(days.values())
+    ]
+    if not working:
+        return {}
+
+    range_start, _ = day_bounds(start_day)
+    _, range_end = day_bounds(end_day)
+    bookings = load_bookings(Appointment.barber_id.in_(working), range_start, range_end)
+
+    indexes: Dict[int, Dict[date, SlotIndex]] = {}
+    for barber_id in working:
+        barber_bookings = sorted(bookings.get(barber_id, []), key=lambda booking: booking[0])
+        booking_starts = [booking[0] for booking in barber_bookings]
+        indexes[barber_id] = {}
+        for day in date_range(start_day, end_day):
+            day_start, day_end = day_bounds(day)
+            indexes[barber_id][day] = SlotIndex.from_windows(
+                barber_id,
+                day,
+                schedules[barber_id].get(day, []),
+                barber_bookings[bisect_left(booking_starts, day_start):bisect_left(booking_starts, day_end)]
+            )
+    return indexes
+
+
+def build_slot_index(barber_id: int, day: date) -> SlotIndex:
+    """Load a barber-day's schedule and bookings once and index them"""
+    indexes = build_slot_indexes(day, day, barber_ids=[barber_id])
+    return indexes.get(barber_id, {}).get(day) or SlotIndex(barber_id=barber_id, day=day)
+
+
+def nearest_free_slots(barber_id: int, moment: datetime, limit: int = 3,
+                       horizon_days: int = 7, now: Optional[datetime] = None) -> List[datetime]:
+    """Open slots closest to a requested time, never in the past"""
+    now = now or local_now()
+    start_day = max(moment.date() - timedelta(days=1), now.date())
+    indexes = build_slot_indexes(start_day, moment.date() + timedelta(days=horizon_days), barber_ids=[barber_id])
+    days = indexes.get(barber_id, {})
+    # Slots another client is checking out are not alternatives either
+    free, _ = slot_holds.split_held({
+        barber_id: {day: [slot.strftime('%H:%M') for slot in index.free_slots()] for day, index in days.items()}
+    })
+    candidates = [
+        start
+        for day, slots in free.get(barber_id, {}).items()
+        for start in (datetime.combine(day, datetime.strptime(slot, '%H:%M').time()) for slot in slots)
+        if start >= now
+    ]
+    return sorted(candidates, key=lambda slot: (abs(slot - moment), slot))[:limit]
+
+
+def is_slot_conflict(error: Exception) -> bool:
+    """True when an IntegrityError came from the appointments_no_overlap constraint"""
+    return getattr(getattr(error, 'orig', None), 'pgcode', None) == '23P01'
+
+
+def alternative_slots(barber_id: int, requested: datetime) -> List[str]:
+    """Nearest open slots to offer when the requested one is taken"""
+    return [slot.isoformat() for slot in nearest_free_slots(barber_id, requested)]
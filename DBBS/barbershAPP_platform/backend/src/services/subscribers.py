@@ -1,23 +1,132 @@
 from firebase_admin import firestore #type: ignore
-from typing import List, Dict
+from flask import current_app
+from typing import Dict, Iterable, List, Optional
+from src.services.firebase.batch import get_documents
+from src.services.tasks import queue_service
+import json
+import logging
 
-async def get_barber_subscribers(barber_id: str) -> List[Dict]:
-    """Get all subscribers for a barber"""
+logger = logging.getLogger(__name__)
+
+
+def _cache_key(barber_id: str) -> str:
+    return f"{queue_service.config.get('QUEUE_PREFIX', 'barbershop:')}subscribers:{barber_id}"
+
+
+def _subscription_id(barber_id: str, user_id: str) -> str:
+    return f"{barber_id}_{user_id}"
+
+
+def resolve_subscribers(barber_id: str) -> List[Dict]:
+    """Active subscribers with a push token; tokens come from the subscription when denormalized"""
     db = firestore.client()
-    subscribers_ref = db.collection('subscriptions')\
-                       .where('barber_id', '==', barber_id)\
-                       .where('active', '==', True)
-    
+    subscriptions = [
+        doc.to_dict() for doc in db.collection('subscriptions')
+                                   .where('barber_id', '==', barber_id)
+                                   .where('active', '==', True)
+                                   .stream()
+    ]
+
+    # Only subscriptions written before tokens were denormalized need a users/{id} read
+    missing = [subscription['user_id'] for subscription in subscriptions if not subscription.get('fcm_token')]
+    users = get_documents(db, 'users', missing, ['fcm_token', 'language']) if missing else {}
+
     subscribers = []
-    async for doc in subscribers_ref.stream():
-        subscriber_data = doc.to_dict()
-        user_ref = db.collection('users').document(subscriber_data['user_id'])
-        user_data = (await user_ref.get()).to_dict()
-        
-        subscribers.append({
-            'token': user_data.get('fcm_token'),
-            'language': user_data.get('language', 'en'),
-            'user_id': subscriber_data['user_id']
-        })
-    
-    return subscribers
\ No newline at end of file
+    for subscription in subscriptions:
+        source = subscription if subscription.get('fcm_token') else users.get(subscription['user_id'], {})
+        if source.get('fcm_token'):
+            subscribers.append({
+                'token': source['fcm_token'],
+                'language': source.get('language', 'en'),
+                'user_id': subscription['user_id']
+            })
+    return subscribers
+
+
+async def get_barber_subscribers(barber_id: str) -> List[Dict]:
+    """Get all subscribers for a barber, cached until someone subscribes or unsubscribes"""
+    redis = queue_service.redis_client
+    if redis is not None:
+        try:
+            cached = redis.get(_cache_key(barber_id))
+            if cached is not None:
+                return json.loads(cached)
+        except Exception as e:
+            logger.warning(f"Subscriber cache read failed: {e}")
+
+    subscribers = resolve_subscribers(barber_id)
+    if redis is not None:
+        try:
+            redis.set(_cache_key(barber_id), json.dumps(subscribers),
+                      ex=current_app.config.get('SUBSCRIBER_CACHE_TTL', 3600))
+        except Exception as e:
+            logger.warning(f"Subscriber cache write failed: {e}")
+    return subscribers
+
+
+def invalidate_subscribers(barber_ids: Iterable[str]) -> None:
+    redis = queue_service.redis_client
+    keys = [_cache_key(barber_id) for barber_id in barber_ids]
+    if redis is None or not keys:
+        return
+    try:
+        redis.delete(*keys)
+    except Exception as e:
+        logger.error(f"Subscriber cache invalidation failed: {e}")
+
+
+def subscribe(barber_id: str, user_id: str) -> None:
+    """Follow a barber; the user's token and language are copied onto the subscription"""
+    db = firestore.client()
+    user = db.collection('users').document(user_id).get()
+    user_data = (user.to_dict() if user.exists else None) or {}
+    db.collection('subscriptions').document(_subscription_id(barber_id, user_id)).set({
+        'barber_id': barber_id,
+        'user_id': user_id,
+        'active': True,
+        'fcm_token': user_data.get('fcm_token'),
+        'language': user_data.get('language', 'en'),
+        'created_at': firestore.SERVER_TIMESTAMP
+    }, merge=True)
+    invalidate_subscribers([barber_id])
+
+
+def unsubscribe(barber_id: str, user_id: str) -> None:
+    db = firestore.client()
+    db.collection('subscriptions').document(_subscription_id(barber_id, user_id)).set(
+        {'active': False}, merge=True
+    )
+    invalidate_subscribers([barber_id])
+
+
+def _update_subscriptions(db, user_id: str, update: Dict) -> None:
+    """Copy changed user fields onto every subscription of that user"""
+    barber_ids = set()
+    batch = db.batch()
+    pending = 0
+    for doc in db.collection('subscriptions').where('user_id', '==', user_id).stream():
+        batch.update(doc.reference, update)
+        barber_ids.add(doc.to_dict().get('barber_id'))
+        pending += 1
+        # Firestore caps a write batch at 500 operations
+        if pending == 500:
+            batch.commit()
+            batch, pending = db.batch(), 0
+    if pending:
+        batch.commit()
+    invalidate_subscribers(filter(None, barber_ids))
+
+
+def refresh_user_token(user_id: str, token: str, language: Optional[str] = None) -> None:
+    """Keep denormalized tokens current after a user registers a new device token"""
+    update = {'fcm_token': token}
+    if language:
+        update['language'] = language
+    _update_subscriptions(firestore.client(), user_id, update)
+
+
+def set_user_language(user_id: str, language: str) -> None:
+    """Change a user's notification language on the profile and every subscription copy"""
+    db = firestore.client()
+    db.collection('users').document(user_id).set({'language': language}, merge=True)
+    _update_subscriptions(db, user_id, {'language': language})
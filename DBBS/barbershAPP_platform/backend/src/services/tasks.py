@@ -102,4 +102,40 @@ def cleanup_old_queues():
                 return True
         except Exception as e:
             current_app.logger.error(f"Error cleaning up queues: {e}")
-            return False
\ No newline at end of file
+            return False
+@celery.task
+def precompute_schedules(horizon_days: int = 28) -> bool:
+        """Expand weekly availability rules for the coming weeks"""
+        try:
+            with current_app.app_context():
+                from src.models.barber import Barber
+                from src.services.schedule import schedule_store
+                barber_ids = [row.id for row in Barber.query.with_entities(Barber.id)]
+                schedule_store.precompute(barber_ids, horizon_days)
+                return True
+        except Exception as e:
+            current_app.logger.error(f"Error precomputing schedules: {e}")
+            return False
+
+@celery.task
+def build_isochrone(cell: str, minutes: int) -> bool:
+        """Build a drive-time polygon that a search found missing"""
+        try:
+            with current_app.app_context():
+                from src.services.isochrones import isochrone_service
+                return isochrone_service.build(cell, minutes) is not None
+        except Exception as e:
+            current_app.logger.error(f"Error building isochrone {cell}/{minutes}: {e}")
+            return False
+
+@celery.task
+def ingest_arcgis_barbershops(full: bool = False) -> bool:
+        """Pull new and edited barbershops from the ArcGIS layer"""
+        try:
+            with current_app.app_context():
+                from src.services.ingestion import ingest_barbershops
+                ingest_barbershops(full=full)
+                return True
+        except Exception as e:
+            current_app.logger.error(f"Error ingesting ArcGIS barbershops: {e}")
+            return False
@@ -1,5 +1,7 @@
 import pytest
 from pathlib import Path
+from types import SimpleNamespace
+import time
 import sys
 import os
 from src.app import create_app
@@ -52,4 +54,182 @@ def db_session(app):
 @pytest.fixture(scope='function')
 def client(app):
     """Create test client"""
-    return app.test_client()
\ No newline at end of file
+    return app.test_client()
+
+class FakeDocumentRef:
+    def __init__(self, store, doc_id):
+        self.store = store
+        self.id = doc_id
+
+    def get(self):
+        return FakeFirestore.snapshot(self.id, self.store.get(self.id))
+
+    def set(self, data, merge=False):
+        self.store[self.id] = {**self.store.get(self.id, {}), **data} if merge else dict(data)
+
+    def update(self, data):
+        self.store[self.id].update(data)
+
+
+class FakeQuery:
+    def __init__(self, store, filters=()):
+        self.store = store
+        self.filters = filters
+
+    def where(self, field, op, value):
+        return FakeQuery(self.store, self.filters + ((field, value),))
+
+    def stream(self):
+        for doc_id, data in list(self.store.items()):
+            if all(data.get(field) == value for field, value in self.filters):
+                yield SimpleNamespace(id=doc_id, reference=FakeDocumentRef(self.store, doc_id),
+                                      to_dict=lambda data=data: dict(data))
+
+    def document(self, doc_id):
+        return FakeDocumentRef(self.store, doc_id)
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def update(self, ref, data):
+        self.writes.append((ref, data))
+
+    def commit(self):
+        self.db.batch_sizes.append(len(self.writes))
+        for ref, data in self.writes:
+            ref.update(data)
+
+
+class FakeFirestore:
+    """In-memory Firestore; get_all answers in reverse order, like an unordered batch read"""
+
+    def __init__(self, collections=None):
+        self.collections = collections or {}
+        self.get_all_calls = []
+        self.batch_sizes = []
+
+    @staticmethod
+    def snapshot(doc_id, data):
+        return SimpleNamespace(id=doc_id, exists=data is not None, to_dict=lambda: data)
+
+    def collection(self, name):
+        return FakeQuery(self.collections.setdefault(name, {}))
+
+    def get_all(self, refs, field_paths=None):
+        self.get_all_calls.append([ref.id for ref in refs])
+        for ref in reversed(refs):
+            yield ref.get()
+
+    def batch(self):
+        return FakeBatch(self)
+
+
+@pytest.fixture
+def firestore_db():
+    """Empty fake Firestore; tests fill firestore_db.collections"""
+    return FakeFirestore()
+
+
+class FakeRedis:
+    """Dict-backed Redis; records reads and deletes, and pipelines run commands directly"""
+
+    def __init__(self):
+        self.values = {}
+        self.reads = []
+        self.deleted = []
+
+    def get(self, key):
+        self.reads.append(key)
+        return self.values.get(key)
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    def delete(self, *keys):
+        self.deleted.extend(keys)
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+
+class FakeSession:
+    """Stands in for db.session or a requests session: every call is recorded and answered by respond"""
+
+    def __init__(self):
+        self.respond = lambda statement, params: None
+        self.calls = []
+        self.timeouts = []
+        self.copied = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def script(self, *outcomes, delay=0.0):
+        """Answer calls with outcomes in order; exceptions are raised"""
+        outcomes = list(outcomes)
+
+        def respond(statement, params):
+            time.sleep(delay)
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        self.respond = respond
+
+    def execute(self, statement, params=None):
+        self.calls.append((statement, params))
+        return self.respond(statement, params)
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append((url, params))
+        self.timeouts.append(timeout)
+        return self.respond(url, params)
+
+    def query(self, *columns):
+        return self
+
+    def filter_by(self, **criteria):
+        return self
+
+    def first(self):
+        return None
+
+    def connection(self):
+        cursor = SimpleNamespace(
+            copy_expert=lambda sql, buffer: self.copied.append(buffer.read().splitlines()),
+            close=lambda: None
+        )
+        return SimpleNamespace(connection=SimpleNamespace(cursor=lambda: cursor))
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def fake_session():
+    return FakeSession()
+
@@ -28,6 +28,8 @@ CREATE TABLE IF NOT EXISTS barbershops (
     address VARCHAR(255) NOT NULL,
     phone VARCHAR(20),
     location GEOMETRY(Point, 4326) NOT NULL,
+    external_id VARCHAR(64) UNIQUE,
+    source_hash VARCHAR(64),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -49,6 +51,7 @@ CREATE TABLE IF NOT EXISTS appointments (
     client_email VARCHAR(255),
     client_phone VARCHAR(20),
     appointment_datetime TIMESTAMP NOT NULL,
+    duration_minutes INTEGER NOT NULL DEFAULT 30,
     status VARCHAR(50) DEFAULT 'scheduled',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -65,16 +68,57 @@ CREATE TABLE IF NOT EXISTS queues (
 CREATE TABLE IF NOT EXISTS availability (
     id SERIAL PRIMARY KEY,
     barber_id INTEGER REFERENCES barbers(id) ON DELETE CASCADE,
-    date DATE NOT NULL,
+    day_of_week INTEGER NOT NULL CHECK (day_of_week BETWEEN 0 AND 6),
     start_time TIME NOT NULL,
     end_time TIME NOT NULL,
+    slot_minutes INTEGER NOT NULL DEFAULT 30,
     is_available BOOLEAN DEFAULT true,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE TABLE IF NOT EXISTS availability_exceptions (
+    id SERIAL PRIMARY KEY,
+    barber_id INTEGER REFERENCES barbers(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    start_time TIME,
+    end_time TIME,
+    slot_minutes INTEGER,
+    is_available BOOLEAN DEFAULT false,
+    reason VARCHAR(255),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Reject overlapping active bookings per barber
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+ALTER TABLE appointments ADD CONSTRAINT appointments_no_overlap EXCLUDE USING gist (
+    barber_id WITH =,
+    tsrange(appointment_datetime, appointment_datetime + duration_minutes * interval '1 minute') WITH &&
+) WHERE (status NOT IN ('cancelled', 'canceled'));
+
+CREATE TABLE IF NOT EXISTS ingestion_state (
+    source VARCHAR(64) PRIMARY KEY,
+    high_water_mark TIMESTAMP,
+    last_run_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_run_count INTEGER DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS isochrones (
+    id SERIAL PRIMARY KEY,
+    cell VARCHAR(12) NOT NULL,
+    minutes INTEGER NOT NULL,
+    polygon GEOMETRY(Geometry, 4326) NOT NULL,
+    network_version VARCHAR(64),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_isochrone_cell_minutes UNIQUE (cell, minutes)
+);
+
 -- Create indexes
 CREATE INDEX idx_barbershop_location ON barbershops USING GIST (location);
+CREATE INDEX idx_barbershop_location_geog ON barbershops USING GIST ((location::geography));
 CREATE INDEX idx_barber_shop ON barbers(barbershop_id);
 CREATE INDEX idx_appointment_datetime ON appointments(appointment_datetime);
+CREATE INDEX idx_appointment_barber_datetime ON appointments(barber_id, appointment_datetime);
+CREATE INDEX idx_appointment_user_datetime ON appointments(user_id, appointment_datetime, id);
 CREATE INDEX idx_queue_shop ON queues(barbershop_id);
-CREATE INDEX idx_availability_date ON availability(date);
\ No newline at end of file
+CREATE INDEX idx_availability_barber_day ON availability(barber_id, day_of_week);
+CREATE INDEX idx_availability_exception_barber_date ON availability_exceptions(barber_id, date);
\ No newline at end of file
@@ -0,0 +1,188 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from sqlalchemy.exc import IntegrityError
+from src.api.routes import appointments as appointments_module
+from src.api.routes import booking as booking_module
+from src.utils import auth_decorator
+
+SLOT = (datetime.now() + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+
+
+class FakeAppointment:
+    """Only the real appointment columns are accepted"""
+    COLUMNS = {'user_id', 'barber_id', 'appointment_datetime', 'duration_minutes', 'status'}
+    barber = None
+
+    def __init__(self, **columns):
+        unknown = set(columns) - self.COLUMNS
+        if unknown:
+            raise TypeError(f"{sorted(unknown)} are not appointment columns")
+        self.id = None
+        self.barber = SimpleNamespace(barbershop=SimpleNamespace(name='Test Barbershop'))
+        self.__dict__.update(columns)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'barber_id': self.barber_id,
+            'appointment_datetime': self.appointment_datetime.isoformat(),
+            'status': self.status
+        }
+
+
+class BookingSession:
+    """Commits rows and raises the exclusion-constraint error for a barber booked twice at one time"""
+
+    def __init__(self):
+        self.rows = {}
+        self.pending = []
+
+    def add(self, row):
+        self.pending.append(row)
+
+    def flush(self):
+        for row in self.pending:
+            row.id = row.id or len(self.rows) + len(self.pending)
+
+    def commit(self):
+        for row in self.pending:
+            if any((other.barber_id, other.appointment_datetime) == (row.barber_id, row.appointment_datetime)
+                   for other in self.rows.values() if other is not row):
+                raise IntegrityError('INSERT INTO appointments', {}, SimpleNamespace(pgcode='23P01'))
+            self.rows[row.id] = row
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+
+
+class FakeHolds:
+    """Redis is unavailable: every claim passes, so only the database guards the slot"""
+
+    def __init__(self):
+        self.claims = []
+
+    def claim(self, barber_id, start, hold_token=None):
+        self.claims.append((barber_id, start, hold_token))
+        return ''
+
+    def release(self, barber_id, start, token):
+        return True
+
+    def release_claim(self, barber_id, start, owner, hold_token=None):
+        pass
+
+
+@pytest.fixture
+def session():
+    return BookingSession()
+
+
+@pytest.fixture
+def holds():
+    return FakeHolds()
+
+
+@pytest.fixture
+def booking_client(monkeypatch, session, holds):
+    monkeypatch.setattr(FakeAppointment, 'query', SimpleNamespace(
+        options=lambda *options: SimpleNamespace(get=session.rows.get)
+    ), raising=False)
+    monkeypatch.setattr(booking_module, 'Appointment', FakeAppointment)
+    monkeypatch.setattr(booking_module, 'joinedload', lambda attribute: None)
+    monkeypatch.setattr(booking_module, 'db', SimpleNamespace(session=session))
+    monkeypatch.setattr(booking_module, 'slot_holds', holds)
+    monkeypatch.setattr(booking_module, 'availability_cache', SimpleNamespace(slot_booked=lambda *args: None))
+    monkeypatch.setattr(booking_module, 'queue_service', SimpleNamespace(
+        send_notification=SimpleNamespace(delay=lambda **kwargs: None)
+    ))
+    monkeypatch.setattr(booking_module, 'alternative_slots',
+                        lambda barber_id, requested: [(requested + timedelta(minutes=30)).isoformat()])
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-key'
+    JWTManager(app)
+    app.register_blueprint(booking_module.booking_bp, url_prefix='/api/v1/booking')
+    with app.app_context():
+        token = create_access_token(identity='7')
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return client
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+@pytest.fixture
+def invalidated():
+    return []
+
+
+@pytest.fixture
+def appointments_client(monkeypatch, session, holds, sent, invalidated):
+    monkeypatch.setattr(auth_decorator.JWTManager, 'verify_token',
+                        staticmethod(lambda token: {'id': 7, 'email': 'client@example.com', 'name': 'Client'}))
+    monkeypatch.setattr(appointments_module, 'Appointment', FakeAppointment)
+    monkeypatch.setattr(appointments_module, 'db', SimpleNamespace(session=session))
+    monkeypatch.setattr(appointments_module, 'slot_holds', holds)
+    monkeypatch.setattr(appointments_module, 'load_appointment', lambda appointment_id, user_id: session.rows.get(appointment_id))
+    monkeypatch.setattr(appointments_module, 'alternative_slots', lambda barber_id, requested: [])
+    monkeypatch.setattr(appointments_module, 'MailService', SimpleNamespace(
+        send_appointment_confirmation=lambda email, appointment_details: sent.append(appointment_details),
+        send_appointment_update=lambda email, appointment_details: sent.append(appointment_details)
+    ))
+    monkeypatch.setattr(appointments_module, 'availability_cache', SimpleNamespace(
+        invalidate=lambda barber_id, moment: invalidated.append((barber_id, moment))
+    ))
+    app = Flask(__name__)
+    app.register_blueprint(appointments_module.appointments_bp, url_prefix='/api/v1/appointments')
+    return app.test_client()
+
+
+def test_appointment_create_claims_the_requested_barber_slot(appointments_client, session, holds):
+    """The row is built from real columns and the claim targets the requested barber and time"""
+    response = appointments_client.post('/api/v1/appointments/appointments', json={
+        'barber_id': 3, 'date': SLOT.isoformat(), 'hold_token': 'abc'
+    }, headers={'Authorization': 'Bearer token'})
+
+    assert response.status_code == 201
+    assert holds.claims == [(3, SLOT, 'abc')]
+    row = next(iter(session.rows.values()))
+    assert (row.user_id, row.barber_id, row.appointment_datetime, row.duration_minutes) == (7, 3, SLOT, 30)
+
+
+def test_booking_same_slot_twice_books_once(booking_client, session):
+    """Two bookings of one barber slot: the first is created, the second gets a 409 with alternatives"""
+    payload = {'barber_id': 3, 'datetime': SLOT.isoformat()}
+    first = booking_client.post('/api/v1/booking/appointments', json=payload)
+    second = booking_client.post('/api/v1/booking/appointments', json=payload)
+
+    assert first.status_code == 201
+    assert second.status_code == 409
+    assert 'already booked' in second.json['error']
+    assert second.json['alternatives'] == [(SLOT + timedelta(minutes=30)).isoformat()]
+    assert [(row.user_id, row.barber_id) for row in session.rows.values()] == [('7', 3)]
+
+
+def test_reschedule_moves_appointment_datetime(appointments_client, session, sent, invalidated):
+    """A new date changes appointment_datetime, invalidates both slots and reaches the email"""
+    appointments_client.post('/api/v1/appointments/appointments', json={
+        'barber_id': 3, 'date': SLOT.isoformat()
+    }, headers={'Authorization': 'Bearer token'})
+    row = next(iter(session.rows.values()))
+    later = SLOT + timedelta(hours=2)
+
+    response = appointments_client.put(f'/api/v1/appointments/appointments/{row.id}', json={
+        'date': later.isoformat()
+    }, headers={'Authorization': 'Bearer token'})
+
+    assert response.status_code == 200
+    assert row.appointment_datetime == later
+    assert invalidated == [(3, SLOT), (3, later)]
+    assert [(details['date'], details['time']) for details in sent] == [
+        (SLOT.strftime('%Y-%m-%d'), '10:00'), (later.strftime('%Y-%m-%d'), '12:00')
+    ]
@@ -0,0 +1,20 @@
+import io
+import pytest
+from src.services.bulk import iter_json_array
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 64])
+def test_json_array_survives_any_chunking(chunk_size):
+    """Elements split across reads, including bare numbers, decode whole"""
+    document = '  [ {"a": [1, 2]}, 12345, "x,y", {"b": {"c": null}} ]  '
+    assert list(iter_json_array(io.StringIO(document), chunk_size)) == [
+        {'a': [1, 2]}, 12345, 'x,y', {'b': {'c': None}}
+    ]
+
+
+def test_json_array_rejects_bad_documents():
+    """Non-arrays and truncated arrays raise instead of yielding a partial load silently"""
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('{"a": 1}')))
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('[{"a": 1}, {"b"')))
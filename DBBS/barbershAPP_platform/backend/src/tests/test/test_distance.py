@@ -0,0 +1,23 @@
+import pytest
+from src.services.distance import distance_between, geodesic, haversine
+
+def test_geodesic_equator_and_meridian():
+    """One degree along the equator and along a meridian differ on the ellipsoid"""
+    assert distance_between((0.0, 0.0), (0.0, 1.0)) == pytest.approx(111319.49, abs=1)
+    assert distance_between((0.0, 0.0), (1.0, 0.0)) == pytest.approx(110574.39, rel=1e-4)
+
+def test_geodesic_is_vectorized():
+    """A whole batch of points is measured in one call, zero distance included"""
+    distances = geodesic(42.3601, -71.0589, [42.3601, 40.7128], [-71.0589, -74.0060])
+
+    assert distances[0] == 0.0
+    assert distances[1] == pytest.approx(306000, rel=0.01)
+
+def test_east_west_distance_shrinks_with_latitude():
+    """A degree of longitude at 42N is far shorter than a degree of latitude"""
+    east = distance_between((42.0, -71.0), (42.0, -70.0))
+    north = distance_between((42.0, -71.0), (43.0, -71.0))
+
+    assert east == pytest.approx(82900, rel=0.01)
+    assert east < north
+    assert haversine(42.0, -71.0, [42.0], [-70.0])[0] == pytest.approx(east, rel=0.005)
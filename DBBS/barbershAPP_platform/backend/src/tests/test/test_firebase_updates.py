@@ -0,0 +1,41 @@
+import pytest
+from src.services.firebase import batch
+from src.services.firebase.updates import FirebaseUpdates
+
+
+@pytest.fixture
+def shops_db(monkeypatch, firestore_db):
+    firestore_db.collections['shops'] = {'1': {'queue_length': 3, 'estimated_wait': 25}, '3': {'queue_length': 1}}
+    monkeypatch.setattr(FirebaseUpdates, 'db', firestore_db)
+    return firestore_db
+
+
+def test_live_fields_single_batched_read(shops_db):
+    """All shops come from one get_all, matched by id; missing documents get defaults"""
+    fields = FirebaseUpdates.live_fields([1, 2, 3, 1])
+    assert shops_db.get_all_calls == [['1', '2', '3']]
+    assert fields[1]['queue_length'] == 3 and fields[1]['wait_time'] == 25
+    assert fields[2] == {
+        'queue_length': 0, 'wait_time': 0, 'available_barbers': [], 'is_open': None, 'last_updated': None
+    }
+    assert fields[3]['queue_length'] == 1
+
+
+def test_live_fields_chunks_large_requests(shops_db, monkeypatch):
+    """Requests above the chunk size are split into several get_all calls"""
+    monkeypatch.setattr(batch, 'GET_ALL_CHUNK', 2)
+    FirebaseUpdates.live_fields([1, 2, 3, 4, 5])
+    assert [len(call) for call in shops_db.get_all_calls] == [2, 2, 1]
+
+
+def test_drive_time_results_keep_current_queue(shops_db, monkeypatch):
+    """get_shops_by_drive_time still answers current_queue, from either queue field name"""
+    import asyncio
+    from src.services.GISService import GeoService
+    shops_db.collections['shops']['2'] = {'queue_size': 4}
+    monkeypatch.setattr(GeoService, 'query_shops_by_drive_time', staticmethod(
+        lambda lat, lon, minutes: [{'id': 1, 'distance': 10.0}, {'id': 2, 'distance': 20.0}]
+    ))
+
+    shops = asyncio.run(GeoService.get_shops_by_drive_time(42.0, -71.0, 15))
+    assert [shop['current_queue'] for shop in shops] == [3, 4]
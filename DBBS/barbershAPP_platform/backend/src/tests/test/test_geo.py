@@ -14,7 +14,7 @@ def app():
 @pytest.fixture
 def geo_service():
     """Create GeoService instance for testing"""
-    return GeoService(testing=True)
+    return GeoService()
 
 def test_find_nearby_shops(app, geo_service):
     """Test nearby shops functionality"""
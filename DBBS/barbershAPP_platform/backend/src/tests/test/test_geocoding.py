@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+import pytest
+from src.services import geocoding as geocoding_module
+from src.services.geocoding import GeocodingService, LRUCache, normalize_address
+from src.services.http_client import UpstreamUnavailable
+
+def test_normalize_address():
+    """Case, spacing and trailing punctuation map to one cache key"""
+    assert normalize_address("  1 Main St,\tBoston,  MA. ") == normalize_address("1 main st, boston, ma")
+
+def test_lru_evicts_least_recently_used():
+    """Reading an entry protects it from eviction"""
+    cache = LRUCache(max_size=2)
+    cache.set('a', 1, ttl=60)
+    cache.set('b', 2, ttl=60)
+    cache.get('a')
+    cache.set('c', 3, ttl=60)
+
+    assert cache.get('a') == (True, 1)
+    assert cache.get('b') == (False, None)
+
+def test_lru_caches_negative_results_until_expiry():
+    """None is a cached answer, distinct from a miss, until its TTL lapses"""
+    cache = LRUCache()
+    cache.set('nowhere', None, ttl=60)
+    cache.set('expired', None, ttl=-1)
+
+    assert cache.get('nowhere') == (True, None)
+    assert cache.get('expired') == (False, None)
+
+
+@pytest.fixture
+def service(monkeypatch, fake_redis):
+    monkeypatch.setattr(geocoding_module, 'current_app', SimpleNamespace(config={}))
+    monkeypatch.setattr(GeocodingService, '_count', lambda self, counter: None)
+    return GeocodingService(SimpleNamespace(redis_client=fake_redis, config={}))
+
+
+def answer(monkeypatch, outcome):
+    calls = []
+
+    def get_json(url, params, stale=True):
+        calls.append(params['address'])
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(geocoding_module, 'google_client', SimpleNamespace(get_json=get_json))
+    return calls
+
+
+@pytest.mark.parametrize('outcome', [
+    UpstreamUnavailable('circuit open'),
+    {'status': 'OVER_QUERY_LIMIT', 'results': []},
+    {'status': 'REQUEST_DENIED', 'results': []},
+    {'status': 'UNKNOWN_ERROR', 'results': []}
+])
+def test_upstream_errors_are_not_cached(service, monkeypatch, outcome):
+    """A blip returns None but the next request asks Google again"""
+    calls = answer(monkeypatch, outcome)
+    assert service.geocode('1 Main St') is None
+    assert service.geocode('1 Main St') is None
+    assert calls == ['1 Main St', '1 Main St']
+    assert service.redis.values == {}
+
+
+def test_zero_results_are_cached_negatively(service, monkeypatch):
+    """An address Google cannot place is remembered in both tiers"""
+    calls = answer(monkeypatch, {'status': 'ZERO_RESULTS', 'results': []})
+    assert service.geocode('Nowhere') is None
+    assert service.geocode('Nowhere') is None
+    assert calls == ['Nowhere']
+    assert list(service.redis.values.values()) == [geocoding_module.NEGATIVE_MARKER]
+
@@ -0,0 +1,135 @@
+import json
+import pytest
+import requests
+import time
+from src.services import http_client as http_module
+from src.services.http_client import CircuitBreaker, HttpClient, UpstreamUnavailable, backoff
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.body
+
+
+@pytest.fixture
+def redis(monkeypatch, fake_redis):
+    monkeypatch.setattr(http_module, 'queue_service', type('FakeQueue', (), {'redis_client': fake_redis, 'config': {}}))
+    return fake_redis
+
+
+def _client(session, **settings):
+    client = HttpClient('test', backoff_base=0.0, **settings)
+    client.session = session
+    return client
+
+
+def test_backoff_is_jittered_and_capped():
+    """Delays stay within the exponential envelope and never exceed the cap"""
+    for attempt in range(8):
+        delays = [backoff(attempt, 0.1, 1.0) for _ in range(50)]
+        assert all(0 <= delay <= min(1.0, 0.1 * 2 ** attempt) for delay in delays)
+    assert len({backoff(3, 0.1, 1.0) for _ in range(20)}) > 1
+
+
+def test_breaker_opens_after_threshold():
+    """Consecutive failures open the circuit; a success in between resets the count"""
+    breaker = CircuitBreaker(threshold=3, cooldown=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_allows_one_trial():
+    """After the cooldown one call goes through; its outcome closes or reopens the circuit"""
+    breaker = CircuitBreaker(threshold=1, cooldown=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+def test_fetch_retries_transient_failures(redis, fake_session):
+    """5xx answers and timeouts are retried; a later success closes the books"""
+    fake_session.script(FakeResponse(503), requests.exceptions.ReadTimeout(), FakeResponse(200, {'ok': True}))
+    client = _client(fake_session, retries=2)
+
+    assert client.get_json('https://upstream/x') == {'ok': True}
+    stats = client.stats()
+    assert stats['retries'] == 2 and stats['errors'] == 0 and stats['circuit'] == 'closed'
+
+
+def test_client_errors_are_not_retried(redis, fake_session):
+    """A 4xx will not improve on retry and does not count against the breaker"""
+    fake_session.script(FakeResponse(404), FakeResponse(200, {}))
+    client = _client(fake_session, retries=2, breaker_threshold=1)
+
+    with pytest.raises(UpstreamUnavailable):
+        client.get_json('https://upstream/x', stale=False)
+    assert len(fake_session.timeouts) == 1 and client.breaker.state == 'closed'
+
+
+def test_open_breaker_and_full_semaphore_shed_without_calling(redis, fake_session):
+    """Rejected calls never reach the upstream"""
+    fake_session.script(requests.exceptions.ConnectionError())
+    client = _client(fake_session, retries=0, breaker_threshold=1, max_concurrency=1, acquire_timeout=0.01)
+
+    with pytest.raises(UpstreamUnavailable):
+        client.get_json('https://upstream/x', stale=False)
+    with pytest.raises(UpstreamUnavailable, match='circuit open'):
+        client.get_json('https://upstream/x', stale=False)
+
+    client.breaker.record_success()
+    client.slots.acquire()
+    with pytest.raises(UpstreamUnavailable, match='concurrency limit'):
+        client.get_json('https://upstream/x', stale=False)
+    assert len(fake_session.timeouts) == 1 and client.stats()['rejected'] == 2
+
+
+def test_stale_copy_only_when_allowed(redis, fake_session):
+    """The last good body stands in for request-path reads; ingest paths see the failure"""
+    fake_session.script(FakeResponse(200, {'v': 1}), FakeResponse(500), FakeResponse(500))
+    client = _client(fake_session, retries=0)
+
+    assert client.get_json('https://upstream/x', {'page': 1}) == {'v': 1}
+    assert client.get_json('https://upstream/x', {'page': 1}) == {'v': 1}
+    with pytest.raises(UpstreamUnavailable):
+        client.get_json('https://upstream/x', {'page': 1}, stale=False)
+    assert client.stats()['stale_served'] == 1
+    assert [json.loads(value) for value in redis.values.values()] == [{'v': 1}]
+
+
+def test_deadline_bounds_retries_and_timeouts(redis, fake_session):
+    """Attempts stop at the deadline and never wait longer than the time left"""
+    timeout = requests.exceptions.ReadTimeout()
+    fake_session.script(*[timeout] * 10, delay=0.04)
+    client = _client(fake_session, retries=9, deadline=0.1, read_timeout=5.0)
+
+    started = time.monotonic()
+    with pytest.raises(UpstreamUnavailable):
+        client.get_json('https://upstream/x', stale=False)
+
+    assert time.monotonic() - started < 0.2
+    assert 2 <= len(fake_session.timeouts) <= 3
+    assert all(read <= 0.1 for _, read in fake_session.timeouts)
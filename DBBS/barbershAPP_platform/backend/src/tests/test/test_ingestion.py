@@ -0,0 +1,54 @@
+import pytest
+from datetime import datetime
+from src.services.ingestion import ArcGISIngestor, parse_feature
+
+class FakeGIS:
+    """Serves a layer of `total` features, capping pages like an ArcGIS server"""
+    query_url = 'https://example.test/query'
+
+    def __init__(self, total, server_cap):
+        self.total = total
+        self.server_cap = server_cap
+        self.offsets = []
+        self.stale = []
+
+    def _make_request(self, url, params, stale=True):
+        offset = params['resultOffset']
+        self.offsets.append(offset)
+        self.stale.append(stale)
+        count = min(params['resultRecordCount'], self.server_cap, max(self.total - offset, 0))
+        return {
+            'features': [{'attributes': {'OBJECTID': offset + i}} for i in range(count)],
+            'exceededTransferLimit': offset + count < self.total
+        }
+
+def test_pages_follow_transfer_limit():
+    """Paging continues past a server cap smaller than the requested page size"""
+    gis = FakeGIS(total=2500, server_cap=1000)
+    pages = list(ArcGISIngestor(gis, page_size=2000).pages())
+
+    assert [len(page) for page in pages] == [1000, 1000, 500]
+    assert gis.offsets == [0, 1000, 2000]
+    assert not any(gis.stale)
+
+def test_parse_feature():
+    """Attributes map onto barbershop columns and EDITED becomes a datetime"""
+    record = parse_feature({
+        'attributes': {
+            'BARBERSHOP': 'Powell\'s Barbershop',
+            'ADDRESS': '227 Upshur St NW',
+            'PHONE': '(202) 722-9875',
+            'GLOBALID': '{7C7B8937}',
+            'EDITED': 1704067200000
+        },
+        'geometry': {'x': -77.015, 'y': 38.942}
+    })
+
+    assert record['external_id'] == '{7C7B8937}'
+    assert (record['lon'], record['lat']) == (-77.015, 38.942)
+    assert record['edited'] == datetime(2024, 1, 1)
+
+def test_parse_feature_skips_unusable():
+    """Features without a name or location are dropped"""
+    assert parse_feature({'attributes': {'GLOBALID': 'x'}, 'geometry': {'x': 1, 'y': 2}}) is None
+    assert parse_feature({'attributes': {'GLOBALID': 'x', 'BARBERSHOP': 'A'}}) is None
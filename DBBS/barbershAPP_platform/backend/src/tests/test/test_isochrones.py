@@ -0,0 +1,85 @@
+import pytest
+import src.services.isochrones as isochrones
+from src.services.isochrones import IsochroneService, RoadNetwork, segment_speed, time_bucket
+from src.utils import geohash
+
+@pytest.fixture
+def network():
+    """A 50 km/h two-way street east of the origin and a one-way motorway north of it"""
+    return RoadNetwork.from_geojson({
+        'type': 'FeatureCollection',
+        'features': [
+            {
+                'type': 'Feature',
+                'properties': {'highway': 'residential', 'maxspeed': '50'},
+                'geometry': {'type': 'LineString', 'coordinates': [[-71.0, 42.0], [-70.99, 42.0], [-70.98, 42.0]]}
+            },
+            {
+                'type': 'Feature',
+                'properties': {'highway': 'motorway', 'oneway': 'yes'},
+                'geometry': {'type': 'LineString', 'coordinates': [[-71.0, 42.0], [-71.0, 42.1]]}
+            }
+        ]
+    })
+
+def test_speed_parsing():
+    """maxspeed wins over the highway class and understands mph"""
+    assert segment_speed({'maxspeed': '30 mph', 'highway': 'motorway'}) == pytest.approx(48.27)
+    assert segment_speed({'highway': 'motorway'}) == 100
+    assert segment_speed({}) == 25
+
+def test_time_bucket():
+    """Requests round up to the next precomputed drive time"""
+    assert time_bucket(10) == 15
+    assert time_bucket(30) == 30
+    assert time_bucket(90) == 60
+
+def test_reachable_respects_budget_and_direction(network):
+    """Dijkstra stops at the time budget and never drives a one-way road backwards"""
+    origin = network.snap(42.0, -71.0)
+    # ~830 m to the first node at 50 km/h is ~60 s; the second node is ~120 s away
+    assert set(network.reachable(origin, 90)) == {(-71.0, 42.0), (-70.99, 42.0)}
+    # 11 km of motorway at 100 km/h is ~400 s
+    assert (-71.0, 42.1) in network.reachable(origin, 420)
+    assert (-71.0, 42.0) not in network.reachable((-71.0, 42.1), 3600)[1:]
+
+def test_geohash_round_trip():
+    """A geohash cell contains the point it was built from"""
+    cell = geohash.encode(42.3601, -71.0589, 6)
+    min_lat, min_lon, max_lat, max_lon = geohash.bounds(cell)
+
+    assert cell == 'drt2zp'
+    assert min_lat <= 42.3601 <= max_lat and min_lon <= -71.0589 <= max_lon
+    assert len(set(geohash.neighbors(cell))) == 8
+
+
+def test_miss_queues_one_build_and_falls_back(monkeypatch, fake_redis, fake_session):
+    """A cache miss never builds inline; concurrent misses queue a single task"""
+    queued = []
+    service = IsochroneService()
+    monkeypatch.setattr(service, 'network_version', lambda: 'v1')
+    monkeypatch.setattr(service, 'network', lambda: pytest.fail('the request path loaded the road graph'))
+    monkeypatch.setattr(isochrones, 'db', type('FakeDB', (), {'session': fake_session}))
+    monkeypatch.setattr(isochrones, 'current_app', type('FakeApp', (), {'config': {'ISOCHRONE_COMPUTE_ON_MISS': True}}))
+    monkeypatch.setattr(isochrones, 'queue_service', type('FakeQueue', (), {'redis_client': fake_redis, 'config': {}}))
+    monkeypatch.setattr(isochrones, 'build_isochrone', type('FakeTask', (), {'delay': staticmethod(lambda *args: queued.append(args))}))
+
+    assert service.polygon_id(42.0, -71.0, 10) is None
+    assert service.polygon_id(42.0, -71.0, 12) is None
+
+    assert queued == [(geohash.encode(42.0, -71.0, isochrones.CELL_PRECISION), 15)]
+    assert fake_session.commits == 0
+
+
+def test_network_version_follows_file_metadata(tmp_path, monkeypatch):
+    """The version changes with the file's size or mtime and is None without a file"""
+    path = tmp_path / 'roads.geojson'
+    service = IsochroneService()
+    monkeypatch.setattr(isochrones, 'current_app', type('FakeApp', (), {'config': {'ROAD_NETWORK_PATH': str(path)}}))
+    assert service.network_version() is None
+
+    path.write_text('{"features": []}')
+    first = service.network_version()
+    path.write_text('{"features": [], "name": "roads"}')
+    assert first is not None and service.network_version() != first
+
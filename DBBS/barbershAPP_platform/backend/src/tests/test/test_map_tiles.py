@@ -0,0 +1,56 @@
+import pytest
+from types import SimpleNamespace
+from src.services import map_tiles as map_tiles_module
+from src.services.map_tiles import MVT_SQL, MapTileService
+from src.utils import tiles
+
+
+def _answer_tile(session, tile):
+    session.respond = lambda statement, params: SimpleNamespace(first=lambda: SimpleNamespace(tile=tile))
+
+
+@pytest.fixture
+def service(monkeypatch, fake_redis):
+    monkeypatch.setattr(map_tiles_module, 'current_app', SimpleNamespace(config={'MVT_EXTENT': 4096, 'MVT_BUFFER': 64}))
+    return MapTileService(SimpleNamespace(redis_client=fake_redis, config={}))
+
+
+def test_mvt_is_built_once_then_served_from_redis(monkeypatch, service, fake_redis, fake_session):
+    """The padded query runs on a miss; the cached bytes answer every later request"""
+    _answer_tile(fake_session, memoryview(b'\x1a\x02shops'))
+    monkeypatch.setattr(map_tiles_module, 'db', SimpleNamespace(session=fake_session))
+
+    assert service.mvt(14, 4680, 6266) == b'\x1a\x02shops'
+    assert service.mvt(14, 4680, 6266) == b'\x1a\x02shops'
+
+    assert len(fake_session.calls) == 1
+    statement, params = fake_session.calls[0]
+    assert statement is MVT_SQL
+    assert params['margin'] == pytest.approx(tiles.tile_size_meters(14) * 64 / 4096)
+    assert fake_redis.values[service._key('mvt', 14, 4680, 6266)] == b'\x1a\x02shops'
+
+
+def test_empty_tile_is_cached_as_empty_bytes(monkeypatch, service, fake_session):
+    """Tiles without shops are cached too, so empty ocean is not queried again"""
+    _answer_tile(fake_session, None)
+    monkeypatch.setattr(map_tiles_module, 'db', SimpleNamespace(session=fake_session))
+
+    assert service.mvt(3, 0, 0) == b''
+    assert service.mvt(3, 0, 0) == b''
+    assert len(fake_session.calls) == 1
+
+
+def test_invalidate_point_covers_buffered_neighbours(service, fake_redis):
+    """Vector tiles padded over the shop are evicted; clusters and shop lists only in its own tile"""
+    x, y = tiles.tile_for(38.9072, -77.0369, 14)
+    west, south, east, north = tiles.tile_bounds(14, x, y)
+    lat, lon = (south + north) / 2, east - (east - west) / 1000
+
+    service.invalidate_point(lat, lon)
+    deleted = set(fake_redis.deleted)
+
+    assert {service._key('mvt', 14, x, y), service._key('mvt', 14, x + 1, y)} <= deleted
+    assert service._key('clusters', 14, x, y) in deleted
+    assert service._key('clusters', 14, x + 1, y) not in deleted
+    assert service._key('shops', tiles.MAX_ZOOM, *tiles.tile_for(lat, lon, tiles.MAX_ZOOM)) in deleted
+    assert service._key('mvt', 0, 0, 0) in deleted
@@ -0,0 +1,83 @@
+import json
+import pytest
+import src.services.nearby_cache as nearby_module
+from src.services.firebase.replica import shop_replica
+from src.services.firebase.updates import FirebaseUpdates
+from src.services.GISService import GeoService
+from src.services.nearby_cache import NearbyCache
+
+
+def _shop(shop_id, lat, lon):
+    return {'id': shop_id, 'name': f'Shop {shop_id}', 'location': {'type': 'Point', 'coordinates': [lon, lat]}}
+
+
+# Shop 1 sits west of shop 2; which is nearer depends on where in the cell the client stands
+SHOPS = [_shop(1, 42.3601, -71.0580), _shop(2, 42.3601, -71.0500)]
+
+
+@pytest.fixture
+def cache(monkeypatch, fake_redis):
+    monkeypatch.setattr(nearby_module, 'current_app', type('FakeApp', (), {'config': {}}))
+    monkeypatch.setattr(shop_replica, 'enabled', False)
+    monkeypatch.setattr(FirebaseUpdates, 'live_fields', staticmethod(lambda shop_ids: {}))
+    return NearbyCache(type('FakeQueue', (), {'redis_client': fake_redis, 'config': {}}))
+
+
+@pytest.fixture
+def postgis(monkeypatch):
+    calls = []
+
+    def query(lat, lon, minutes):
+        calls.append(minutes)
+        return [dict(shop) for shop in SHOPS]
+
+    monkeypatch.setattr(GeoService, 'query_shops_by_drive_time', staticmethod(query))
+    return calls
+
+
+def test_lookup_order_is_local_then_redis_then_postgis(cache, fake_redis, postgis):
+    """A miss queries PostGIS once for the bucket; later calls stop at the first layer holding it"""
+    cache.shops(42.3601, -71.0589, 10)
+    assert postgis == [15]
+    assert len(fake_redis.reads) == 1 and fake_redis.reads[0].endswith(':15')
+
+    cache.shops(42.3601, -71.0589, 12)
+    assert postgis == [15] and len(fake_redis.reads) == 1
+
+    cache.local.clear()
+    cache.shops(42.3601, -71.0589, 15)
+    assert postgis == [15] and len(fake_redis.reads) == 2
+
+
+def test_results_are_resorted_for_each_client(cache, postgis):
+    """Clients in the same cell share the list but get their own distances and order"""
+    west = cache.shops(42.3601, -71.0590, 30)
+    east = cache.shops(42.3601, -71.0490, 30)
+
+    assert [shop['id'] for shop in west] == [1, 2]
+    assert [shop['id'] for shop in east] == [2, 1]
+    assert west[0]['distance'] < 100 and east[0]['distance'] < 100
+    assert postgis == [30]
+
+
+def test_live_overlay_falls_back_from_replica_to_cache_to_firestore(cache, fake_redis, postgis, monkeypatch):
+    """Cached live fields are used where present; only the rest are read from Firestore and cached"""
+    fake_redis.values[cache._live_key(1)] = json.dumps({'queue_length': 3})
+    fetched = []
+
+    def live_fields(shop_ids):
+        fetched.append(list(shop_ids))
+        return {shop_id: {'queue_length': 0} for shop_id in shop_ids}
+
+    monkeypatch.setattr(FirebaseUpdates, 'live_fields', staticmethod(live_fields))
+    shops = {shop['id']: shop for shop in cache.shops(42.3601, -71.0589, 30)}
+
+    assert fetched == [[2]]
+    assert shops[1]['queue_length'] == 3 and shops[2]['queue_length'] == 0
+    assert json.loads(fake_redis.values[cache._live_key(2)]) == {'queue_length': 0}
+
+    monkeypatch.setattr(shop_replica, 'enabled', True)
+    monkeypatch.setattr(type(shop_replica), 'ready', property(lambda self: True))
+    monkeypatch.setattr(shop_replica, 'live_fields', lambda shop_ids: {shop_id: {'queue_length': 9} for shop_id in shop_ids})
+    assert all(shop['queue_length'] == 9 for shop in cache.shops(42.3601, -71.0589, 30))
+    assert fetched == [[2]]
@@ -0,0 +1,79 @@
+import pytest
+from datetime import datetime
+from src.middleware.validation import decode_cursor, encode_cursor
+from src.services.GISService import GeoService
+import sys
+
+# (id, distance in meters), already in the index's (distance, id) order
+SHOPS = [(1, 120.0), (2, 450.5), (3, 450.5), (4, 900.25), (5, 2500.0)]
+
+
+def knn(query, params):
+    """Applies the KNN query's radius cap, keyset condition and LIMIT to SHOPS"""
+    rows = [
+        {'id': shop_id, 'name': f'Shop {shop_id}', 'distance': distance}
+        for shop_id, distance in SHOPS
+        if (params['max_radius'] is None or distance <= params['max_radius'])
+        and (params['after_distance'] is None or (distance, shop_id) > (params['after_distance'], params['after_id']))
+    ][:params['limit']]
+    return FakeResult(rows)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+@pytest.fixture
+def session(monkeypatch, fake_session):
+    fake_session.respond = knn
+    # src.services re-exports a GISService class, so reach the module through sys.modules
+    monkeypatch.setattr(sys.modules[GeoService.__module__], 'db', type('FakeDB', (), {'session': fake_session}))
+    return fake_session
+
+
+def test_cursor_round_trips_datetime_and_distance_keys():
+    """One cursor format serves created_at listings and distance pages"""
+    moment = datetime(2024, 6, 3, 9, 30)
+
+    assert decode_cursor(encode_cursor(moment, 7)) == (moment, 7)
+    assert decode_cursor(encode_cursor(450.5, 3), float) == (450.5, 3)
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor', float)
+
+
+def test_cursor_pages_continue_without_gaps_or_repeats(session):
+    """Ties on distance are broken by id, so every shop appears exactly once"""
+    first = GeoService.get_nearest_shops(0.0, 0.0, limit=2)
+    second = GeoService.get_nearest_shops(0.0, 0.0, limit=2, cursor=first['next_cursor'])
+    third = GeoService.get_nearest_shops(0.0, 0.0, limit=2, cursor=second['next_cursor'])
+
+    pages = [first, second, third]
+    assert [shop['id'] for page in pages for shop in page['shops']] == [1, 2, 3, 4, 5]
+    assert third['next_cursor'] is None
+    _, params = session.calls[1]
+    assert params['after_distance'] == 450.5 and params['after_id'] == 2
+
+
+def test_radius_caps_results_and_the_last_page(session):
+    """Shops beyond the radius never show up and no cursor points past it"""
+    page = GeoService.get_nearest_shops(0.0, 0.0, limit=10, max_radius=1000)
+
+    assert [shop['id'] for shop in page['shops']] == [1, 2, 3, 4]
+    assert page['next_cursor'] is None
+    _, params = session.calls[0]
+    assert params['max_radius'] == 1000
+
+
+def test_limit_is_clamped_to_max_nearest(session):
+    """One extra row is fetched to detect a next page, never more than the cap allows"""
+    GeoService.get_nearest_shops(0.0, 0.0, limit=10_000)
+    GeoService.get_nearest_shops(0.0, 0.0, limit=0)
+
+    assert [params['limit'] for _, params in session.calls] == [GeoService.MAX_NEAREST + 1, 2]
@@ -0,0 +1,45 @@
+import pytest
+from datetime import date, datetime, time
+from src.services.schedule import expand, expand_day
+
+MONDAY = date(2024, 6, 3)
+
+@pytest.fixture
+def weekly_rules():
+    """Monday and Tuesday 9-17 with 30 minute slots"""
+    return {
+        0: [(time(9, 0), time(17, 0), 30)],
+        1: [(time(9, 0), time(17, 0), 30)]
+    }
+
+def test_rules_expand_to_matching_weekdays(weekly_rules):
+    """Weekly rules only produce intervals on their weekday"""
+    expanded = expand(weekly_rules, {}, MONDAY, date(2024, 6, 5))
+
+    assert expanded[MONDAY] == [(datetime(2024, 6, 3, 9, 0), datetime(2024, 6, 3, 17, 0), 30)]
+    assert len(expanded[date(2024, 6, 4)]) == 1
+    assert expanded[date(2024, 6, 5)] == []
+
+def test_time_off_splits_interval(weekly_rules):
+    """Partial time off removes just that part of the day"""
+    windows = expand_day(MONDAY, weekly_rules, [(time(12, 0), time(13, 0), None, False)])
+
+    assert windows == [
+        (datetime(2024, 6, 3, 9, 0), datetime(2024, 6, 3, 12, 0), 30),
+        (datetime(2024, 6, 3, 13, 0), datetime(2024, 6, 3, 17, 0), 30)
+    ]
+
+def test_full_day_off(weekly_rules):
+    """Time off without hours closes the whole day, extra hours included"""
+    overrides = [
+        (time(17, 0), time(19, 0), None, True),
+        (None, None, None, False)
+    ]
+    assert expand_day(MONDAY, weekly_rules, overrides) == []
+
+def test_extended_hours_on_day_without_rule(weekly_rules):
+    """Extra hours open a day that has no weekly rule"""
+    sunday = date(2024, 6, 9)
+    windows = expand_day(sunday, weekly_rules, [(time(10, 0), time(14, 0), 60, True)])
+
+    assert windows == [(datetime(2024, 6, 9, 10, 0), datetime(2024, 6, 9, 14, 0), 60)]
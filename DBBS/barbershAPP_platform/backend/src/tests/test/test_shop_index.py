@@ -0,0 +1,83 @@
+from contextlib import nullcontext
+from types import SimpleNamespace
+import pytest
+from src.services import shop_index as shop_index_module
+from src.services.shop_index import ShopIndex, ShopSnapshot
+
+BOSTON = (42.3601, -71.0589)
+
+@pytest.fixture
+def snapshot():
+    """Shops in Boston, Cambridge, Worcester and New York"""
+    return ShopSnapshot(
+        [1, 2, 3, 4],
+        ['Downtown', 'Cambridge', 'Worcester', 'Manhattan'],
+        [42.3605, 42.3736, 42.2626, 40.7128],
+        [-71.0570, -71.1097, -71.8023, -74.0060]
+    )
+
+def test_within_filters_and_sorts(snapshot):
+    """Radius queries return only shops inside the circle, nearest first"""
+    found = snapshot.within(*BOSTON, 10000)
+
+    assert [shop.shop_id for shop in found] == [1, 2]
+    assert found[0].distance_meters < found[1].distance_meters
+
+def test_nearest_widens_search(snapshot):
+    """k-nearest keeps expanding past empty grid cells until k shops are found"""
+    found = snapshot.nearest(*BOSTON, 3)
+
+    assert [shop.shop_id for shop in found] == [1, 2, 3]
+
+def test_nearest_respects_radius_cap(snapshot):
+    """A radius cap stops the search even when fewer than k shops were found"""
+    assert [shop.shop_id for shop in snapshot.nearest(*BOSTON, 4, max_radius_meters=100000)] == [1, 2, 3]
+
+
+@pytest.fixture
+def index(monkeypatch, fake_redis):
+    """ShopIndex over a fake shops table; loads counts how often it was queried"""
+    rows = [SimpleNamespace(id=1, name='Downtown', lat=42.3605, lon=-71.0570)]
+    loads = []
+
+    def all_rows():
+        loads.append(len(rows))
+        return list(rows)
+
+    column = SimpleNamespace(label=lambda name: name)
+    monkeypatch.setattr(shop_index_module, 'func', SimpleNamespace(ST_Y=lambda value: column, ST_X=lambda value: column))
+    monkeypatch.setattr(shop_index_module, 'db', SimpleNamespace(
+        session=SimpleNamespace(query=lambda *columns: SimpleNamespace(all=all_rows))
+    ))
+    monkeypatch.setattr(shop_index_module, 'queue_service', SimpleNamespace(redis_client=fake_redis, config={}))
+    index = ShopIndex()
+    index.init_app(SimpleNamespace(config={'SHOP_INDEX_TTL': 300}, app_context=nullcontext))
+    monkeypatch.setattr(index, '_ensure_started', lambda: None)
+    index.rows, index.loads = rows, loads
+    return index
+
+
+def test_stale_snapshot_is_not_reloaded_on_the_request_path(index):
+    """Only the first load runs inline; an expired snapshot is served until the refresher reloads it"""
+    index.snapshot()
+    index._loaded_at -= 1000
+    index.snapshot()
+    assert index.loads == [1]
+
+    assert index._reload_if_due()
+    assert index.loads == [1, 1]
+
+
+def test_writes_reach_every_worker_through_the_shared_version(index):
+    """A write in one process bumps the version; another worker reloads on its next poll"""
+    index.snapshot()
+    assert not index._reload_if_due()
+
+    index.rows.append(SimpleNamespace(id=2, name='Cambridge', lat=42.3736, lon=-71.1097))
+    other_worker = ShopIndex()
+    other_worker.invalidate()
+
+    assert index._reload_if_due()
+    assert [shop.shop_id for shop in index.within(42.3601, -71.0589, 10000)] == [1, 2]
+    assert not index._reload_if_due()
+
@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from src.services.firebase.replica import ShopStateReplica
+
+
+def _doc(doc_id, **data):
+    return SimpleNamespace(id=doc_id, to_dict=lambda: data)
+
+
+def _change(kind, doc):
+    return SimpleNamespace(type=SimpleNamespace(name=kind), document=doc)
+
+
+def test_initial_snapshot_then_incremental_changes():
+    """The first snapshot replaces the replica; later ones apply adds, edits and removals"""
+    replica = ShopStateReplica()
+    now = datetime.now(timezone.utc)
+    replica._on_snapshot([_doc('1', queue_size=4, is_open=True, owner='x'), _doc('2', queue_length=1)], [], now)
+    assert replica._synced
+    assert replica._docs['1'] == {'queue_size': 4, 'is_open': True}
+
+    replica._on_snapshot([], [
+        _change('MODIFIED', _doc('1', queue_length=2, estimated_wait=10)),
+        _change('REMOVED', _doc('2')),
+        _change('ADDED', _doc('3', is_open=False))
+    ], now)
+    fields = replica.live_fields([1, 2, 3])
+    assert fields[1]['queue_length'] == 2 and fields[1]['wait_time'] == 10
+    assert fields[2]['queue_length'] == 0
+    assert fields[3]['is_open'] is False
+    assert replica.stats()['changes'] == 3
+
+
+def test_disabled_replica_is_never_ready():
+    """Readers fall back to Firestore unless the replica is switched on"""
+    replica = ShopStateReplica()
+    assert not replica.ready
+    assert replica.stats()['documents'] == 0
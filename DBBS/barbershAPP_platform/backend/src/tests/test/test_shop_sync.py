@@ -0,0 +1,99 @@
+import pytest
+from types import SimpleNamespace
+from src.services import shop_sync
+from src.services.shop_sync import record_hash
+
+
+def _record(**overrides):
+    record = {
+        'external_id': 'abc', 'name': 'Fade Lab', 'address': '1 Main St',
+        'phone': '555-0100', 'lon': -77.0365, 'lat': 38.8977
+    }
+    record.update(overrides)
+    return record
+
+
+def test_hash_ignores_id_and_unrelated_fields():
+    """Only stored content feeds the hash"""
+    assert record_hash(_record()) == record_hash(_record(external_id='other', edited='2024-01-01'))
+
+
+def test_hash_changes_with_content():
+    """Any stored field changing produces a new hash"""
+    base = record_hash(_record())
+    assert record_hash(_record(name='Fade Lab II')) != base
+    assert record_hash(_record(lat=38.9)) != base
+
+
+def test_hash_tolerates_float_noise_and_missing_optionals():
+    """Sub-centimetre jitter and None vs empty strings do not count as edits"""
+    assert record_hash(_record(lon=-77.03650000001)) == record_hash(_record())
+    assert record_hash(_record(phone=None)) == record_hash(_record(phone=''))
+
+
+def test_seed_file_streams_into_records():
+    """Every feature of the bundled seed file parses into a loadable record"""
+    import io
+    import json
+    from pathlib import Path
+    from src.services.bulk import iter_json_array
+    from src.services.ingestion import parse_feature
+
+    text = (Path(__file__).parents[3] / 'data' / 'bbs_data.JSON').read_text(encoding='utf-8')
+    streamed = list(iter_json_array(io.StringIO(text), chunk_size=97))
+    assert streamed == json.loads(text)
+    records = [parse_feature(feature) for feature in streamed]
+    assert all(record and record['external_id'].startswith('{') for record in records)
+
+
+def _scripted(session, merges, deleted=0):
+    """Answer the merge with scripted (staged, inserted, updated) rows and the prune with a rowcount"""
+    merges = list(merges)
+
+    def respond(statement, params):
+        if statement is shop_sync.MERGE_SQL:
+            staged, inserted, updated = merges.pop(0)
+            row = SimpleNamespace(staged=staged, inserted=inserted, updated=updated)
+            return SimpleNamespace(first=lambda: row)
+        return SimpleNamespace(rowcount=deleted if statement is shop_sync.PRUNE_SQL else -1)
+    session.respond = respond
+    return session
+
+
+def _engine(monkeypatch, session, batch_size):
+    monkeypatch.setattr(shop_sync, 'db', SimpleNamespace(session=session))
+    return shop_sync.ShopSyncEngine(batch_size=batch_size)
+
+
+def test_sync_commits_per_batch_and_keeps_running_counts(monkeypatch, fake_session):
+    """Unchanged is whatever was staged but neither inserted nor rewritten"""
+    session = _scripted(fake_session, merges=[(2, 1, 0), (2, 0, 1), (1, 0, 0)])
+    engine = _engine(monkeypatch, session, batch_size=2)
+
+    counts = engine.sync(_record(external_id=str(n)) for n in range(5))
+
+    assert counts == {'inserted': 1, 'updated': 1, 'unchanged': 3}
+    assert session.commits == 3
+    assert [len(rows) for rows in session.copied] == [2, 2, 1]
+
+
+def test_load_stages_everything_then_merges_and_prunes_once(monkeypatch, fake_session):
+    """A full reload is one transaction, and only it reports deletions"""
+    session = _scripted(fake_session, merges=[(5, 2, 1)], deleted=4)
+    engine = _engine(monkeypatch, session, batch_size=2)
+
+    counts = engine.load((_record(external_id=str(n)) for n in range(5)), prune=True)
+
+    assert counts == {'inserted': 2, 'updated': 1, 'unchanged': 2, 'deleted': 4}
+    assert session.commits == 1 and len(session.copied) == 3
+
+
+def test_failed_merge_rolls_back_and_counts_nothing(monkeypatch, fake_session):
+    """A batch that fails leaves the running counts as they were"""
+    session = _scripted(fake_session, merges=[])
+    engine = _engine(monkeypatch, session, batch_size=2)
+
+    with pytest.raises(IndexError):
+        engine.merge([_record()])
+    assert session.rollbacks == 1 and session.commits == 0
+    assert engine.counts == {'inserted': 0, 'updated': 0, 'unchanged': 0}
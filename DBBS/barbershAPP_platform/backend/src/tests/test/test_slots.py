@@ -0,0 +1,44 @@
+import pytest
+from datetime import date, datetime
+from src.services.slots import SlotIndex
+
+DAY = date(2024, 6, 3)
+
+@pytest.fixture
+def windows():
+    """Split shift with a different slot length after lunch"""
+    return [
+        (datetime(2024, 6, 3, 9, 0), datetime(2024, 6, 3, 12, 0), 30),
+        (datetime(2024, 6, 3, 13, 0), datetime(2024, 6, 3, 15, 0), 60)
+    ]
+
+def test_slots_follow_availability_windows(windows):
+    """Slot grid comes from the windows, not a fixed 9-17 day"""
+    index = SlotIndex.from_windows(1, DAY, windows)
+
+    assert len(index.free_slots()) == 8
+    assert index.free_slots()[0] == datetime(2024, 6, 3, 9, 0)
+    assert index.free_slots()[-1] == datetime(2024, 6, 3, 14, 0)
+    assert not index.is_free(datetime(2024, 6, 3, 12, 0))
+
+def test_bookings_mark_slots_taken(windows):
+    """A booking occupies the slot containing it"""
+    bookings = [
+        (datetime(2024, 6, 3, 9, 30), None),
+        (datetime(2024, 6, 3, 13, 15), None)
+    ]
+    index = SlotIndex.from_windows(1, DAY, windows, bookings)
+
+    assert not index.is_free(datetime(2024, 6, 3, 9, 30))
+    assert not index.is_free(datetime(2024, 6, 3, 13, 0))
+    assert index.is_free(datetime(2024, 6, 3, 10, 0))
+    assert len(index.free_slots()) == 6
+
+def test_booking_with_end_spans_slots(windows):
+    """A booking with an end time blocks every overlapping slot"""
+    bookings = [(datetime(2024, 6, 3, 10, 0), datetime(2024, 6, 3, 11, 0))]
+    index = SlotIndex.from_windows(1, DAY, windows, bookings)
+
+    assert not index.is_free(datetime(2024, 6, 3, 10, 0))
+    assert not index.is_free(datetime(2024, 6, 3, 10, 30))
+    assert index.is_free(datetime(2024, 6, 3, 11, 0))
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+import pytest
+from src.services import subscribers
+from src.services.firebase import batch
+
+
+@pytest.fixture
+def fake_db(monkeypatch, firestore_db):
+    firestore_db.collections = {
+        'subscriptions': {
+            'b1_u1': {'barber_id': 'b1', 'user_id': 'u1', 'active': True, 'fcm_token': 't1', 'language': 'es'},
+            'b1_u2': {'barber_id': 'b1', 'user_id': 'u2', 'active': True},
+            'b1_u3': {'barber_id': 'b1', 'user_id': 'u3', 'active': True},
+            'b1_u4': {'barber_id': 'b1', 'user_id': 'u4', 'active': False, 'fcm_token': 't4'},
+            'b2_u1': {'barber_id': 'b2', 'user_id': 'u1', 'active': True, 'fcm_token': 't1', 'language': 'es'}
+        },
+        'users': {'u1': {'fcm_token': 't1', 'language': 'es'}, 'u2': {'fcm_token': 't2'}, 'u3': {}}
+    }
+    invalidated = []
+    monkeypatch.setattr(subscribers, 'firestore', SimpleNamespace(client=lambda: firestore_db))
+    monkeypatch.setattr(subscribers, 'invalidate_subscribers', lambda barber_ids: invalidated.extend(barber_ids))
+    firestore_db.invalidated = invalidated
+    return firestore_db
+
+
+def test_denormalized_tokens_skip_user_reads(fake_db):
+    """Only subscriptions without a token hit users, in one batched read; tokenless users are dropped"""
+    result = subscribers.resolve_subscribers('b1')
+    assert fake_db.get_all_calls == [['u2', 'u3']]
+    assert result == [
+        {'token': 't1', 'language': 'es', 'user_id': 'u1'},
+        {'token': 't2', 'language': 'en', 'user_id': 'u2'}
+    ]
+
+
+def test_user_reads_are_chunked(fake_db, monkeypatch):
+    """Large follower lists are read in GET_ALL_CHUNK-sized batches"""
+    monkeypatch.setattr(batch, 'GET_ALL_CHUNK', 1)
+    subscribers.resolve_subscribers('b1')
+    assert fake_db.get_all_calls == [['u2'], ['u3']]
+
+
+def test_language_change_reaches_every_subscription(fake_db):
+    """The profile and each denormalized copy switch language; cached lists of those barbers are dropped"""
+    subscribers.set_user_language('u1', 'en')
+    assert fake_db.collections['users']['u1']['language'] == 'en'
+    assert subscribers.resolve_subscribers('b1')[0]['language'] == 'en'
+    assert fake_db.collections['subscriptions']['b2_u1']['language'] == 'en'
+    assert sorted(fake_db.invalidated) == ['b1', 'b2']
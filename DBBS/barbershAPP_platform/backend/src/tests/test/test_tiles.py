@@ -0,0 +1,58 @@
+import pytest
+from src.utils import tiles
+
+
+def test_tile_for_known_point():
+    """Washington DC at zoom 10 falls in the standard OSM tile"""
+    assert tiles.tile_for(38.9072, -77.0369, 10) == (292, 391)
+
+
+def test_tile_bounds_contain_point():
+    """A point lies inside the bounds of its own tile"""
+    x, y = tiles.tile_for(38.9072, -77.0369, 14)
+    west, south, east, north = tiles.tile_bounds(14, x, y)
+    assert west <= -77.0369 < east
+    assert south < 38.9072 <= north
+
+
+def test_mercator_bounds_nest_across_zooms():
+    """A tile's four children exactly partition it in projected meters"""
+    parent = tiles.tile_mercator_bounds(3, 2, 5)
+    children = [tiles.tile_mercator_bounds(4, 4 + dx, 10 + dy) for dx in (0, 1) for dy in (0, 1)]
+    assert min(c[0] for c in children) == pytest.approx(parent[0])
+    assert min(c[1] for c in children) == pytest.approx(parent[1])
+    assert max(c[2] for c in children) == pytest.approx(parent[2])
+    assert max(c[3] for c in children) == pytest.approx(parent[3])
+
+
+def test_tiles_covering_box_and_antimeridian():
+    """Covering tiles span the box, wrapping when west > east"""
+    covering = list(tiles.tiles_covering(-77.1, 38.8, -76.9, 39.0, 10))
+    assert (292, 391) in covering
+    assert len(covering) == len(set(covering))
+    wrapped = {x for x, _ in tiles.tiles_covering(170, -10, -170, 10, 3)}
+    assert wrapped == {7, 0}
+
+
+def test_is_valid():
+    """Tile coordinates must fall inside the zoom level's grid"""
+    assert tiles.is_valid(0, 0, 0)
+    assert not tiles.is_valid(2, 4, 0)
+    assert not tiles.is_valid(tiles.MAX_ZOOM + 1, 0, 0)
+
+
+def test_tiles_near_without_padding_is_the_containing_tile():
+    """Zero padding reduces to tile_for at every zoom"""
+    for zoom in (0, 5, 14, 22):
+        assert tiles.tiles_near(38.9072, -77.0369, zoom) == [tiles.tile_for(38.9072, -77.0369, zoom)]
+
+
+def test_tiles_near_reaches_neighbours_within_the_padding():
+    """A point just inside a tile's east edge also lies in the padded envelope of the tile to its east"""
+    x, y = tiles.tile_for(38.9072, -77.0369, 14)
+    west, south, east, north = tiles.tile_bounds(14, x, y)
+    near_east = east - (east - west) / 1000
+    middle = (south + north) / 2
+
+    assert set(tiles.tiles_near(middle, near_east, 14, 64 / 4096)) == {(x, y), (x + 1, y)}
+    assert tiles.tiles_near(middle, (west + east) / 2, 14, 64 / 4096) == [(x, y)]
@@ -0,0 +1,65 @@
+from typing import List, Tuple
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+DECODE = {char: index for index, char in enumerate(BASE32)}
+
+
+def encode(lat: float, lon: float, precision: int = 6) -> str:
+    """Geohash of a point; precision 6 is a cell of roughly 1.2 x 0.6 km"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) of a geohash cell"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = DECODE[char]
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            middle = (interval[0] + interval[1]) / 2
+            if value >> shift & 1:
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def decode(geohash: str) -> Tuple[float, float]:
+    """Center (lat, lon) of a geohash cell"""
+    min_lat, min_lon, max_lat, max_lon = bounds(geohash)
+    return (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+
+
+def neighbors(geohash: str) -> List[str]:
+    """The eight cells surrounding a geohash, at the same precision"""
+    min_lat, min_lon, max_lat, max_lon = bounds(geohash)
+    lat, lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+    height, width = max_lat - min_lat, max_lon - min_lon
+    return [
+        encode(
+            max(min(lat + dy * height, 90.0), -90.0),
+            (lon + dx * width + 180.0) % 360.0 - 180.0,
+            len(geohash)
+        )
+        for dy in (-1, 0, 1)
+        for dx in (-1, 0, 1)
+        if dy or dx
+    ]
@@ -0,0 +1,73 @@
+from typing import Iterator, List, Tuple
+import math
+
+MAX_LATITUDE = 85.0511287798  # Web Mercator cuts the poles off here
+MERCATOR_EXTENT = 20037508.342789244  # half the projected world width in EPSG:3857 meters
+MAX_ZOOM = 22
+
+
+def clamp_lat(lat: float) -> float:
+    return max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+
+
+def tile_for(lat: float, lon: float, zoom: int) -> Tuple[int, int]:
+    """(x, y) of the XYZ tile containing a point"""
+    n = 2 ** zoom
+    lat_rad = math.radians(clamp_lat(lat))
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def to_mercator(lat: float, lon: float) -> Tuple[float, float]:
+    """EPSG:3857 meters of a point"""
+    return lon / 180.0 * MERCATOR_EXTENT, math.asinh(math.tan(math.radians(clamp_lat(lat)))) / math.pi * MERCATOR_EXTENT
+
+
+def tiles_near(lat: float, lon: float, zoom: int, padding: float = 0.0) -> List[Tuple[int, int]]:
+    """Tiles whose envelope, grown on every side by padding (a fraction of the tile size), contains a point"""
+    n = 2 ** zoom
+    size = tile_size_meters(zoom)
+    mx, my = to_mercator(lat, lon)
+    column = (mx + MERCATOR_EXTENT) / size
+    row = (MERCATOR_EXTENT - my) / size
+    columns = range(max(int(math.floor(column - padding)), 0), min(int(math.floor(column + padding)), n - 1) + 1)
+    rows = range(max(int(math.floor(row - padding)), 0), min(int(math.floor(row + padding)), n - 1) + 1)
+    return [(x, y) for x in columns for y in rows]
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(west, south, east, north) of a tile in degrees"""
+    n = 2 ** zoom
+
+    def lat(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def tile_mercator_bounds(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(xmin, ymin, xmax, ymax) of a tile in EPSG:3857 meters"""
+    size = tile_size_meters(zoom)
+    xmin = -MERCATOR_EXTENT + x * size
+    ymax = MERCATOR_EXTENT - y * size
+    return xmin, ymax - size, xmin + size, ymax
+
+
+def tile_size_meters(zoom: int) -> float:
+    return 2 * MERCATOR_EXTENT / 2 ** zoom
+
+
+def is_valid(zoom: int, x: int, y: int) -> bool:
+    return 0 <= zoom <= MAX_ZOOM and 0 <= x < 2 ** zoom and 0 <= y < 2 ** zoom
+
+
+def tiles_covering(west: float, south: float, east: float, north: float, zoom: int) -> Iterator[Tuple[int, int]]:
+    """Every tile a bounding box touches; a box crossing the antimeridian has west > east"""
+    min_x, min_y = tile_for(north, west, zoom)
+    max_x, max_y = tile_for(south, east, zoom)
+    n = 2 ** zoom
+    columns = range(min_x, max_x + 1) if min_x <= max_x else [*range(min_x, n), *range(0, max_x + 1)]
+    for x in columns:
+        for y in range(min_y, max_y + 1):
+            yield x, y
@@ -1,13 +1,14 @@
-import React, { useEffect, useState } from 'react';
+import React, { useCallback, useRef, useState } from 'react';
 import { GoogleMap, LoadScript, Marker, InfoWindow } from '@react-google-maps/api';
 import { useGeolocation } from '../../hooks/useGeolocation';
 import { useAuth } from '../../hooks/useAuth';
-import { dcGisApi } from '../../services/GISAPI';
+import shopsService from '../../services/api/shops';
 
 const BarbershopMap = () => {
-    const [shops, setShops] = useState([]);
+    const [items, setItems] = useState([]);
     const [selectedShop, setSelectedShop] = useState(null);
-    const [loading, setLoading] = useState(true);
+    const mapRef = useRef(null);
+    const requestRef = useRef(0);
     const { location } = useGeolocation();
     const { user } = useAuth();
 
@@ -23,22 +24,39 @@ const BarbershopMap = () => {
         boxShadow: '0 2px 4px rgba(0,0,0,0.1)'
     };
 
-    useEffect(() => {
-        const loadShops = async () => {
-            try {
-                setLoading(true);
-                const data = await dcGisApi.getBarberShops();
-                setShops(data);
-            } catch (error) {
-                console.error('Failed to load shops:', error);
-            } finally {
-                setLoading(false);
+    // Ask the server for the current viewport only; it returns clusters when zoomed out
+    const loadViewport = useCallback(async () => {
+        const map = mapRef.current;
+        const bounds = map && map.getBounds();
+        if (!bounds) return;
+        const requestId = ++requestRef.current;
+        try {
+            const data = await shopsService.getMapItems({
+                west: bounds.getSouthWest().lng(),
+                south: bounds.getSouthWest().lat(),
+                east: bounds.getNorthEast().lng(),
+                north: bounds.getNorthEast().lat(),
+                zoom: Math.round(map.getZoom())
+            });
+            // Drop responses for viewports the user has already panned away from
+            if (requestId === requestRef.current) {
+                setItems(data.items);
             }
-        };
-
-        loadShops();
+        } catch (error) {
+            console.error('Failed to load shops:', error);
+        }
     }, []);
 
+    const handleLoad = (map) => {
+        mapRef.current = map;
+    };
+
+    const handleClusterClick = (cluster) => {
+        const map = mapRef.current;
+        map.panTo(cluster.location);
+        map.setZoom(map.getZoom() + 2);
+    };
+
     const handleMarkerClick = (shop) => {
         setSelectedShop(shop);
     };
@@ -47,10 +65,6 @@ const BarbershopMap = () => {
         setSelectedShop(null);
     };
 
-    if (loading) {
-        return <div className="loading">Loading barbershops...</div>;
-    }
-
     return (
         <div className="map-container">
             <LoadScript googleMapsApiKey={process.env.REACT_APP_GOOGLE_MAPS_API_KEY}>
@@ -58,20 +72,26 @@ const BarbershopMap = () => {
                     mapContainerStyle={mapStyles}
                     zoom={13}
                     center={location || defaultCenter}
+                    onLoad={handleLoad}
+                    onIdle={loadViewport}
                     options={{
                         streetViewControl: false,
                         mapTypeControl: false,
                         fullscreenControl: true
                     }}
                 >
-                    {shops.map(shop => (
+                    {items.map(item => item.count > 1 ? (
                         <Marker
-                            key={shop.id}
-                            position={{
-                                lat: shop.location.lat,
-                                lng: shop.location.lng
-                            }}
-                            onClick={() => handleMarkerClick(shop)}
+                            key={`cluster-${item.location.lat}-${item.location.lng}`}
+                            position={item.location}
+                            label={{ text: String(item.count), color: '#fff' }}
+                            onClick={() => handleClusterClick(item)}
+                        />
+                    ) : (
+                        <Marker
+                            key={item.id}
+                            position={item.location}
+                            onClick={() => handleMarkerClick(item)}
                             icon={{
                                 url: '/barber-pin.png',
                                 scaledSize: new window.google.maps.Size(30, 30)
@@ -6,8 +6,11 @@ const bookingService = {
         return response.data;
     },
 
-    getAppointments: async () => {
-        const response = await api.get('/appointments');
+    // Newest first; pass the returned next_cursor to fetch the following page
+    getAppointments: async ({ cursor, perPage, status, from, to } = {}) => {
+        const response = await api.get('/appointments', {
+            params: { cursor, per_page: perPage, status, from, to }
+        });
         return response.data;
     },
 
@@ -21,6 +24,19 @@ const bookingService = {
             params: { date: date.toISOString() }
         });
         return response.data;
+    },
+
+    // One request for every barber of a shop (or an explicit list) across a date range
+    getAvailability: async ({ shopId, barberIds, start, end }) => {
+        const response = await api.get('/booking/availability', {
+            params: {
+                shop_id: shopId,
+                barber_ids: barberIds ? barberIds.join(',') : undefined,
+                start,
+                end
+            }
+        });
+        return response.data;
     }
 };
 
@@ -0,0 +1,28 @@
+import api from '../api';
+
+// The shop blueprint is mounted at /api/shops and its routes carry their own /shops prefix
+const SHOP_API = '/shops';
+const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5000/api';
+
+const shopsService = {
+    // Oldest first; pass the returned next_cursor to fetch the following page
+    getShops: async ({ cursor, perPage } = {}) => {
+        const response = await api.get(`${SHOP_API}/shops`, {
+            params: { cursor, per_page: perPage }
+        });
+        return response.data;
+    },
+
+    // Server-side clusters below the cluster zoom, individual shops above it
+    getMapItems: async ({ west, south, east, north, zoom }) => {
+        const response = await api.get(`${SHOP_API}/shops/map`, {
+            params: { bbox: [west, south, east, north].join(','), zoom }
+        });
+        return response.data;
+    },
+
+    // XYZ template for vector-tile map layers; tiles are HTTP-cacheable binary MVT
+    tileUrlTemplate: () => `${API_BASE_URL}${SHOP_API}/tiles/{z}/{x}/{y}.mvt`
+};
+
+export default shopsService;